@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import os
 import sys
 import json
+import threading
+import time
 from pathlib import Path
 
 # ✅ Add project root (ethical-mirror/) to Python import path
@@ -13,8 +16,14 @@ if str(ROOT) not in sys.path:
 import pandas as pd
 import streamlit as st
 
+from core.nlp.text_clean import NormalizeCache
 from core.pipeline import ImportConfig, run_pipeline
-from core.security.vault import DEFAULT_VAULT, load_encrypted, save_encrypted, wipe_vault
+from core.profiling import TRACE_ENV, Profiler
+from core.progress import CancelToken
+from core.source_cache import SourceCache
+from core.incremental import wipe_manifest
+from core.ingest.message_cache import wipe_message_cache
+from core.security.vault import DEFAULT_DIR, DEFAULT_VAULT, load_encrypted, save_encrypted, wipe_vault
 
 st.set_page_config(page_title="Ethical Mirror", page_icon="🪞", layout="wide")
 
@@ -58,7 +67,8 @@ with col2:
         placeholder=r"C:\path\to\History or /path/to/History",
     )
     st.info(
-        "Tip: if Chrome says the History file is locked, close the browser or import a copy. "
+        "Tip: the History file is opened read-only, so it can be read while the browser runs; "
+        "close the browser or import a copy to include the very latest visits. "
         "See docs/importing_browser_history.md"
     )
 
@@ -67,26 +77,181 @@ with st.expander("Advanced: import limits (for huge datasets)"):
     lim_eml = st.number_input("Max EML files", 100, 20000, 5000, 100)
     lim_notes = st.number_input("Max note files", 100, 20000, 5000, 100)
     lim_browser = st.number_input("Max browser visits", 100, 50000, 10000, 500)
+    norm_cache_mb = st.number_input(
+        "Normalized-text cache between runs (MB, 0 = off)",
+        0,
+        4096,
+        0,
+        16,
+        help="Keeps cleaned text in memory so re-analyzing the same items skips normalization.",
+    )
+    source_cache_mb = st.number_input(
+        "Imported sources kept between runs (MB, 0 = off)",
+        0,
+        16384,
+        256,
+        64,
+        help="Keeps each source's imported items in memory; analyzing again only re-reads sources whose "
+        "files or limits changed. Not used in streaming, columnar or incremental mode.",
+    )
+    workers = st.number_input(
+        "Email parsing worker processes",
+        1,
+        max(1, os.cpu_count() or 1),
+        1,
+        1,
+        help="Parse MBOX/EML messages on several CPU cores. 1 = single process.",
+    )
+    io_workers = st.number_input(
+        "File reading threads",
+        1,
+        64,
+        4,
+        1,
+        help="Read note and EML files concurrently; helps most for network drives and large folders.",
+    )
+    depth_choice = st.selectbox(
+        "Email ingest depth",
+        ["Full body", "Snippet (start of the body)", "Headers only (fast rhythm scan)"],
+        help="Headers only reads just Date/Subject/From, which is enough for rhythm and work patterns "
+        "and much faster on multi-GB archives. Interests then rely on subjects only.",
+    )
+    snippet_chars = st.number_input(
+        "Snippet length (characters)", 100, 200000, 2000, 100, disabled=depth_choice != "Snippet (start of the body)"
+    )
+    mbox_newest_first = st.checkbox(
+        "Take the newest MBOX messages first",
+        value=True,
+        help="When the MBOX has more messages than the limit, analyze the most recent ones.",
+    )
+    streaming = st.checkbox(
+        "Streaming mode (low memory, for very large archives)",
+        value=False,
+        help="Aggregates items as they are read instead of keeping them all in memory. "
+        "Duplicate detection still remembers a short key per email and note.",
+    )
+    columnar = st.checkbox(
+        "Columnar document store (less memory for large imports)",
+        value=False,
+        disabled=streaming,
+        help="Keeps imported items in compact column buffers instead of one Python object per item.",
+    )
+    incremental = st.checkbox(
+        "Incremental re-analysis (only read new or changed items)",
+        value=False,
+        help=f"Remembers derived per-item summaries in {DEFAULT_DIR} so unchanged files are skipped next time.",
+    )
+    manifest_passphrase = st.text_input(
+        "Passphrase for the incremental manifest (optional)",
+        type="password",
+        disabled=not incremental,
+        help="If set, the remembered summaries are encrypted like the vault and keep item previews. "
+        "Without it only ids, fingerprints and counts are stored, and the report shows no previews.",
+    )
+    message_cache_passphrase = st.text_input(
+        "Passphrase for the parsed-email cache (optional)",
+        type="password",
+        help=f"If set, parsed emails are kept AES-GCM encrypted in {DEFAULT_DIR} so unchanged messages "
+        "are not parsed again next time.",
+    )
+    message_cache_mb = st.number_input("Parsed-email cache size (MB)", 16, 8192, 256, 16)
+    trace_memory = st.checkbox(
+        "Measure peak memory per stage (slower)",
+        value=False,
+        help="Uses Python's tracemalloc; results appear in the Performance tab.",
+    )
 
-analyze = st.button("🔎 Analyze locally", type="primary")
+job = st.session_state.get("job")
+analyze = st.button("🔎 Analyze locally", type="primary", disabled=job is not None and not job["done"])
 
 if "report" not in st.session_state:
     st.session_state.report = None
 
+if norm_cache_mb:
+    if st.session_state.get("norm_cache") is None:
+        st.session_state.norm_cache = NormalizeCache()
+    st.session_state.norm_cache.max_bytes = int(norm_cache_mb) * 1024 * 1024
+else:
+    st.session_state.norm_cache = None
+
+if source_cache_mb:
+    if st.session_state.get("source_cache") is None:
+        st.session_state.source_cache = SourceCache()
+    st.session_state.source_cache.max_bytes = int(source_cache_mb) * 1024 * 1024
+else:
+    st.session_state.source_cache = None
+
 if analyze:
     cfg = ImportConfig(
         mbox_path=Path(mbox_path).expanduser() if mbox_path.strip() else None,
         eml_dir=Path(eml_dir).expanduser() if eml_dir.strip() else None,
         notes_dir=Path(notes_dir).expanduser() if notes_dir.strip() else None,
         browser_history_sqlite=Path(browser_sqlite).expanduser() if browser_sqlite.strip() else None,
+        streaming=streaming,
+        columnar=columnar,
+        workers=int(workers),
+        io_workers=int(io_workers),
+        mbox_newest_first=mbox_newest_first,
+        incremental=incremental,
+        manifest_passphrase=manifest_passphrase or None,
+        message_cache_passphrase=message_cache_passphrase or None,
+        message_cache_mb=int(message_cache_mb),
+        trace_memory=trace_memory,
+        ingest_depth={
+            "Full body": "full",
+            "Snippet (start of the body)": f"snippet:{int(snippet_chars)}",
+            "Headers only (fast rhythm scan)": "headers",
+        }[depth_choice],
     )
-    with st.spinner("Analyzing... (offline)"):
-        docs, report = run_pipeline(
-            cfg,
-            limits={"mbox": lim_mbox, "eml": lim_eml, "notes": lim_notes, "browser": lim_browser},
-        )
+    job = {"cancel": CancelToken(), "progress": None, "result": None, "error": None, "done": False}
+
+    def _analyze(job=job, cfg=cfg, norm_cache=st.session_state.norm_cache, source_cache=st.session_state.source_cache):
+        try:
+            job["result"] = run_pipeline(
+                cfg,
+                limits={"mbox": lim_mbox, "eml": lim_eml, "notes": lim_notes, "browser": lim_browser},
+                norm_cache=norm_cache,
+                source_cache=source_cache,
+                progress=lambda p: job.update(progress=p),
+                cancel=job["cancel"],
+            )
+        except Exception as e:
+            # e.g. a wrong manifest or cache passphrase
+            job["error"] = e
+        finally:
+            job["done"] = True
+
+    # The pipeline runs on its own thread so this script can keep redrawing the progress bar.
+    threading.Thread(target=_analyze, daemon=True).start()
+    st.session_state.job = job
+
+job = st.session_state.get("job")
+if job is not None and not job["done"]:
+    p = job["progress"]
+    if p is None:
+        st.progress(0.0, text="Starting… (offline)")
+    else:
+        stage = {"ingest": "Reading sources", "report": "Building the report"}.get(p.stage, "Finishing")
+        eta = f", about {p.eta:.0f} s left" if p.stage == "ingest" and p.eta is not None else ""
+        st.progress(p.fraction or 0.0, text=f"{stage}: {p.items:,} items, {p.bytes / 2**20:.1f} MB{eta}")
+    if job["cancel"].cancelled:
+        st.info("Cancelling… the report will cover what was read so far.")
+    elif st.button("✋ Cancel", key="cancel_analysis"):
+        job["cancel"].cancel()
+    time.sleep(0.5)
+    st.rerun()
+elif job is not None:
+    st.session_state.job = None
+    if job["error"] is not None:
+        st.error(f"Could not analyze: {job['error']}")
+        st.stop()
+    _, report = job["result"]
     st.session_state.report = report
-    st.success(f"Done. Analyzed {len(docs)} items across: {', '.join(report['summary']['sources']) or 'none'}")
+    summary = report["summary"]
+    if summary.get("cancelled"):
+        st.warning(f"Cancelled. Partial results from the {summary['documents_analyzed']} items read before stopping.")
+    else:
+        st.success(f"Done. Analyzed {summary['documents_analyzed']} items across: {', '.join(summary['sources']) or 'none'}")
 
 report = st.session_state.report
 if not report:
@@ -94,8 +259,8 @@ if not report:
 
 st.subheader("2) Dashboard")
 
-tab1, tab2, tab3, tab4, tab5 = st.tabs(
-    ["Interests", "Daily Rhythm", "Work Patterns", "Signals & Attribution", "Minimization Tips"]
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+    ["Interests", "Daily Rhythm", "Work Patterns", "Signals & Attribution", "Minimization Tips", "Performance"]
 )
 
 with tab1:
@@ -164,6 +329,48 @@ with tab5:
             for x in tip["do_this"]:
                 st.write("- ", x)
 
+with tab6:
+    st.markdown("### Where the time went")
+    diag = report.get("diagnostics")
+    if not diag:
+        st.info("No diagnostics were recorded for this report.")
+    else:
+        stage_rows = [
+            {
+                "Stage": name,
+                "Seconds": s["seconds"],
+                "Peak memory (MB)": s.get("peak_mb"),
+                "Calls": s.get("calls"),
+            }
+            for name, s in diag["stages"].items()
+        ]
+        if stage_rows:
+            dfs = pd.DataFrame(stage_rows)
+            st.bar_chart(dfs.set_index("Stage")["Seconds"])
+            st.dataframe(dfs, use_container_width=True)
+        st.caption(
+            "Normalization is summed over every item and runs inside the scoring stage "
+            "(inside ingest in streaming mode)."
+            + ("" if diag.get("memory_traced") else " Enable peak memory measurement under Advanced to fill that column.")
+        )
+        st.markdown("#### Per source")
+        source_rows = [
+            {
+                "Source": name,
+                "Items": s["items"],
+                "Text (MB)": round(s["bytes"] / 2**20, 2),
+                "Seconds": s["seconds"],
+                "Kept from last run": s.get("cached", False),
+            }
+            for name, s in diag["sources"].items()
+        ]
+        if source_rows:
+            st.dataframe(pd.DataFrame(source_rows), use_container_width=True)
+    vault_stage = st.session_state.get("vault_diagnostics")
+    if vault_stage:
+        st.metric("Last vault encryption", f"{vault_stage['seconds']:.2f} s")
+    st.caption(f"Set {TRACE_ENV}=/path/to/trace.json before starting the app to get a Chrome trace of each run.")
+
 st.subheader("3) Export / Secure storage (optional)")
 
 colA, colB = st.columns(2)
@@ -190,8 +397,11 @@ with colB:
             if not passphrase:
                 st.error("Enter a passphrase first.")
             else:
-                save_encrypted(report, passphrase)
-                st.success("Saved encrypted summary.")
+                prof = Profiler(trace_memory=trace_memory)
+                with prof.tracing(), prof.span("vault encryption"):
+                    save_encrypted(report, passphrase)
+                st.session_state.vault_diagnostics = prof.diagnostics()["stages"]["vault encryption"]
+                st.success(f"Saved encrypted summary ({st.session_state.vault_diagnostics['seconds']:.2f} s).")
     with c2:
         if st.button("🔓 Load from vault"):
             if not passphrase:
@@ -206,4 +416,12 @@ with colB:
     with c3:
         if st.button("🧨 Wipe vault"):
             wipe_vault()
-            st.success("Vault wiped (if it existed).")
+            wipe_manifest(DEFAULT_DIR)
+            wipe_message_cache(DEFAULT_DIR)
+            if st.session_state.get("source_cache") is not None:
+                st.session_state.source_cache.clear()
+            if st.session_state.get("norm_cache") is not None:
+                st.session_state.norm_cache.clear()
+            st.success(
+                "Vault, incremental manifest, parsed-email cache, kept imports and normalized text wiped (if they existed)."
+            )
@@ -0,0 +1,112 @@
+"""Bytes per document for a synthetic mbox-like corpus.
+
+Compares the old dict-backed Document layout (full "subject:/from:" text, fresh
+path/source strings per message) with the slotted, interned core.types.Document
+and with core.table.DocumentTable.
+
+    python benchmarks/document_memory.py [--n 100000] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.table import DocumentTable  # noqa: E402
+from core.types import EMAIL_HEADER_KEYS, Document  # noqa: E402
+from core.utils import stable_id  # noqa: E402
+
+MBOX_PATH = Path("/home/user/mail/archive.mbox")
+TOPICS = ["python docker kafka", "flight hotel visa", "gym protein workout", "stocks tax budget"]
+
+
+@dataclass
+class LegacyDocument:
+    # The layout core.types.Document had before it was slotted and interned.
+    doc_id: str
+    source: str
+    text: str
+    timestamp: Optional[datetime] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def _parsed(i: int):
+    # Fresh strings per message, as the MIME parser hands them over.
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    subj = f"Update {i}: {TOPICS[i % 4]}" if i % 3 else f"Re: weekly sync {i % 40}"
+    from_ = "".join(["Sender ", str(i % 50), " <sender", str(i % 50), "@example.com>"])
+    body = f"Hello,\n\nnotes about {TOPICS[(i + 1) % 4]} for item {i}.\n\nThanks\n" * 3
+    return subj, from_, base + timedelta(minutes=37 * i), body
+
+
+def legacy_doc(i: int) -> LegacyDocument:
+    subj, from_, ts, body = _parsed(i)
+    text = f"subject: {subj}\nfrom: {from_}\n\n{body}".strip()
+    return LegacyDocument(
+        doc_id=stable_id("mbox", str(MBOX_PATH), str(i), subj, from_),
+        source="".join(["email_", "mbox"]),
+        text=text,
+        timestamp=ts,
+        meta={"subject": subj, "from": from_, "index": i, "offset": i * 400, "path": str(MBOX_PATH)},
+    )
+
+
+def compact_doc(i: int) -> Document:
+    subj, from_, ts, body = _parsed(i)
+    return Document(
+        doc_id=stable_id("mbox", str(MBOX_PATH), str(i), subj, from_),
+        source="".join(["email_", "mbox"]),
+        text=body.strip(),
+        timestamp=ts,
+        meta={"subject": subj, "from": from_, "index": i, "offset": i * 400, "path": str(MBOX_PATH)},
+        header_keys=EMAIL_HEADER_KEYS,
+    )
+
+
+def measure(build: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+    n = args.n
+
+    runs: Dict[str, Callable[[], Any]] = {
+        "legacy_dataclass": lambda: [legacy_doc(i) for i in range(n)],
+        "slotted_interned": lambda: [compact_doc(i) for i in range(n)],
+        "document_table": lambda: DocumentTable.from_documents(compact_doc(i) for i in range(n)),
+    }
+    results: List[Dict[str, Any]] = []
+    for name, build in runs.items():
+        total = measure(build)
+        results.append({"layout": name, "documents": n, "bytes": total, "bytes_per_document": round(total / n, 1)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    base = results[0]["bytes_per_document"]
+    print(f"{'layout':<18} {'bytes/doc':>10} {'vs legacy':>10}")
+    for r in results:
+        print(f"{r['layout']:<18} {r['bytes_per_document']:>10.1f} {r['bytes_per_document'] / base:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Time every pipeline stage on the synthetic corpus at several scales.
+
+Ingests each source of a benchmarks/synthetic.py corpus, then times normalization,
+interest scoring, attribution, the time profiles, build_report, vault save/load and
+a full run_pipeline() on the result. Results are written as JSON; pass an earlier
+results file with --compare to print per-stage ratios against it.
+
+    python benchmarks/pipeline_stages.py [--scales 1000,10000,100000] [--repeat 1]
+        [--workdir DIR] [--out results.json] [--compare baseline.json]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.explain.attribution import keyword_attribution  # noqa: E402
+from core.infer.interests import CATEGORY_KEYWORDS, infer_interests  # noqa: E402
+from core.infer.rhythm import infer_rhythm  # noqa: E402
+from core.infer.work_patterns import infer_work_patterns  # noqa: E402
+from core.ingest.browser_history import ingest_chrome_history_sqlite  # noqa: E402
+from core.ingest.email_eml import ingest_eml_dir  # noqa: E402
+from core.ingest.email_mbox import ingest_mbox  # noqa: E402
+from core.ingest.notes import ingest_notes_dir  # noqa: E402
+from core.nlp.text_clean import normalize  # noqa: E402
+from core.pipeline import ImportConfig, run_pipeline  # noqa: E402
+from core.report.report import build_report  # noqa: E402
+from core.security.vault import load_encrypted, save_encrypted  # noqa: E402
+
+from synthetic import make_corpus  # noqa: E402
+
+PASSPHRASE = "benchmark passphrase"
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    # Fastest of `repeat` runs; the result of the last one.
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def run_scale(root: Path, n: int, repeat: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    paths = make_corpus(root, n)
+    generate_s = time.perf_counter() - t0
+    state = paths["mbox"].parent / "state"
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    def stage(name: str, fn: Callable[[], Any], items: int | None = None) -> Any:
+        seconds, out = _best(fn, repeat)
+        count = len(out) if items is None and isinstance(out, list) else items
+        entry: Dict[str, Any] = {"seconds": round(seconds, 4)}
+        if count:
+            entry["items"] = count
+            entry["items_per_s"] = round(count / seconds) if seconds else None
+        stages[name] = entry
+        print(f"  {name:<30} {seconds:>9.3f} s" + (f"  {count:>8} items" if count else ""), flush=True)
+        return out
+
+    # index_dir=None: the mbox offset index is rebuilt on every run instead of reused
+    mbox = stage("ingest_mbox", lambda: ingest_mbox(paths["mbox"], limit=n, index_dir=None))
+    eml = stage("ingest_eml_dir", lambda: ingest_eml_dir(paths["eml"], limit=n))
+    notes = stage("ingest_notes_dir", lambda: ingest_notes_dir(paths["notes"], limit=n))
+    browser = stage("ingest_chrome_history_sqlite", lambda: ingest_chrome_history_sqlite(paths["browser"], limit=n))
+    docs = mbox + eml + notes + browser
+
+    stage("normalize", lambda: [normalize(d.text) for d in docs])
+    interests = stage("infer_interests", lambda: infer_interests(docs), items=len(docs))
+    label = interests[0].label if interests else next(iter(CATEGORY_KEYWORDS))
+    stage("keyword_attribution", lambda: keyword_attribution(docs, label, CATEGORY_KEYWORDS[label]), items=len(docs))
+    stage("infer_rhythm", lambda: infer_rhythm(docs), items=len(docs))
+    stage("infer_work_patterns", lambda: infer_work_patterns(docs), items=len(docs))
+    report = stage("build_report", lambda: build_report(docs), items=len(docs))
+    vault = state / "vault.bin"
+    state.mkdir(parents=True, exist_ok=True)
+    stage("vault_save", lambda: save_encrypted(report, PASSPHRASE, vault))
+    stage("vault_load", lambda: load_encrypted(PASSPHRASE, vault))
+
+    cfg = ImportConfig(
+        mbox_path=paths["mbox"],
+        eml_dir=paths["eml"],
+        notes_dir=paths["notes"],
+        browser_history_sqlite=paths["browser"],
+        state_dir=state,
+    )
+    limits = {"mbox": n, "eml": n, "notes": n, "browser": n}
+    _, full = stage("run_pipeline", lambda: run_pipeline(cfg, limits=limits), items=len(docs))
+
+    return {
+        "n": n,
+        "generate_seconds": round(generate_s, 3),
+        "corpus_bytes": sum(_size(p) for p in paths.values()),
+        "documents": len(docs),
+        "interest_label": label,
+        "stages": stages,
+        "run_pipeline_diagnostics": full.get("diagnostics"),
+    }
+
+
+def _size(p: Path) -> int:
+    if p.is_file():
+        return p.stat().st_size
+    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    print(f"\n{'scale':>7} {'stage':<30} {'before':>9} {'after':>9} {'ratio':>7}")
+    for scale, run in new["results"].items():
+        before = old.get("results", {}).get(scale)
+        if not before:
+            continue
+        for name, st in run["stages"].items():
+            b = before["stages"].get(name)
+            if not b:
+                continue
+            ratio = st["seconds"] / b["seconds"] if b["seconds"] else float("nan")
+            print(f"{scale:>7} {name:<30} {b['seconds']:>9.3f} {st['seconds']:>9.3f} {ratio:>6.2f}x")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scales", default="1000,10000,100000", help="comma-separated items per source")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per stage; the fastest is kept")
+    ap.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "ethical_mirror_bench",
+        help="where generated corpora are kept (and reused) between runs",
+    )
+    ap.add_argument("--out", type=Path, default=Path("benchmark_results.json"))
+    ap.add_argument("--compare", type=Path, help="earlier results JSON to compare against")
+    args = ap.parse_args()
+
+    results: Dict[str, Any] = {}
+    for n in [int(s) for s in args.scales.split(",") if s.strip()]:
+        print(f"scale {n}", flush=True)
+        results[str(n)] = run_scale(args.workdir, n, args.repeat)
+
+    out = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    args.out.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        compare(json.loads(args.compare.read_text(encoding="utf-8")), out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Deterministic synthetic corpus: an mbox, an EML tree, a notes vault and a Chrome History.
+
+The same `n` and `seed` always produce the same messages, notes (mtimes included)
+and visits, so benchmark runs on different machines or commits read the same data.
+
+    python benchmarks/synthetic.py OUT_DIR [--n 10000] [--seed 0]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Dict
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from core.infer.interests import CATEGORY_KEYWORDS  # noqa: E402
+
+# Bump when the generated data changes, so cached corpora are rebuilt.
+GENERATOR_VERSION = 1
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CHROME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+FILLER = (
+    "the a to and of for on with this that we you it is be as at by from please thanks "
+    "meeting update team week plan review next call notes follow draft share"
+).split()
+KEYWORDS = [kw for kws in CATEGORY_KEYWORDS.values() for kw in kws]
+HOSTS = [
+    "github.com", "stackoverflow.com", "arxiv.org", "www.youtube.com", "news.example.org",
+    "www.amazon.com", "www.booking.com", "docs.python.org", "mail.example.com", "www.netflix.com",
+]
+PDF_STUB = b"%PDF-1.4\n" + bytes(range(256)) * 8
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    out = [rng.choice(KEYWORDS) if rng.random() < 0.2 else rng.choice(FILLER) for _ in range(words)]
+    return " ".join(out).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, n: int) -> str:
+    return "\n\n".join(" ".join(_sentence(rng) for _ in range(rng.randint(2, 5))) for _ in range(n))
+
+
+def _when(rng: random.Random, i: int) -> datetime:
+    # Spread over about a year, with working-hours and evening peaks.
+    hour = rng.choice([7, 8, 9, 9, 10, 11, 13, 14, 15, 16, 17, 20, 21, 22, 23])
+    return BASE + timedelta(days=(i * 7919) % 365, hours=hour, minutes=rng.randint(0, 59))
+
+
+def make_email(i: int, seed: int = 0) -> bytes:
+    """One message; the mix covers multipart/alternative, quoted plain text and
+    HTML-only messages, every tenth with a PDF attachment."""
+    rng = random.Random(seed * 1_000_003 + i)
+    msg = EmailMessage()
+    msg["Subject"] = ("Re: " if i % 3 == 1 else "") + _sentence(rng, 6).rstrip(".")
+    msg["From"] = f"Sender {i % 97} <sender{i % 97}@example.com>"
+    msg["To"] = "me@example.com"
+    msg["Date"] = format_datetime(_when(rng, i))
+    msg["Message-ID"] = f"<{seed}.{i}@synthetic.example.com>"
+    body = _paragraphs(rng, rng.randint(1, 4))
+    html = "<html><body>" + "".join(f"<p>{p}</p>" for p in body.split("\n\n")) + "<script>var x=1;</script></body></html>"
+    kind = i % 3
+    if kind == 0:
+        msg.set_content(body)
+        msg.add_alternative(html, subtype="html")
+    elif kind == 1:
+        quoted = "\n".join("> " + line for line in _paragraphs(rng, 2).splitlines())
+        msg.set_content(f"{body}\n\nOn Mon, 1 Jan 2024, Someone wrote:\n{quoted}\n\n-- \nSender {i % 97}\n+1 555 0100\n")
+    else:
+        msg.set_content(html, subtype="html")
+    if i % 10 == 0:
+        msg.add_attachment(PDF_STUB, maintype="application", subtype="pdf", filename=f"doc{i}.pdf")
+    # The email package picks random boundaries; fixed ones keep the output byte-identical.
+    for k, part in enumerate(msg.walk()):
+        if part.is_multipart():
+            part.set_boundary(f"=_synthetic_{seed}_{i}_{k}")
+    return msg.as_bytes()
+
+
+def write_mbox(path: Path, n: int, seed: int = 0) -> None:
+    with open(path, "wb") as f:
+        for i in range(n):
+            raw = make_email(i, seed).replace(b"\nFrom ", b"\n>From ")
+            f.write(b"From sender@example.com Mon Jan  1 00:00:00 2024\n" + raw + b"\n")
+
+
+def write_eml_tree(root: Path, n: int, seed: int = 0) -> None:
+    # <year>/<month>/<n>.eml, like most mail-client exports
+    for i in range(n):
+        raw = make_email(n + i, seed)
+        d = root / str(2024 + i % 2) / f"{i % 12 + 1:02d}"
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f"{i:07d}.eml").write_bytes(raw)
+
+
+def write_notes(root: Path, n: int, seed: int = 0) -> None:
+    folders = list(CATEGORY_KEYWORDS) + ["inbox", "daily"]
+    for i in range(n):
+        rng = random.Random(seed * 1_000_003 + 500_000_000 + i)
+        d = root / folders[i % len(folders)].split(" ")[0]
+        d.mkdir(parents=True, exist_ok=True)
+        ext = ".md" if i % 4 else ".txt"
+        text = f"# {_sentence(rng, 5)}\n\n" + _paragraphs(rng, rng.randint(1, 6)) + "\n"
+        p = d / f"note{i:07d}{ext}"
+        p.write_text(text, encoding="utf-8")
+        ts = _when(rng, i).timestamp()
+        os.utime(p, (ts, ts))
+
+
+def write_chrome_history(path: Path, n: int, seed: int = 0) -> None:
+    """`n` visits over n // 10 URLs, in Chrome's urls/visits schema."""
+    rng = random.Random(seed * 1_000_003 + 900_000_000)
+    if path.exists():
+        path.unlink()
+    con = sqlite3.connect(str(path))
+    con.executescript(
+        """
+        CREATE TABLE urls (id INTEGER PRIMARY KEY AUTOINCREMENT, url LONGVARCHAR, title LONGVARCHAR,
+            visit_count INTEGER DEFAULT 0 NOT NULL, typed_count INTEGER DEFAULT 0 NOT NULL,
+            last_visit_time INTEGER NOT NULL, hidden INTEGER DEFAULT 0 NOT NULL);
+        CREATE TABLE visits (id INTEGER PRIMARY KEY, url INTEGER NOT NULL, visit_time INTEGER NOT NULL,
+            from_visit INTEGER, transition INTEGER DEFAULT 0 NOT NULL, segment_id INTEGER,
+            visit_duration INTEGER DEFAULT 0 NOT NULL);
+        CREATE INDEX visits_url_index ON visits (url);
+        CREATE INDEX visits_time_index ON visits (visit_time);
+        """
+    )
+    n_urls = max(1, n // 10)
+    urls = []
+    for u in range(1, n_urls + 1):
+        host = HOSTS[u % len(HOSTS)]
+        urls.append((u, f"https://{host}/{'/'.join(_sentence(rng, 3).lower().rstrip('.').split())}?id={u}", _sentence(rng, 6)))
+    visits = []
+    last: Dict[int, int] = {}
+    for v in range(1, n + 1):
+        # a handful of URLs get many visits, the rest a few each
+        u = int(rng.paretovariate(1.2)) % n_urls + 1 if rng.random() < 0.3 else rng.randint(1, n_urls)
+        t = int((_when(rng, v) - CHROME_EPOCH).total_seconds() * 1_000_000)
+        visits.append((v, u, t, 0, 805306368, 0, rng.randint(0, 600_000_000)))
+        last[u] = max(last.get(u, 0), t)
+    con.executemany(
+        "INSERT INTO urls (id, url, title, visit_count, typed_count, last_visit_time, hidden) VALUES (?, ?, ?, 0, 0, ?, 0)",
+        [(u, url, title, last.get(u, 0)) for u, url, title in urls],
+    )
+    con.executemany("INSERT INTO visits VALUES (?, ?, ?, ?, ?, ?, ?)", visits)
+    con.execute("UPDATE urls SET visit_count = (SELECT COUNT(*) FROM visits WHERE visits.url = urls.id)")
+    con.commit()
+    con.close()
+
+
+def make_corpus(root: Path, n: int, seed: int = 0) -> Dict[str, Path]:
+    """Write (or reuse) the corpus for `n` items per source under root/n<n>_s<seed>; return its paths."""
+    root = Path(root) / f"n{n}_s{seed}"
+    paths = {
+        "mbox": root / "mail.mbox",
+        "eml": root / "eml",
+        "notes": root / "notes",
+        "browser": root / "History",
+    }
+    stamp = root / "corpus.json"
+    spec = {"version": GENERATOR_VERSION, "n": n, "seed": seed}
+    try:
+        if json.loads(stamp.read_text()) == spec:
+            return paths
+    except (OSError, ValueError):
+        pass
+
+    root.mkdir(parents=True, exist_ok=True)
+    write_mbox(paths["mbox"], n, seed)
+    write_eml_tree(paths["eml"], n, seed)
+    write_notes(paths["notes"], n, seed)
+    write_chrome_history(paths["browser"], n, seed)
+    stamp.write_text(json.dumps(spec))
+    return paths
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("out", type=Path)
+    ap.add_argument("--n", type=int, default=10_000, help="items per source")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    for name, p in make_corpus(args.out, args.n, args.seed).items():
+        print(f"{name:<8} {p}")
+
+
+if __name__ == "__main__":
+    main()
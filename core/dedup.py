@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable, Iterator, Optional
+
+from .types import Document
+from .utils import epoch_key
+
+
+def _digest(*parts: str) -> str:
+    # Case and whitespace differences (re-wrapped bodies, CRLF) do not make a new copy.
+    norm = "\x00".join(" ".join(p.lower().split()) for p in parts)
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def dedup_key(d: Document) -> Optional[str]:
+    """Identity of a document's content across sources, or None if it is never collapsed.
+
+    Emails are keyed on their Message-ID, or on text plus Date when they have none,
+    so the same message in an mbox export and an .eml folder counts once. Notes are
+    keyed on their text. Browser documents are already one per URL.
+    """
+    if d.source.startswith("email"):
+        mid = (d.meta.get("message_id") or "").strip().strip("<>")
+        if mid:
+            return "mid:" + mid
+        return "email:" + _digest(d.text, repr(epoch_key(d.timestamp)))
+    if d.source == "notes":
+        return "note:" + _digest(d.text)
+    return None
+
+
+class Deduplicator:
+    """Drops documents whose dedup_key() was already seen in this run; the first copy wins.
+
+    Every mode feeds it the sources in source order, each in its read order, so they
+    all keep the same copy. `seen` holds one key (a Message-ID or a 32-character
+    digest, roughly 100-150 bytes with set overhead) per email and note for the whole
+    run: streaming mode's memory is then bounded except for this set, which grows
+    with the number of keyed documents. Turn ImportConfig.dedup off where that matters.
+    """
+
+    def __init__(self):
+        self.seen: set = set()
+        self.collapsed = 0
+
+    def is_duplicate(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        if key in self.seen:
+            self.collapsed += 1
+            return True
+        self.seen.add(key)
+        return False
+
+    def merge(self, other: "Deduplicator") -> None:
+        # Only for deduplicators whose key spaces do not overlap (separate sources).
+        self.seen |= other.seen
+        self.collapsed += other.collapsed
+
+    def filter(self, docs: Iterable[Document]) -> Iterator[Document]:
+        for d in docs:
+            if not self.is_duplicate(dedup_key(d)):
+                yield d
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 from collections import defaultdict
-import re
 
 from ..types import Document
-from ..nlp.text_clean import normalize, sentence_snippet
+from ..table import DocumentTable
+from ..nlp.text_clean import sentence_snippet
+from ..nlp.keyword_index import KeywordIndex
+from ..infer.interests import ENTRY_META_KEYS, KeywordMatrix, build_keyword_matrix
 
 
 @dataclass
@@ -16,46 +18,51 @@ class Attribution:
     top_documents: List[Dict[str, Any]]
 
 
-def keyword_attribution(docs: List[Document], label: str, keywords: List[str], top_docs: int = 6) -> Attribution:
-    scores: List[Tuple[float, Document, List[str]]] = []
-
-    for d in docs:
-        t = normalize(d.text)
-        hit_kws: List[str] = []
-        s = 0.0
-        for kw in keywords:
-            kw_norm = normalize(kw)
-            if " " in kw_norm:
-                c = t.count(kw_norm)
-            else:
-                c = len(re.findall(rf"\b{re.escape(kw_norm)}\b", t))
-            if c:
-                s += c
-                hit_kws.append(kw)
-        if s > 0:
-            scores.append((s, d, hit_kws))
-
-    scores.sort(key=lambda x: x[0], reverse=True)
+def attribution_from_matrix(matrix: KeywordMatrix, label: str, top_docs: int = 6) -> Attribution:
+    # Weighted by the events each document stands for (visits of a URL).
+    scores: List[Tuple[float, int, List[str]]] = [
+        (float(sum(hits.values())) * matrix.weights[i], i, list(hits)) for i, hits in matrix.keyword_hits.get(label, [])
+    ]
 
+    # Document frequency per keyword, counted in document order so ties rank the
+    # same way as in the streaming ReportAccumulator.
     kw_counts = defaultdict(int)
-    for s, d, hit_kws in scores:
+    for s, i, hit_kws in scores:
         for k in hit_kws:
-            kw_counts[k] += 1
-
-    sigs = [{"type": "keyword", "value": k, "strength": int(c)} for k, c in sorted(kw_counts.items(), key=lambda x: x[1], reverse=True)[:10]]
-
-    top_documents = []
-    for s, d, hit_kws in scores[:top_docs]:
-        top_documents.append(
-            {
-                "doc_id": d.doc_id,
-                "source": d.source,
-                "timestamp": d.timestamp.isoformat() if d.timestamp else None,
-                "score": float(s),
-                "matched": hit_kws[:8],
-                "preview": sentence_snippet(d.text),
-                "meta": {k: d.meta.get(k) for k in ("subject", "from", "host", "title", "path", "url") if k in d.meta},
-            }
-        )
+            kw_counts[k] += matrix.weights[i]
 
+    sigs = keyword_signals(kw_counts)
+    scores.sort(key=lambda x: x[0], reverse=True)
+
+    top_documents = [document_entry(matrix.docs[i], s, hit_kws) for s, i, hit_kws in scores[:top_docs]]
     return Attribution(inference=label, signals=sigs, top_documents=top_documents)
+
+
+def keyword_signals(kw_counts: Dict[str, int], limit: int = 10) -> List[Dict[str, Any]]:
+    return [{"type": "keyword", "value": k, "strength": int(c)} for k, c in sorted(kw_counts.items(), key=lambda x: x[1], reverse=True)[:limit]]
+
+
+def document_entry(d: Document, score: float, matched: List[str]) -> Dict[str, Any]:
+    return {
+        "doc_id": d.doc_id,
+        "source": d.source,
+        "timestamp": d.timestamp.isoformat() if d.timestamp else None,
+        "score": float(score),
+        "matched": matched[:8],
+        "preview": sentence_snippet(d.text),
+        "meta": {k: d.meta.get(k) for k in ENTRY_META_KEYS if k in d.meta},
+    }
+
+
+def keyword_attribution(
+    docs: List[Document] | DocumentTable,
+    label: str,
+    keywords: List[str],
+    top_docs: int = 6,
+    index: Optional[KeywordIndex] = None,
+) -> Attribution:
+    # Callers that already hold an index covering `label` (e.g. KEYWORD_INDEX) can pass it in.
+    if index is None or index.categories.get(label) != list(keywords):
+        index = KeywordIndex({label: keywords})
+    matrix = build_keyword_matrix(docs, index=index)
+    return attribution_from_matrix(matrix, label, top_docs=top_docs)
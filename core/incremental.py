@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from .dedup import Deduplicator, dedup_key
+from .nlp.text_clean import NormalizeCache
+from .profiling import NULL_PROFILER, Profiler, text_bytes
+from .progress import CancelToken, ProgressTracker
+from .report.aggregate import ReportAccumulator
+from .types import Document
+from .utils import stable_id
+from .security.vault import load_encrypted, save_encrypted
+from .ingest.dates import DATE_PARSER, DateParser
+from .ingest.email_mbox import iter_mbox
+from .ingest.email_eml import scan_eml_files, iter_eml_files
+from .ingest.notes import scan_note_files, iter_note_files
+from .ingest.walk import FileEntry
+from .ingest.browser_history import iter_chrome_history_batches, max_visit_id
+from .ingest.mbox_index import load_or_build_index
+from .ingest.message_cache import MessageCache
+
+if TYPE_CHECKING:
+    from .pipeline import ImportConfig
+
+MANIFEST_VERSION = 6
+
+
+@dataclass
+class Manifest:
+    """What earlier runs already analyzed.
+
+    `sources[name]` holds source-level fingerprints (mbox size/offsets, browser
+    watermark, ...). `items[name][key]` holds each item's fingerprint and the
+    ReportAccumulator facts derived from it, so unchanged items are never re-read.
+
+    Paths and dedup keys are stored hashed. Preview text (snippets, subjects, senders,
+    URLs) is only kept when the manifest is encrypted; a plaintext manifest holds ids,
+    fingerprints and counts, and reports built from it show no previews.
+    """
+
+    sources: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    items: Dict[str, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    previews: bool = False  # not persisted; set when loaded with a passphrase
+
+
+@dataclass
+class RefreshStats:
+    reused: int = 0
+    ingested: int = 0
+    removed: int = 0
+    bytes: int = 0  # body size of the ingested items
+
+
+def manifest_path(state_dir: Path, encrypted: bool) -> Path:
+    return state_dir / ("manifest.bin" if encrypted else "manifest.json")
+
+
+def load_manifest(state_dir: Path, passphrase: Optional[str] = None) -> Manifest:
+    path = manifest_path(state_dir, encrypted=bool(passphrase))
+    if not path.exists():
+        return Manifest(previews=bool(passphrase))
+    if passphrase:
+        # A wrong passphrase raises here on purpose instead of silently starting over.
+        obj = load_encrypted(passphrase, path)
+    else:
+        try:
+            obj = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return Manifest()
+    if obj.get("version") != MANIFEST_VERSION:
+        return Manifest(previews=bool(passphrase))
+    return Manifest(sources=obj.get("sources", {}), items=obj.get("items", {}), previews=bool(passphrase))
+
+
+def save_manifest(m: Manifest, state_dir: Path, passphrase: Optional[str] = None) -> None:
+    obj = {"version": MANIFEST_VERSION, "sources": m.sources, "items": m.items}
+    path = manifest_path(state_dir, encrypted=bool(passphrase))
+    if passphrase:
+        save_encrypted(obj, passphrase, path)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def wipe_manifest(state_dir: Path) -> None:
+    for encrypted in (False, True):
+        try:
+            manifest_path(state_dir, encrypted).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _path_key(path: Path) -> str:
+    return stable_id(str(path))
+
+
+def _facts(m: Manifest, acc: ReportAccumulator, d: Document) -> Dict[str, Any]:
+    f = acc.facts(d)
+    if not m.previews:
+        for key in ("source_entry", "doc_entry"):
+            if key in f:
+                f[key] = dict(f[key], preview="", meta={})
+    return f
+
+
+def _item(m: Manifest, acc: ReportAccumulator, d: Document, stats: RefreshStats) -> Dict[str, Any]:
+    # Facts plus what the final pass needs without the document: dedup key, stripped bytes.
+    stats.bytes += text_bytes(d.body)
+    dup = dedup_key(d)
+    return {
+        "facts": _facts(m, acc, d),
+        "dup": stable_id(dup) if dup is not None else None,
+        "stripped": d.meta.get("stripped_bytes", 0),
+    }
+
+
+def _refresh_files(m: Manifest, name: str, files: List[FileEntry], load, stats: RefreshStats) -> None:
+    # `load(changed_files)` yields one _item() per file, in order.
+    old = m.items.get(name, {})
+    keys = [_path_key(f.path) for f in files]
+    found: Dict[str, Dict[str, Any]] = {}
+    changed: List[Tuple[str, FileEntry]] = []
+    for key, f in zip(keys, files):
+        item = old.get(key)
+        if item is not None and item["fp"] == [f.stat.st_mtime_ns, f.stat.st_size]:
+            found[key] = item
+            stats.reused += 1
+        else:
+            changed.append((key, f))
+
+    for (key, f), item in zip(changed, load([f for _, f in changed])):
+        found[key] = dict(item, fp=[f.stat.st_mtime_ns, f.stat.st_size])
+        stats.ingested += 1
+
+    # Kept in file (read) order, which decides the copy deduplication keeps.
+    new = {key: found[key] for key in keys if key in found}
+    stats.removed += len(set(old) - set(new))
+    m.items[name] = new
+
+
+def _refresh_mbox(
+    m: Manifest,
+    cfg: ImportConfig,
+    limit: int,
+    acc: ReportAccumulator,
+    stats: RefreshStats,
+    cache: Optional[MessageCache] = None,
+    tracker: Optional[ProgressTracker] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> None:
+    path = cfg.mbox_path
+    index_dir = cfg.state_dir / "mbox_index"
+    idx = load_or_build_index(path, index_dir=index_dir)
+    n = len(idx)
+    src = m.sources.get("mbox", {})
+    old = m.items.get("mbox", {})
+
+    # Messages before the last known one are unchanged if the file only grew.
+    prev_count = int(src.get("count", 0))
+    resume = 0
+    if (
+        src.get("path") == _path_key(path)
+        and src.get("head_sha") == idx.head_sha
+        and 0 < prev_count <= n
+        and idx.offsets[prev_count - 1] == src.get("last_offset")
+        and src.get("depth", "full") == cfg.ingest_depth
+    ):
+        unchanged = (src.get("size"), src.get("mtime_ns")) == (idx.size, idx.mtime_ns)
+        resume = prev_count if unchanged else prev_count - 1
+
+    lo, hi = (max(0, n - limit), n) if cfg.mbox_newest_first else (0, min(n, limit))
+    new: Dict[str, Dict[str, Any]] = {}
+    todo: List[int] = []
+    for i in range(lo, hi):
+        item = old.get(str(i))
+        if i < resume and item is not None:
+            new[str(i)] = item
+            stats.reused += 1
+        else:
+            todo.append(i)
+
+    # Re-read contiguous runs of message indexes straight from their byte offsets.
+    runs: List[List[int]] = []
+    for i in todo:
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    for a, b in runs:
+        if cancel is not None and cancel.stop():
+            break
+        docs = iter_mbox(
+            path,
+            limit=b - a,
+            workers=cfg.workers,
+            start=a,
+            index_dir=index_dir,
+            cache=cache,
+            depth=cfg.ingest_depth,
+            progress=tracker.source("mbox") if tracker is not None else None,
+            cancel=cancel,
+            dates=dates,
+        )
+        for d in docs:
+            new[str(d.meta["index"])] = dict(_item(m, acc, d, stats), fp=d.meta["offset"])
+            stats.ingested += 1
+
+    stats.removed += len(set(old) - set(new))
+    m.items["mbox"] = new
+    m.sources["mbox"] = {
+        "path": _path_key(path),
+        "size": idx.size,
+        "mtime_ns": idx.mtime_ns,
+        "head_sha": idx.head_sha,
+        "count": n,
+        "last_offset": idx.offsets[n - 1] if n else None,
+        "depth": cfg.ingest_depth,
+    }
+
+
+def _refresh_eml(
+    m: Manifest,
+    cfg: ImportConfig,
+    limit: int,
+    acc: ReportAccumulator,
+    stats: RefreshStats,
+    cache: Optional[MessageCache] = None,
+    tracker: Optional[ProgressTracker] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> None:
+    if m.sources.get("eml", {}).get("depth", "full") != cfg.ingest_depth:
+        m.items.pop("eml", None)  # facts were derived at another depth; read everything again
+    load = lambda files: (
+        _item(m, acc, d, stats)
+        for d in iter_eml_files(
+            [f.path for f in files],
+            workers=cfg.workers,
+            cache=cache,
+            depth=cfg.ingest_depth,
+            io_workers=cfg.io_workers,
+            progress=tracker.source("eml") if tracker is not None else None,
+            cancel=cancel,
+            dates=dates,
+        )
+    )
+    _refresh_files(m, "eml", scan_eml_files(cfg.eml_dir, limit=limit), load, stats)
+    m.sources["eml"] = {"depth": cfg.ingest_depth}
+
+
+def _refresh_notes(
+    m: Manifest,
+    cfg: ImportConfig,
+    limit: int,
+    acc: ReportAccumulator,
+    stats: RefreshStats,
+    tracker: Optional[ProgressTracker] = None,
+    cancel: Optional[CancelToken] = None,
+) -> None:
+    progress = tracker.source("notes") if tracker is not None else None
+    load = lambda files: (
+        _item(m, acc, d, stats)
+        for d in iter_note_files(files, io_workers=cfg.io_workers, progress=progress, cancel=cancel)
+    )
+    _refresh_files(m, "notes", scan_note_files(cfg.notes_dir, limit=limit), load, stats)
+
+
+def _merge_url_facts(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    # New visits of a URL seen before: keep every visit time, take everything else
+    # (title, keyword hits, previews) from the newest record.
+    newest = max((e for e in (old.get("e"), new.get("e")) if e is not None), default=None)
+    return _with_visits(dict(new, e=newest), sorted(old["t"] + new["t"], reverse=True))
+
+
+def _epoch(f: Dict[str, Any]) -> float:
+    return f["e"] if f.get("e") is not None else float("-inf")
+
+
+def _with_visits(f: Dict[str, Any], times: List[int]) -> Dict[str, Any]:
+    f = dict(f, t=times, w=len(times) or 1)
+    for key in ("source_entry", "doc_entry"):
+        if key in f:
+            f[key] = dict(f[key], meta=dict(f[key]["meta"], visits=len(times)))
+    return f
+
+
+def _refresh_browser(
+    m: Manifest,
+    path: Path,
+    limit: int,
+    acc: ReportAccumulator,
+    stats: RefreshStats,
+    tracker: Optional[ProgressTracker] = None,
+    cancel: Optional[CancelToken] = None,
+) -> None:
+    src = m.sources.get("browser", {})
+    watermark = src.get("watermark") if src.get("path") == _path_key(path) else None
+    if watermark is not None and max_visit_id(path) < watermark:
+        watermark = None  # history was cleared or replaced; start over
+    old = m.items.get("browser", {}) if watermark is not None else {}
+
+    # Visit ids only grow, so everything above the watermark is new. Items are per URL.
+    items = dict(old)
+    touched = set()
+    new_watermark = watermark
+    progress = tracker.source("browser") if tracker is not None else None
+    for batch in iter_chrome_history_batches(
+        path, limit=limit, since_visit_id=watermark, progress=progress, cancel=cancel
+    ):
+        for d in batch:
+            facts = _facts(m, acc, d)
+            stats.bytes += text_bytes(d.body)
+            if d.doc_id in items:
+                facts = _merge_url_facts(items[d.doc_id]["facts"], facts)
+            items[d.doc_id] = {"fp": d.meta["visit_time"], "facts": facts}
+            touched.add(d.doc_id)
+            new_watermark = max(new_watermark or 0, d.meta["visit_id"])
+        stats.ingested += len(batch)
+
+    # Keep the newest `limit` visits across all URLs, like a full import would.
+    newest = heapq.nlargest(limit, ((t, key) for key, item in items.items() for t in item["facts"]["t"]))
+    kept: Dict[str, int] = {}
+    for _, key in newest:
+        kept[key] = kept.get(key, 0) + 1
+    new: Dict[str, Dict[str, Any]] = {}
+    for key, item in items.items():
+        facts = item["facts"]
+        if key not in kept:
+            continue
+        if kept[key] != len(facts["t"]):
+            facts = _with_visits(facts, facts["t"][: kept[key]])
+        new[key] = dict(item, facts=facts)
+    stats.reused += len((set(old) - touched) & set(new))
+    stats.removed += len(set(m.items.get("browser", {})) - set(new))
+    m.items["browser"] = new
+    m.sources["browser"] = {"path": _path_key(path), "watermark": new_watermark}
+
+
+def run_incremental(
+    cfg: ImportConfig,
+    limits: dict | None = None,
+    norm_cache: NormalizeCache | None = None,
+    passphrase: Optional[str] = None,
+    message_cache: Optional[MessageCache] = None,
+    dedup: Optional[Deduplicator] = None,
+    stripped: Optional[Counter] = None,
+    profiler: Profiler = NULL_PROFILER,
+    tracker: Optional[ProgressTracker] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> Dict[str, Any]:
+    """Ingest only new/changed items since the last run and rebuild the report from the manifest.
+
+    A cancelled run still reports on what it read, but does not save the manifest.
+    """
+    limits = limits or {}
+    m = load_manifest(cfg.state_dir, passphrase)
+    acc = ReportAccumulator(norm_cache=norm_cache, profiler=profiler)
+    stats = RefreshStats()
+
+    refreshers: List[Tuple[str, Callable[[RefreshStats], None]]] = []
+    if cfg.mbox_path:
+        refreshers.append(
+            (
+                "mbox",
+                lambda st: _refresh_mbox(
+                    m, cfg, int(limits.get("mbox", 5000)), acc, st, message_cache, tracker, cancel, dates
+                ),
+            )
+        )
+    if cfg.eml_dir:
+        refreshers.append(
+            (
+                "eml",
+                lambda st: _refresh_eml(
+                    m, cfg, int(limits.get("eml", 5000)), acc, st, message_cache, tracker, cancel, dates
+                ),
+            )
+        )
+    if cfg.notes_dir:
+        refreshers.append(
+            ("notes", lambda st: _refresh_notes(m, cfg, int(limits.get("notes", 5000)), acc, st, tracker, cancel))
+        )
+    if cfg.browser_history_sqlite:
+        refreshers.append(
+            (
+                "browser",
+                lambda st: _refresh_browser(
+                    m, cfg.browser_history_sqlite, int(limits.get("browser", 10000)), acc, st, tracker, cancel
+                ),
+            )
+        )
+
+    # Each source touches only its own manifest entries, so they can refresh concurrently.
+    per_source = {name: RefreshStats() for name, _ in refreshers}
+
+    def refresh(entry: Tuple[str, Callable[[RefreshStats], None]]) -> None:
+        name, fn = entry
+        t0 = time.perf_counter_ns()
+        with profiler.span(f"ingest {name}", cat="source"):
+            fn(per_source[name])
+        # Only new or changed items are read and counted.
+        source = profiler.source(name)
+        source.items += per_source[name].ingested
+        source.bytes += per_source[name].bytes
+        source.seconds += (time.perf_counter_ns() - t0) / 1e9
+
+    with profiler.span("ingest"):
+        if cfg.parallel_sources and len(refreshers) > 1:
+            with ThreadPoolExecutor(max_workers=len(refreshers)) as ex:
+                list(ex.map(refresh, refreshers))
+        else:
+            for entry in refreshers:
+                refresh(entry)
+    for st in per_source.values():
+        stats.reused += st.reused
+        stats.ingested += st.ingested
+        stats.removed += st.removed
+
+    # Sources that are no longer configured are dropped from the aggregate.
+    configured = {
+        "mbox": cfg.mbox_path,
+        "eml": cfg.eml_dir,
+        "notes": cfg.notes_dir,
+        "browser": cfg.browser_history_sqlite,
+    }
+    for name, value in configured.items():
+        if not value:
+            stats.removed += len(m.items.pop(name, {}))
+            m.sources.pop(name, None)
+
+    # A partly refreshed manifest would make the next run skip what this one never read.
+    if cancel is None or not cancel.interrupted:
+        with profiler.span("vault encryption" if passphrase else "manifest save"):
+            save_manifest(m, cfg.state_dir, passphrase)
+
+    # Duplicates are dropped here, so a copy that disappears from one source lets
+    # another one count again. Like the other modes, the first copy in source and
+    # read order is kept; the rest are then added newest first.
+    items: List[Dict[str, Any]] = []
+    for name in configured:
+        source_items = m.items.get(name, {})
+        if name == "mbox":
+            # by message index, the way iter_mbox reads them
+            source_items = [source_items[k] for k in sorted(source_items, key=int, reverse=cfg.mbox_newest_first)]
+        else:
+            source_items = list(source_items.values())
+        items.extend(item for item in source_items if dedup is None or not dedup.is_duplicate(item.get("dup")))
+    if tracker is not None:
+        tracker.stage("report")
+    with profiler.span("aggregate"):
+        # by instant, like pipeline._newest_first; "t" is local wall clock and can step back
+        items.sort(key=lambda item: _epoch(item["facts"]), reverse=True)
+        for item in items:
+            acc.add_facts(item["facts"])
+            if stripped is not None and item.get("stripped"):
+                stripped[item["facts"]["source"]] += item["stripped"]
+
+    report = acc.report()
+    report["summary"]["incremental"] = {"reused": stats.reused, "ingested": stats.ingested, "removed": stats.removed}
+    return report
@@ -3,10 +3,12 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Any
 from collections import Counter, defaultdict
-import re
 
 from ..types import Document
-from ..nlp.text_clean import normalize
+from ..table import DocumentTable
+from ..nlp.text_clean import normalize, NormalizeCache
+from ..nlp.keyword_index import KeywordIndex
+from ..profiling import NULL_PROFILER, Profiler
 
 CATEGORY_KEYWORDS: Dict[str, List[str]] = {
     "software & engineering": ["api", "docker", "kubernetes", "python", "node", "react", "linux", "database", "sql", "backend", "frontend", "compiler", "kafka"],
@@ -33,6 +35,11 @@ DOMAIN_HINTS: Dict[str, str] = {
     "flipkart.": "shopping",
 }
 
+KEYWORD_INDEX = KeywordIndex(CATEGORY_KEYWORDS)
+
+# Document.meta keys copied into report preview entries.
+ENTRY_META_KEYS = ("subject", "from", "host", "title", "path", "url", "visits")
+
 
 @dataclass
 class InterestSignal:
@@ -42,68 +49,108 @@ class InterestSignal:
     top_sources: List[Dict[str, Any]]
 
 
-def _keyword_score(text_norm: str, keywords: List[str]) -> Tuple[float, Counter]:
-    score = 0.0
-    hit = Counter()
-    for kw in keywords:
-        kw_norm = normalize(kw)
-        if " " in kw_norm:
-            c = text_norm.count(kw_norm)
-        else:
-            c = len(re.findall(rf"\b{re.escape(kw_norm)}\b", text_norm))
-        if c:
-            hit[kw] += c
-            score += float(c)
-    return score, hit
+@dataclass
+class KeywordMatrix:
+    """Sparse doc x keyword hit counts, computed once and shared by every reduction.
+
+    `keyword_hits[label]` and `domain_hits[label]` hold (doc index, ...) postings in
+    document order, so interests, attribution signals and top-document rankings are
+    all cheap passes over the postings of a single label.
+    """
 
+    docs: List[Document] | DocumentTable  # indexed for the few top-N preview entries
+    keyword_hits: Dict[str, List[Tuple[int, Counter]]]
+    domain_hits: Dict[str, List[Tuple[int, float]]]
+    # Events per document (Document.weight); scores and counts are multiplied by it.
+    weights: List[int]
+
+
+def _domain_hints(host: str) -> List[Tuple[str, float]]:
+    out = []
+    for k, lbl in DOMAIN_HINTS.items():
+        if k.endswith("."):
+            if host.startswith(k) or k in host:
+                out.append((lbl, 1.0))
+        else:
+            if host == k:
+                out.append((lbl, 2.0))
+    return out
 
-def infer_interests(docs: List[Document], top_k: int = 6) -> List[InterestSignal]:
-    per_doc_norm = [(d, normalize(d.text)) for d in docs if d.text.strip()]
 
-    label_scores = defaultdict(float)
-    label_hits = defaultdict(Counter)
-    label_doc_scores = defaultdict(list)  # label -> [(score, doc), ...]
+def build_keyword_matrix(
+    docs: List[Document] | DocumentTable,
+    index: KeywordIndex = KEYWORD_INDEX,
+    norm_cache: NormalizeCache | None = None,
+    profiler: Profiler = NULL_PROFILER,
+) -> KeywordMatrix:
+    keyword_hits: Dict[str, List[Tuple[int, Counter]]] = defaultdict(list)
+    domain_hits: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    norm = profiler.timed("normalization", norm_cache.get if norm_cache is not None else lambda _, text: normalize(text))
 
-    for d, tnorm in per_doc_norm:
-        for label, kws in CATEGORY_KEYWORDS.items():
-            s, hits = _keyword_score(tnorm, kws)
-            if s > 0:
-                label_scores[label] += s
-                label_hits[label].update(hits)
-                label_doc_scores[label].append((s, d))
+    for i, d in enumerate(docs):
+        text = d.text  # built from header + body on every access
+        if not text.strip():
+            continue
+        tnorm = norm(d.doc_id, text)
+        for label, hits in index.scan(tnorm).items():
+            keyword_hits[label].append((i, hits))
 
         if d.source == "browser":
-            host = (d.meta.get("host") or "").lower()
-            for k, lbl in DOMAIN_HINTS.items():
-                if k.endswith("."):
-                    if host.startswith(k) or k in host:
-                        label_scores[lbl] += 1.0
-                        label_doc_scores[lbl].append((1.0, d))
-                else:
-                    if host == k:
-                        label_scores[lbl] += 2.0
-                        label_doc_scores[lbl].append((2.0, d))
+            for lbl, w in _domain_hints((d.meta.get("host") or "").lower()):
+                domain_hits[lbl].append((i, w))
+
+    if isinstance(docs, DocumentTable):
+        return KeywordMatrix(docs, dict(keyword_hits), dict(domain_hits), docs.weights().tolist())
+    return KeywordMatrix(
+        docs=list(docs),
+        keyword_hits=dict(keyword_hits),
+        domain_hits=dict(domain_hits),
+        weights=[d.weight for d in docs],
+    )
+
+
+def source_entry(d: Document, score: float) -> Dict[str, Any]:
+    return {
+        "doc_id": d.doc_id,
+        "source": d.source,
+        "timestamp": d.timestamp.isoformat() if d.timestamp else None,
+        "score": float(score),
+        "preview": d.text[:180].replace("\n", " "),
+        "meta": {k: d.meta.get(k) for k in ENTRY_META_KEYS if k in d.meta},
+    }
+
+
+def infer_interests(docs: List[Document] | DocumentTable, top_k: int = 6, matrix: KeywordMatrix | None = None) -> List[InterestSignal]:
+    if matrix is None:
+        matrix = build_keyword_matrix(docs)
+
+    label_scores: Dict[str, float] = defaultdict(float)
+    first_seen: Dict[str, Tuple[int, int]] = {}
+    weights = matrix.weights
+    for label, postings in matrix.keyword_hits.items():
+        label_scores[label] += float(sum(sum(hits.values()) * weights[i] for i, hits in postings))
+        first_seen[label] = (postings[0][0], 0)
+    for label, postings in matrix.domain_hits.items():
+        label_scores[label] += float(sum(w * weights[i] for i, w in postings))
+        first_seen[label] = min(first_seen.get(label, (postings[0][0], 1)), (postings[0][0], 1))
 
     total = sum(label_scores.values()) or 1.0
-    ranked = sorted(label_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+    ranked = sorted(label_scores.items(), key=lambda x: (-x[1], first_seen[x[0]]))[:top_k]
 
     out: List[InterestSignal] = []
     for label, score in ranked:
-        hits = label_hits[label]
+        kw_postings = matrix.keyword_hits.get(label, [])
+        hits = Counter()
+        for i, h in kw_postings:
+            hits.update({k: v * weights[i] for k, v in h.items()})
         top_kw = [(k, float(v)) for k, v in hits.most_common(8)]
-        top_docs = sorted(label_doc_scores[label], key=lambda x: x[0], reverse=True)[:5]
-        top_sources = []
-        for s, d in top_docs:
-            top_sources.append(
-                {
-                    "doc_id": d.doc_id,
-                    "source": d.source,
-                    "timestamp": d.timestamp.isoformat() if d.timestamp else None,
-                    "score": float(s),
-                    "preview": d.text[:180].replace("\n", " "),
-                    "meta": {k: d.meta.get(k) for k in ("subject", "from", "host", "title", "path", "url") if k in d.meta},
-                }
-            )
+
+        # Ranked by score times events, like the label totals. (score, doc index,
+        # keyword-before-domain) keeps the old per-document insertion order on ties.
+        candidates = [(float(sum(h.values())) * weights[i], i, 0) for i, h in kw_postings]
+        candidates += [(w * weights[i], i, 1) for i, w in matrix.domain_hits.get(label, [])]
+        top_docs = sorted(candidates, key=lambda x: (-x[0], x[1], x[2]))[:5]
+        top_sources = [source_entry(matrix.docs[i], s) for s, i, _ in top_docs]
         out.append(
             InterestSignal(
                 label=label,
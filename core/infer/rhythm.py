@@ -5,6 +5,8 @@ from typing import Dict, List, Optional
 import numpy as np
 
 from ..types import Document
+from ..table import DocumentTable
+from .timeline import TimeHistograms, histograms_from_docs
 
 
 @dataclass
@@ -19,12 +21,15 @@ class RhythmProfile:
     confidence: float  # 0..1
 
 
-def infer_rhythm(docs: List[Document]) -> RhythmProfile:
-    times = [d.timestamp for d in docs if d.timestamp is not None]
+def infer_rhythm(docs: List[Document] | DocumentTable) -> RhythmProfile:
+    return rhythm_from_histograms(histograms_from_docs(docs))
+
+
+def rhythm_from_histograms(hist: TimeHistograms) -> RhythmProfile:
     hourly = {h: 0 for h in range(24)}
     dow = {d: 0 for d in range(7)}  # Monday=0
 
-    if len(times) < 20:
+    if hist.n < 20:
         return RhythmProfile(
             hourly,
             dow,
@@ -36,11 +41,8 @@ def infer_rhythm(docs: List[Document]) -> RhythmProfile:
             confidence=0.0,
         )
 
-    days = set()
-    for t in times:
-        hourly[t.hour] += 1
-        dow[t.weekday()] += 1
-        days.add(t.date())
+    hourly = {h: int(c) for h, c in enumerate(hist.hourly)}
+    dow = {d: int(c) for d, c in enumerate(hist.dow)}
 
     peak_hour = max(hourly, key=lambda h: hourly[h])
 
@@ -79,7 +81,7 @@ def infer_rhythm(docs: List[Document]) -> RhythmProfile:
     return RhythmProfile(
         hourly_counts=hourly,
         day_counts=dow,
-        active_days=len(days),
+        active_days=len(hist.days),
         peak_hour=int(peak_hour),
         earliest_active_hour=int(earliest) if earliest is not None else None,
         latest_active_hour=int(latest) if latest is not None else None,
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+
+import numpy as np
+
+from ..types import Document
+from ..table import DocumentTable
+from ..utils import _EPOCH_ORDINAL, wall_seconds
+
+
+@dataclass
+class TimeHistograms:
+    """Incremental hour/weekday/active-day counts shared by rhythm and work-pattern inference."""
+
+    hourly: List[int] = field(default_factory=lambda: [0] * 24)
+    dow: List[int] = field(default_factory=lambda: [0] * 7)  # Monday=0
+    weekday_hourly: List[int] = field(default_factory=lambda: [0] * 24)
+    days: Set[int] = field(default_factory=set)  # proleptic ordinals of active dates
+    n: int = 0
+
+    def add(self, t: Optional[datetime]) -> None:
+        if t is not None:
+            self.add_wall(wall_seconds(t))
+
+    def add_wall(self, secs: int) -> None:
+        day = secs // 86400
+        hour = (secs // 3600) % 24
+        wd = (day + 3) % 7  # 1970-01-01 was a Thursday
+        self.hourly[hour] += 1
+        self.dow[wd] += 1
+        if wd < 5:
+            self.weekday_hourly[hour] += 1
+        self.days.add(_EPOCH_ORDINAL + day)
+        self.n += 1
+
+    def add_array(self, secs: np.ndarray) -> None:
+        """add_wall() for a whole int64 column of wall-clock seconds at once."""
+        secs = np.asarray(secs, dtype=np.int64)
+        if not secs.size:
+            return
+        day = secs // 86400
+        hour = (secs // 3600) % 24
+        wd = (day + 3) % 7
+        _add_counts(self.hourly, np.bincount(hour, minlength=24))
+        _add_counts(self.dow, np.bincount(wd, minlength=7))
+        _add_counts(self.weekday_hourly, np.bincount(hour[wd < 5], minlength=24))
+        self.days.update((np.unique(day) + _EPOCH_ORDINAL).tolist())
+        self.n += int(secs.size)
+
+    def merge(self, other: "TimeHistograms") -> None:
+        for h in range(24):
+            self.hourly[h] += other.hourly[h]
+            self.weekday_hourly[h] += other.weekday_hourly[h]
+        for d in range(7):
+            self.dow[d] += other.dow[d]
+        self.days |= other.days
+        self.n += other.n
+
+
+def _add_counts(dst: List[int], counts: np.ndarray) -> None:
+    for i, c in enumerate(counts.tolist()):
+        dst[i] += c
+
+
+def timestamp_column(docs: Iterable[Document]) -> np.ndarray:
+    """Wall-clock seconds (see utils.wall_seconds) of every event in `docs` as one int64 array."""
+    if isinstance(docs, DocumentTable):
+        return docs.wall_seconds()
+    return np.fromiter((wall_seconds(t) for d in docs for t in d.times()), dtype=np.int64)
+
+
+def histograms_from_array(secs: np.ndarray) -> TimeHistograms:
+    h = TimeHistograms()
+    h.add_array(secs)
+    return h
+
+
+def histograms_from_docs(docs: Iterable[Document]) -> TimeHistograms:
+    return histograms_from_array(timestamp_column(docs))
@@ -5,6 +5,8 @@ from typing import List, Optional
 import numpy as np
 
 from ..types import Document
+from ..table import DocumentTable
+from .timeline import TimeHistograms, histograms_from_docs
 
 
 @dataclass
@@ -17,9 +19,12 @@ class WorkPattern:
     confidence: float
 
 
-def infer_work_patterns(docs: List[Document]) -> WorkPattern:
-    times = [d.timestamp for d in docs if d.timestamp is not None]
-    if len(times) < 30:
+def infer_work_patterns(docs: List[Document] | DocumentTable) -> WorkPattern:
+    return work_patterns_from_histograms(histograms_from_docs(docs))
+
+
+def work_patterns_from_histograms(hist: TimeHistograms) -> WorkPattern:
+    if hist.n < 30:
         return WorkPattern(
             weekday_ratio=0.0,
             weekend_ratio=0.0,
@@ -29,16 +34,9 @@ def infer_work_patterns(docs: List[Document]) -> WorkPattern:
             confidence=0.0,
         )
 
-    weekday = 0
-    weekend = 0
-    weekday_hourly = np.zeros(24, dtype=float)
-
-    for t in times:
-        if t.weekday() < 5:
-            weekday += 1
-            weekday_hourly[t.hour] += 1
-        else:
-            weekend += 1
+    weekday = sum(hist.dow[:5])
+    weekend = sum(hist.dow[5:])
+    weekday_hourly = np.array(hist.weekday_hourly, dtype=float)
 
     total = weekday + weekend
     weekday_ratio = weekday / total if total else 0.0
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import sqlite3
+import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from urllib.parse import urlparse
 
+from ..profiling import text_bytes
+from ..progress import CancelToken, Progress, ProgressCallback
 from ..types import Document
 from ..utils import stable_id
 
@@ -17,47 +20,137 @@ def chrome_time_to_dt(value: int) -> datetime:
     return CHROME_EPOCH + timedelta(microseconds=int(value))
 
 
-def ingest_chrome_history_sqlite(path: Path, limit: int = 10000) -> List[Document]:
-    docs: List[Document] = []
-    con = sqlite3.connect(str(path))
-    con.row_factory = sqlite3.Row
+def connect_readonly(path: Path) -> sqlite3.Connection:
+    # immutable=1 skips locking entirely, so a History file held open by a running
+    # browser can still be read (changes still sitting in its WAL are not visible).
+    uri = f"{Path(path).resolve().as_uri()}?mode=ro&immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
+
+def max_visit_id(path: Path) -> int:
+    con = connect_readonly(path)
+    try:
+        row = con.execute("SELECT MAX(id) FROM visits").fetchone()
+    finally:
+        con.close()
+    return int(row[0] or 0)
+
+
+def ingest_chrome_history_sqlite(
+    path: Path,
+    limit: int = 10000,
+    since_visit_id: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> List[Document]:
+    return list(
+        iter_chrome_history_sqlite(path, limit=limit, since_visit_id=since_visit_id, progress=progress, cancel=cancel)
+    )
+
+
+def iter_chrome_history_sqlite(
+    path: Path,
+    limit: int = 10000,
+    since_visit_id: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[Document]:
+    for batch in iter_chrome_history_batches(
+        path, limit=limit, since_visit_id=since_visit_id, progress=progress, cancel=cancel
+    ):
+        yield from batch
+
+
+def iter_chrome_history_batches(
+    path: Path,
+    limit: int = 10000,
+    since_visit_id: Optional[int] = None,
+    batch_size: int = 1000,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[List[Document]]:
+    """Newest `limit` visits (only those with visits.id > `since_visit_id` if given),
+    folded into one Document per URL and yielded in batches, most recently visited first.
+
+    Each Document carries every visit time in `event_times` and the visit count in
+    `meta["visits"]`. `meta["visit_id"]` (the URL's newest visit) is the watermark to
+    pass as `since_visit_id` next time. `progress` is called after each batch and
+    `cancel` is checked before each one.
+    """
+    con = connect_readonly(path)
     cur = con.cursor()
 
-    query = '''
-    SELECT urls.url AS url, urls.title AS title, visits.visit_time AS visit_time
-    FROM visits
-    JOIN urls ON visits.url = urls.id
-    ORDER BY visits.visit_time DESC
-    LIMIT ?
+    where = "WHERE visits.id > ?" if since_visit_id is not None else ""
+    query = f'''
+    SELECT urls.url, urls.title, MAX(v.id), group_concat(v.visit_time)
+    FROM (
+        SELECT visits.id AS id, visits.url AS url_id, visits.visit_time AS visit_time
+        FROM visits
+        JOIN urls ON visits.url = urls.id
+        {where}
+        ORDER BY visits.visit_time DESC
+        LIMIT ?
+    ) AS v
+    JOIN urls ON v.url_id = urls.id
+    GROUP BY v.url_id
+    ORDER BY MAX(v.visit_time) DESC
     '''
+    params = (since_visit_id, limit) if since_visit_id is not None else (limit,)
+    path_s = str(path)
+
+    try:
+        t0 = time.perf_counter()
+        items = nbytes = 0
+        cur.execute(query, params)
+        while True:
+            if cancel is not None and cancel.stop():
+                break
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = [_url_doc(path_s, *row) for row in rows]
+            yield batch
+            if progress is not None:
+                # The number of URLs is only known once the query is exhausted.
+                items += len(batch)
+                nbytes += sum(text_bytes(d.body) for d in batch)
+                progress(Progress("ingest", items, nbytes, None, "browser", time.perf_counter() - t0))
+    finally:
+        con.close()
+
 
-    for row in cur.execute(query, (limit,)):
-        url = row["url"] or ""
-        title = row["title"] or ""
-        visit_time = row["visit_time"]
-        ts: Optional[datetime] = None
+def _url_doc(path: str, url: Optional[str], title: Optional[str], visit_id: int, visit_times: Optional[str]) -> Document:
+    url = url or ""
+    title = title or ""
+    raw_times = sorted((int(v) for v in (visit_times or "").split(",") if v), reverse=True)
+    times: List[datetime] = []
+    for v in raw_times:
         try:
-            ts = chrome_time_to_dt(int(visit_time)).astimezone(timezone.utc)
+            times.append(chrome_time_to_dt(v).astimezone(timezone.utc))
         except Exception:
-            ts = None
+            pass
+    host = ""
+    try:
+        host = urlparse(url).netloc.lower()
+    except Exception:
         host = ""
-        try:
-            host = urlparse(url).netloc.lower()
-        except Exception:
-            host = ""
-
-        # Data minimization: keep the "text" minimal but useful.
-        text = f"visited: {host}\nurl: {url}\ntitle: {title}".strip()
-        doc_id = stable_id("browser", str(path), url, str(visit_time))
-        docs.append(
-            Document(
-                doc_id=doc_id,
-                source="browser",
-                text=text,
-                timestamp=ts,
-                meta={"url": url, "title": title, "host": host, "path": str(path)},
-            )
-        )
-
-    con.close()
-    return docs
+
+    # Data minimization: keep the "text" minimal but useful.
+    text = f"visited: {host}\nurl: {url}\ntitle: {title}".strip()
+    doc_id = stable_id("browser", path, url)
+    return Document(
+        doc_id=doc_id,
+        source="browser",
+        text=text,
+        timestamp=times[0] if times else None,
+        meta={
+            "url": url,
+            "title": title,
+            "host": host,
+            "visits": len(raw_times),
+            "visit_id": visit_id,
+            "visit_time": raw_times[0] if raw_times else None,
+            "path": path,
+        },
+        event_times=times,
+    )
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from dateutil import parser as dtparser
+
+TIERS = ("rfc2822", "memo", "dateutil", "failed")
+
+
+def _to_utc(dt: datetime) -> datetime:
+    # Headers without a zone (or "-0000") are taken as UTC.
+    if dt.tzinfo is None or dt.utcoffset() is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class DateParser:
+    """Email Date header -> timezone-aware UTC datetime, cheapest method first.
+
+    1. email.utils.parsedate_to_datetime handles well-formed RFC 2822 headers.
+    2. Headers it rejects are memoized (exact string, bounded), since odd formats
+       tend to repeat across messages from the same client.
+    3. dateutil is the fallback for everything else.
+    `counts` records which tier answered each header.
+    """
+
+    def __init__(self, memo_size: int = 4096):
+        self.memo_size = memo_size
+        self._memo: Dict[str, Optional[datetime]] = {}
+        # Sources may be ingested on several threads at once.
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = dict.fromkeys(TIERS, 0)
+
+    def parse(self, raw: Optional[str]) -> Optional[datetime]:
+        if not raw:
+            return None
+        try:
+            dt = parsedate_to_datetime(raw)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            dt = None
+        if dt is not None:
+            self._count("rfc2822")
+            return _to_utc(dt)
+
+        with self._lock:
+            if raw in self._memo:
+                self.counts["memo"] += 1
+                return self._memo[raw]
+
+        try:
+            dt = _to_utc(dtparser.parse(raw))
+            tier = "dateutil"
+        except Exception:
+            dt = None
+            tier = "failed"
+        with self._lock:
+            self.counts[tier] += 1
+            if len(self._memo) >= self.memo_size:
+                self._memo.pop(next(iter(self._memo)))  # oldest insertion first
+            self._memo[raw] = dt
+        return dt
+
+    def _count(self, tier: str) -> None:
+        with self._lock:
+            self.counts[tier] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+# The email ingestors' default. run_pipeline() passes its own parser per run so its
+# counts cover exactly that run's messages; headers are parsed in the main process
+# (not in parsing workers), so every message is counted.
+DATE_PARSER = DateParser()
+
+
+def parse_date(raw: Optional[str]) -> Optional[datetime]:
+    return DATE_PARSER.parse(raw)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+# How much of each email is read: "headers" (Subject/From/Date only, payloads are
+# never decoded), "snippet:N" (at most N characters of body text) or "full".
+HEADERS = "headers"
+FULL = "full"
+FULL_MAX_CHARS = 200_000
+
+
+def body_budget(depth: str) -> int:
+    """Characters of body text to extract for an ingest depth; 0 means headers only."""
+    depth = (depth or FULL).strip().lower()
+    if depth == FULL:
+        return FULL_MAX_CHARS
+    if depth == HEADERS:
+        return 0
+    kind, _, n = depth.partition(":")
+    if kind == "snippet" and n.strip().isdigit() and int(n) > 0:
+        return min(int(n), FULL_MAX_CHARS)
+    raise ValueError(f"Unknown ingest depth {depth!r} (expected 'headers', 'snippet:N' or 'full').")
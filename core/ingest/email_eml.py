@@ -2,14 +2,21 @@ from __future__ import annotations
 
 import email
 from email.header import decode_header
+from email.parser import BytesHeaderParser
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
-from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
 
-from dateutil import parser as dtparser
-
-from ..types import Document
+from ..types import EMAIL_HEADER_KEYS, Document
 from ..utils import stable_id
+from ..nlp.html_text import html_to_text
+from ..nlp.quote_strip import strip_quoted
+from ..progress import CancelToken, ProgressCallback, tracked
+from .dates import DATE_PARSER, DateParser
+from .depth import FULL, FULL_MAX_CHARS, body_budget
+from .message_cache import MessageCache, parse_cached
+from .parallel import map_threaded
+from .walk import FileEntry, first_files
 
 
 def _decode_header(value: Optional[str]) -> str:
@@ -25,60 +32,171 @@ def _decode_header(value: Optional[str]) -> str:
     return "".join(out)
 
 
-def _extract_text(msg: email.message.Message, max_chars: int = 200_000) -> str:
+def _decode_text(part: email.message.Message, max_chars: int) -> str:
+    payload = part.get_payload(decode=True) or b""
+    return payload[: max_chars * 4].decode(part.get_content_charset() or "utf-8", errors="ignore")
+
+
+def _extract_text(msg: email.message.Message, max_chars: int = FULL_MAX_CHARS) -> str:
     texts = []
+    size = 0
     if msg.is_multipart():
         for part in msg.walk():
+            if size >= max_chars:
+                break
             ctype = (part.get_content_type() or "").lower()
             disp = (part.get("Content-Disposition") or "").lower()
             if "attachment" in disp:
                 continue
             if ctype == "text/plain":
-                payload = part.get_payload(decode=True) or b""
-                texts.append(payload.decode(part.get_content_charset() or "utf-8", errors="ignore"))
+                texts.append(_decode_text(part, max_chars))
             elif ctype == "text/html" and not texts:
                 payload = part.get_payload(decode=True) or b""
                 html = payload.decode(part.get_content_charset() or "utf-8", errors="ignore")
-                try:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(html, "lxml")
-                    texts.append(soup.get_text(" ", strip=True))
-                except Exception:
-                    texts.append(html)
+                texts.append(html_to_text(html, max_chars=max_chars))
+            else:
+                continue
+            size += len(texts[-1])
     else:
-        payload = msg.get_payload(decode=True) or b""
-        texts.append(payload.decode(msg.get_content_charset() or "utf-8", errors="ignore"))
+        texts.append(_decode_text(msg, max_chars))
 
     full = "\n".join(t for t in texts if t).strip()
     return full[:max_chars]
 
 
-def ingest_eml_dir(folder: Path, limit: int = 5000) -> List[Document]:
-    docs: List[Document] = []
-    emls = sorted([p for p in folder.rglob("*.eml") if p.is_file()])
-    for p in emls[:limit]:
-        raw = p.read_bytes()
-        msg = email.message_from_bytes(raw)
-        subj = _decode_header(msg.get("Subject"))
-        from_ = _decode_header(msg.get("From"))
-        date_raw = msg.get("Date")
-        ts: Optional[datetime] = None
-        if date_raw:
-            try:
-                ts = dtparser.parse(date_raw)
-            except Exception:
-                ts = None
-
-        body = _extract_text(msg)
-        text = f"subject: {subj}\nfrom: {from_}\n\n{body}".strip()
+def _header_fields(msg: email.message.Message) -> Tuple[str, str, str, str]:
+    # The Date header is returned as-is and parsed by the caller (see dates.DATE_PARSER).
+    return (
+        _decode_header(msg.get("Subject")),
+        _decode_header(msg.get("From")),
+        str(msg.get("Date") or ""),
+        str(msg.get("Message-ID") or "").strip(),
+    )
+
+
+def _parse_raw(raw: bytes, max_chars: int = FULL_MAX_CHARS) -> Tuple[str, str, str, str, str, int]:
+    # Runs in worker processes when workers > 1, so it must stay module-level.
+    msg = email.message_from_bytes(raw)
+    return (*_header_fields(msg), *strip_quoted(_extract_text(msg, max_chars)))
+
+
+def _parse_headers(raw: bytes) -> Tuple[str, str, str, str, str, int]:
+    return (*_header_fields(BytesHeaderParser().parsebytes(raw)), "", 0)
+
+
+def _read_headers(p: Path) -> bytes:
+    # Header block only: read lines up to the first blank one.
+    out = []
+    with open(p, "rb") as f:
+        for line in f:
+            if not line.strip(b"\r\n"):
+                break
+            out.append(line)
+    return b"".join(out)
+
+
+def ingest_eml_dir(
+    folder: Path,
+    limit: int = 5000,
+    workers: int = 1,
+    cache: Optional[MessageCache] = None,
+    depth: str = FULL,
+    io_workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> List[Document]:
+    return list(
+        iter_eml_dir(
+            folder,
+            limit=limit,
+            workers=workers,
+            cache=cache,
+            depth=depth,
+            io_workers=io_workers,
+            progress=progress,
+            cancel=cancel,
+            dates=dates,
+        )
+    )
+
+
+def iter_eml_dir(
+    folder: Path,
+    limit: int = 5000,
+    workers: int = 1,
+    cache: Optional[MessageCache] = None,
+    depth: str = FULL,
+    io_workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> Iterator[Document]:
+    emls = list_eml_files(folder, limit=limit)
+    yield from iter_eml_files(
+        emls,
+        workers=workers,
+        cache=cache,
+        depth=depth,
+        io_workers=io_workers,
+        progress=progress,
+        cancel=cancel,
+        dates=dates,
+    )
+
+
+def _is_eml(name: str) -> bool:
+    return name.endswith(".eml")
+
+
+def scan_eml_files(folder: Path, limit: int = 5000) -> List[FileEntry]:
+    """The first `limit` .eml files in path order."""
+    return first_files(folder, limit, _is_eml)
+
+
+def list_eml_files(folder: Path, limit: int = 5000) -> List[Path]:
+    return [f.path for f in scan_eml_files(folder, limit=limit)]
+
+
+def iter_eml_files(
+    emls: List[Path],
+    workers: int = 1,
+    cache: Optional[MessageCache] = None,
+    depth: str = FULL,
+    io_workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> Iterator[Document]:
+    # File reads run on `io_workers` threads, MIME parsing on `workers` processes.
+    docs = _eml_docs(emls, workers, cache, depth, io_workers, dates)
+    yield from tracked(docs, "eml", progress, cancel, total=len(emls))
+
+
+def _eml_docs(
+    emls: List[Path], workers: int, cache: Optional[MessageCache], depth: str, io_workers: int, dates: DateParser
+) -> Iterator[Document]:
+    budget = body_budget(depth)
+    if budget:
+        raws = map_threaded(Path.read_bytes, emls, workers=io_workers)
+        parse = partial(_parse_raw, max_chars=budget)
+        parsed = parse_cached(parse, raws, cache=cache, workers=workers, variant=str(budget))
+    else:
+        parsed = map(_parse_headers, map_threaded(_read_headers, emls, workers=io_workers))
+    for p, (subj, from_, date_raw, message_id, body, stripped) in zip(emls, parsed):
+        ts = dates.parse(date_raw)
         doc_id = stable_id("eml", str(p), subj, from_)
-        docs.append(
-            Document(
-                doc_id=doc_id,
-                source="email_eml",
-                text=text,
-                timestamp=ts,
-                meta={"subject": subj, "from": from_, "path": str(p)},
-            )
+        yield Document(
+            doc_id=doc_id,
+            source="email_eml",
+            text=body,
+            timestamp=ts,
+            meta={
+                "subject": subj,
+                "from": from_,
+                "message_id": message_id,
+                "stripped_bytes": stripped,
+                "path": str(p),
+            },
+            header_keys=EMAIL_HEADER_KEYS,
         )
-    return docs
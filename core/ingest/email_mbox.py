@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-import mailbox
 import email
-import re
+import mmap
 from email.header import decode_header
+from email.parser import BytesHeaderParser
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
-from dateutil import parser as dtparser
-
-from ..types import Document
+from ..types import EMAIL_HEADER_KEYS, Document
 from ..utils import stable_id
+from ..nlp.html_text import html_to_text
+from ..nlp.quote_strip import strip_quoted
+from ..progress import CancelToken, ProgressCallback, tracked
+from .dates import DATE_PARSER, DateParser
+from .depth import FULL, FULL_MAX_CHARS, body_budget
+from .message_cache import MessageCache, parse_cached
+from .mbox_index import INDEX_DIR, load_or_build_index
 
 
 def _decode_header(value: Optional[str]) -> str:
@@ -30,62 +36,160 @@ def _decode_header(value: Optional[str]) -> str:
     return "".join(out)
 
 
-def _extract_text(msg: email.message.Message, max_chars: int = 200_000) -> str:
-    # Prefer text/plain, fall back to stripping HTML.
+def _decode_text(part: email.message.Message, max_chars: int) -> str:
+    # No charset needs more than 4 bytes per character, so nothing past that is decoded.
+    payload = part.get_payload(decode=True) or b""
+    return payload[: max_chars * 4].decode(part.get_content_charset() or "utf-8", errors="ignore")
+
+
+def _extract_text(msg: email.message.Message, max_chars: int = FULL_MAX_CHARS) -> str:
+    # Prefer text/plain, fall back to stripping HTML. Stops once max_chars are collected.
     texts = []
+    size = 0
     if msg.is_multipart():
         for part in msg.walk():
+            if size >= max_chars:
+                break
             ctype = (part.get_content_type() or "").lower()
             disp = (part.get("Content-Disposition") or "").lower()
             if "attachment" in disp:
                 continue
             if ctype == "text/plain":
-                payload = part.get_payload(decode=True) or b""
-                texts.append(payload.decode(part.get_content_charset() or "utf-8", errors="ignore"))
+                texts.append(_decode_text(part, max_chars))
             elif ctype == "text/html" and not texts:
                 payload = part.get_payload(decode=True) or b""
                 html = payload.decode(part.get_content_charset() or "utf-8", errors="ignore")
-                try:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(html, "lxml")
-                    texts.append(soup.get_text(" ", strip=True))
-                except Exception:
-                    texts.append(re.sub(r"<[^>]+>", " ", html))
+                texts.append(html_to_text(html, max_chars=max_chars))
+            else:
+                continue
+            size += len(texts[-1])
     else:
-        payload = msg.get_payload(decode=True) or b""
-        texts.append(payload.decode(msg.get_content_charset() or "utf-8", errors="ignore"))
+        texts.append(_decode_text(msg, max_chars))
 
     full = "\n".join(t for t in texts if t).strip()
     return full[:max_chars]
 
 
-def ingest_mbox(path: Path, limit: int = 5000) -> List[Document]:
-    docs: List[Document] = []
-    mbox = mailbox.mbox(path)
-    for i, msg in enumerate(mbox):
-        if i >= limit:
-            break
-        subj = _decode_header(msg.get("Subject"))
-        from_ = _decode_header(msg.get("From"))
-        date_raw = msg.get("Date")
-        ts: Optional[datetime] = None
-        if date_raw:
-            try:
-                ts = dtparser.parse(date_raw)
-            except Exception:
-                ts = None
-
-        body = _extract_text(msg)
-        text = f"subject: {subj}\nfrom: {from_}\n\n{body}".strip()
-
-        doc_id = stable_id("mbox", str(path), str(i), subj, from_)
-        docs.append(
-            Document(
-                doc_id=doc_id,
-                source="email_mbox",
-                text=text,
-                timestamp=ts,
-                meta={"subject": subj, "from": from_, "index": i, "path": str(path)},
-            )
+def _header_fields(msg: email.message.Message) -> Tuple[str, str, str, str]:
+    # The Date header is returned as-is and parsed by the caller (see dates.DATE_PARSER).
+    return (
+        _decode_header(msg.get("Subject")),
+        _decode_header(msg.get("From")),
+        str(msg.get("Date") or ""),
+        str(msg.get("Message-ID") or "").strip(),
+    )
+
+
+def _parse_raw(raw: bytes, max_chars: int = FULL_MAX_CHARS) -> Tuple[str, str, str, str, str, int]:
+    # Runs in worker processes when workers > 1, so it must stay module-level.
+    msg = email.message_from_bytes(raw)
+    return (*_header_fields(msg), *strip_quoted(_extract_text(msg, max_chars)))
+
+
+def _parse_headers(raw: bytes) -> Tuple[str, str, str, str, str, int]:
+    # Header block only; the payload is never parsed or decoded.
+    return (*_header_fields(BytesHeaderParser().parsebytes(raw)), "", 0)
+
+
+def ingest_mbox(
+    path: Path,
+    limit: int = 5000,
+    workers: int = 1,
+    newest_first: bool = False,
+    start: int = 0,
+    index_dir: Optional[Path] = INDEX_DIR,
+    cache: Optional[MessageCache] = None,
+    depth: str = FULL,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> List[Document]:
+    return list(
+        iter_mbox(
+            path,
+            limit=limit,
+            workers=workers,
+            newest_first=newest_first,
+            start=start,
+            index_dir=index_dir,
+            cache=cache,
+            depth=depth,
+            progress=progress,
+            cancel=cancel,
+            dates=dates,
+        )
+    )
+
+
+def iter_mbox(
+    path: Path,
+    limit: int = 5000,
+    workers: int = 1,
+    newest_first: bool = False,
+    start: int = 0,
+    index_dir: Optional[Path] = INDEX_DIR,
+    cache: Optional[MessageCache] = None,
+    depth: str = FULL,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> Iterator[Document]:
+    """Yield up to `limit` messages from message index `start` on (or the newest ones first).
+
+    Message positions come from the persisted byte-offset index, so only the
+    selected messages are read. `meta["index"]` and `meta["offset"]` let callers
+    resume after the last processed message. Messages found in `cache` are not parsed again.
+    With `depth="headers"` only each message's header block is read from disk.
+    `progress` gets periodic updates; once `cancel` is set the stream ends early.
+    Date headers are parsed (and counted) by `dates`.
+    """
+    budget = body_budget(depth)
+    idx = load_or_build_index(path, index_dir=index_dir)
+    keys = range(len(idx) - 1, start - 1, -1) if newest_first else range(start, len(idx))
+    keys = keys[:limit]
+    if not keys:
+        return
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        if budget:
+            raws = (idx.read(buf, k) for k in keys)
+            parse = partial(_parse_raw, max_chars=budget)
+            parsed = parse_cached(parse, raws, cache=cache, workers=workers, variant=str(budget))
+        else:
+            # Header parsing is cheaper than hashing for the cache or shipping bytes to workers.
+            parsed = map(_parse_headers, (idx.read_headers(buf, k) for k in keys))
+        docs = (
+            _make_doc(path, i, idx.offsets[i], subj, from_, dates.parse(date_raw), message_id, body, stripped)
+            for i, (subj, from_, date_raw, message_id, body, stripped) in zip(keys, parsed)
         )
-    return docs
+        yield from tracked(docs, "mbox", progress, cancel, total=len(keys))
+
+
+def _make_doc(
+    path: Path,
+    i: int,
+    offset: int,
+    subj: str,
+    from_: str,
+    ts: Optional[datetime],
+    message_id: str,
+    body: str,
+    stripped: int,
+) -> Document:
+    doc_id = stable_id("mbox", str(path), str(i), subj, from_)
+    return Document(
+        doc_id=doc_id,
+        source="email_mbox",
+        text=body,
+        timestamp=ts,
+        meta={
+            "subject": subj,
+            "from": from_,
+            "message_id": message_id,
+            "stripped_bytes": stripped,  # quoted replies and signature removed from the body
+            "index": i,
+            "offset": offset,
+            "path": str(path),
+        },
+        header_keys=EMAIL_HEADER_KEYS,
+    )
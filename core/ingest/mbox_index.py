@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Tuple
+
+from ..utils import APP_DIR, stable_id
+
+INDEX_DIR = APP_DIR / "mbox_index"
+INDEX_VERSION = 1
+
+# mailbox.mbox splits and rewrites messages with the platform line separator; match it
+# so messages (and therefore doc_ids) are byte-identical to the mailbox module.
+_LINESEP = os.linesep.encode("ascii")
+_HEAD_BYTES = 4096
+
+
+@dataclass
+class MboxIndex:
+    """Byte offsets of every message in an mbox file, plus the fingerprint they belong to.
+
+    `offsets[k]` is the position of message k's "From " separator line and
+    `lengths[k]` spans up to (not including) the blank line before the next one,
+    exactly like mailbox.mbox's table of contents.
+    """
+
+    path: Path
+    size: int = 0
+    mtime_ns: int = 0
+    head_sha: str = ""
+    offsets: array = field(default_factory=lambda: array("q"))
+    lengths: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def index_after(self, offset: int) -> int:
+        """First message index whose separator starts after byte `offset`."""
+        return bisect.bisect_right(self.offsets, offset)
+
+    def read(self, buf, k: int) -> bytes:
+        """Message k without its "From " envelope line, as mailbox.mbox.get_bytes returns it."""
+        start = self.offsets[k]
+        data = bytes(buf[start : start + self.lengths[k]])
+        nl = data.find(b"\n")
+        data = data[nl + 1 :] if nl >= 0 else b""
+        return data.replace(_LINESEP, b"\n") if _LINESEP != b"\n" else data
+
+    def read_headers(self, buf, k: int) -> bytes:
+        """Like read(), but only up to the blank line that ends message k's headers."""
+        start = self.offsets[k]
+        end = start + self.lengths[k]
+        blank = buf.find(_LINESEP * 2, start, end)
+        if blank >= 0:
+            end = blank + len(_LINESEP)
+        data = bytes(buf[start:end])
+        nl = data.find(b"\n")
+        data = data[nl + 1 :] if nl >= 0 else b""
+        return data.replace(_LINESEP, b"\n") if _LINESEP != b"\n" else data
+
+
+def _fingerprint(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def _head_sha(buf, size: int) -> str:
+    return hashlib.sha256(bytes(buf[: min(size, _HEAD_BYTES)])).hexdigest()
+
+
+def _scan(buf, size: int, idx: MboxIndex, pos: int) -> None:
+    # Find every line that starts with b"From " from `pos` on and close each message
+    # at the next separator (dropping one trailing blank line, as mailbox does).
+    starts = idx.offsets
+    if pos == 0 and buf[:5] == b"From ":
+        starts.append(0)
+        pos = 1
+    while True:
+        hit = buf.find(b"\nFrom ", pos)
+        if hit < 0:
+            break
+        starts.append(hit + 1)
+        pos = hit + 1
+
+    lengths = idx.lengths
+    for k in range(len(lengths), len(starts)):
+        stop = starts[k + 1] if k + 1 < len(starts) else size
+        if buf[max(starts[k], stop - len(_LINESEP) - 1) : stop] == b"\n" + _LINESEP:
+            stop -= len(_LINESEP)
+        lengths.append(stop - starts[k])
+
+
+def index_path_for(path: Path, index_dir: Path = INDEX_DIR) -> Path:
+    return index_dir / f"{stable_id('mbox-index', str(Path(path).resolve()))}.idx"
+
+
+def save_index(idx: MboxIndex, index_file: Path) -> None:
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    header = {
+        "version": INDEX_VERSION,
+        "path": str(idx.path),
+        "size": idx.size,
+        "mtime_ns": idx.mtime_ns,
+        "head_sha": idx.head_sha,
+        "count": len(idx),
+    }
+    tmp = index_file.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        idx.offsets.tofile(f)
+        idx.lengths.tofile(f)
+    os.replace(tmp, index_file)
+
+
+def load_index(path: Path, index_file: Path) -> Optional[MboxIndex]:
+    try:
+        with open(index_file, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+            if header.get("version") != INDEX_VERSION:
+                return None
+            n = int(header["count"])
+            offsets, lengths = array("q"), array("q")
+            offsets.fromfile(f, n)
+            lengths.fromfile(f, n)
+    except Exception:
+        return None
+    return MboxIndex(
+        path=Path(path),
+        size=int(header["size"]),
+        mtime_ns=int(header["mtime_ns"]),
+        head_sha=str(header["head_sha"]),
+        offsets=offsets,
+        lengths=lengths,
+    )
+
+
+def build_mbox_index(path: Path, previous: Optional[MboxIndex] = None) -> MboxIndex:
+    """Scan `path` with mmap. If `previous` indexes an earlier, shorter version of the
+    same file (append-only growth), only the bytes from its last message onwards are rescanned."""
+    size, mtime_ns = _fingerprint(path)
+    idx = MboxIndex(path=Path(path), size=size, mtime_ns=mtime_ns)
+    if size == 0:
+        return idx
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        idx.head_sha = _head_sha(buf, size)
+        pos = 0
+        if (
+            previous is not None
+            and len(previous)
+            and previous.size <= size
+            and previous.head_sha == _head_sha(buf, previous.size)
+            and buf[previous.offsets[-1] : previous.offsets[-1] + 5] == b"From "
+        ):
+            # The last known message may have grown, so it is re-closed by the rescan.
+            idx.offsets = previous.offsets[:-1]
+            idx.lengths = previous.lengths[:-1]
+            pos = previous.offsets[-1]
+            idx.offsets.append(pos)
+            pos += 1
+        _scan(buf, size, idx, pos)
+    return idx
+
+
+def load_or_build_index(path: Path, index_dir: Optional[Path] = INDEX_DIR) -> MboxIndex:
+    """Return an up-to-date index for `path`, reusing/extending the persisted one when possible.
+
+    Pass `index_dir=None` to skip the sidecar file entirely.
+    """
+    if index_dir is None:
+        return build_mbox_index(path)
+
+    index_file = index_path_for(path, index_dir)
+    cached = load_index(path, index_file)
+    size, mtime_ns = _fingerprint(path)
+    if cached is not None and (cached.size, cached.mtime_ns) == (size, mtime_ns):
+        return cached
+
+    idx = build_mbox_index(path, previous=cached)
+    try:
+        save_index(idx, index_file)
+    except OSError:
+        pass
+    return idx
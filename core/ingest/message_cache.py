@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+
+from ..security.vault import decrypt_bytes, derive_key, encrypt_bytes
+from ..utils import APP_DIR
+from .parallel import map_ordered
+
+CACHE_FILE = "message_cache.sqlite"
+# Bump when the parsers' (subject, from, Date header, Message-ID, body, stripped bytes)
+# output changes, so stale entries simply stop matching.
+PARSE_VERSION = 5
+
+Parsed = Tuple[str, str, str, str, str, int]
+
+# Bump when the file layout or key derivation changes; older files are emptied on open.
+CACHE_FORMAT = 2
+
+_CHECK = b"message-cache-v2"
+
+
+class MessageCache:
+    """Parsed emails (see PARSE_VERSION for the fields) keyed by an HMAC of their raw
+    bytes, in an encrypted SQLite file.
+
+    One scrypt run on `passphrase` (salt kept in the file) yields both the AES-GCM key
+    that seals every row and the HMAC-SHA256 key for row keys, so without the
+    passphrase a stored key can't be matched to a message. Each row's key is bound to
+    its value as associated data. Least recently used rows are evicted once the stored
+    size passes `max_bytes`. A wrong passphrase raises ValueError. The mbox and EML
+    sources may share one cache from different threads.
+    """
+
+    def __init__(self, passphrase: str, path: Path = APP_DIR / CACHE_FILE, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.con = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.con.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v BLOB)")
+        self.con.execute(
+            "CREATE TABLE IF NOT EXISTS messages (key BLOB PRIMARY KEY, value BLOB, size INTEGER, used INTEGER)"
+        )
+        self.con.execute("CREATE INDEX IF NOT EXISTS messages_used ON messages (used)")
+        meta = dict(self.con.execute("SELECT k, v FROM meta"))
+        if meta and meta.get("format") != CACHE_FORMAT:
+            self.con.execute("DELETE FROM meta")
+            self.con.execute("DELETE FROM messages")
+            meta = {}
+        if "salt" not in meta:
+            salt = os.urandom(16)
+            self.key, self._mac_key = _split(derive_key(passphrase, salt, length=64))
+            self.con.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("format", CACHE_FORMAT), ("salt", salt), ("check", encrypt_bytes(self.key, _CHECK))],
+            )
+            self.con.commit()
+        else:
+            self.key, self._mac_key = _split(derive_key(passphrase, meta["salt"], length=64))
+            try:
+                decrypt_bytes(self.key, meta["check"])
+            except InvalidTag:
+                self.con.close()
+                raise ValueError("Wrong passphrase for the message cache.") from None
+
+        self.entries, self.bytes, self._clock = self.con.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(MAX(used), 0) FROM messages"
+        ).fetchone()
+
+    def message_key(self, raw: bytes, variant: str = "") -> bytes:
+        # `variant` separates parses of the same message with different settings (ingest depth).
+        prefix = b"%d\x00%s\x00" % (PARSE_VERSION, variant.encode("utf-8"))
+        return hmac.new(self._mac_key, prefix + raw, hashlib.sha256).digest()
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, Parsed]:
+        if not keys:
+            return {}
+        with self._lock:
+            return self._get_many(keys)
+
+    def _get_many(self, keys: List[bytes]) -> Dict[bytes, Parsed]:
+        out: Dict[bytes, Parsed] = {}
+        marks = ",".join("?" * len(keys))
+        for key, value in self.con.execute(f"SELECT key, value FROM messages WHERE key IN ({marks})", keys):
+            key = bytes(key)
+            out[key] = tuple(json.loads(decrypt_bytes(self.key, value, aad=key)))
+        if out:
+            self.con.executemany("UPDATE messages SET used = ? WHERE key = ?", [(self._tick(), k) for k in out])
+        found = sum(1 for k in keys if k in out)
+        self.hits += found
+        self.misses += len(keys) - found
+        return out
+
+    def put_many(self, items: List[Tuple[bytes, Parsed]]) -> None:
+        with self._lock:
+            self._put_many(items)
+
+    def _put_many(self, items: List[Tuple[bytes, Parsed]]) -> None:
+        rows = []
+        for key, parsed in dict(items).items():
+            plain = json.dumps(list(parsed), ensure_ascii=False)
+            value = encrypt_bytes(self.key, plain.encode("utf-8"), aad=key)
+            rows.append((key, value, len(value), self._tick()))
+        for key, _, size, _ in rows:
+            old = self.con.execute("SELECT size FROM messages WHERE key = ?", (key,)).fetchone()
+            if old is not None:
+                self.entries -= 1
+                self.bytes -= old[0]
+            self.entries += 1
+            self.bytes += size
+        self.con.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)", rows)
+        self.writes += len(rows)
+        self._evict()
+        self.con.commit()
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes and self.entries:
+            batch = self.con.execute("SELECT key, size FROM messages ORDER BY used LIMIT 256").fetchall()
+            dropped = []
+            for key, size in batch:
+                if self.bytes <= self.max_bytes:
+                    break
+                dropped.append((key,))
+                self.bytes -= size
+                self.entries -= 1
+            self.con.executemany("DELETE FROM messages WHERE key = ?", dropped)
+            self.evictions += len(dropped)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": self.entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self.con.commit()
+            self.con.close()
+
+
+def _split(key: bytes) -> Tuple[bytes, bytes]:
+    return key[:32], key[32:]
+
+
+def wipe_message_cache(state_dir: Path) -> None:
+    try:
+        (Path(state_dir) / CACHE_FILE).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def parse_cached(
+    parse: Callable[[bytes], Parsed],
+    raws: Iterable[bytes],
+    cache: Optional[MessageCache] = None,
+    workers: int = 1,
+    chunk_size: int = 256,
+    variant: str = "",
+) -> Iterator[Parsed]:
+    """map_ordered(parse, raws) that only parses messages missing from `cache`."""
+    if cache is None:
+        yield from map_ordered(parse, raws, workers=workers)
+        return
+
+    # One pool for the whole run; worker processes only start once something misses.
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as ex:
+        it = iter(raws)
+        while True:
+            chunk = list(islice(it, max(chunk_size, 64 * workers)))
+            if not chunk:
+                break
+            keys = [cache.message_key(raw, variant) for raw in chunk]
+            found = cache.get_many(keys)
+            todo = [i for i, k in enumerate(keys) if k not in found]
+            parsed = list(map_ordered(parse, (chunk[i] for i in todo), workers=workers, executor=ex))
+            if todo:
+                cache.put_many([(keys[i], p) for i, p in zip(todo, parsed)])
+            fresh = dict(zip(todo, parsed))
+            for i, k in enumerate(keys):
+                yield fresh[i] if i in fresh else found[k]
@@ -1,34 +1,81 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from datetime import datetime
 
 from ..types import Document
 from ..utils import stable_id, safe_read_text
+from ..progress import CancelToken, ProgressCallback, tracked
+from .parallel import map_threaded
+from .walk import FileEntry, newest_files
 
 SUPPORTED = {".txt", ".md"}
 
 
-def ingest_notes_dir(folder: Path, limit: int = 5000) -> List[Document]:
-    docs: List[Document] = []
-    files = [p for p in folder.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED]
-    files = sorted(files, key=lambda p: p.stat().st_mtime, reverse=True)
-    for p in files[:limit]:
-        txt = safe_read_text(p)
-        ts: Optional[datetime] = None
-        try:
-            ts = datetime.fromtimestamp(p.stat().st_mtime)
-        except Exception:
-            ts = None
-        doc_id = stable_id("notes", str(p), str(p.stat().st_size))
-        docs.append(
-            Document(
-                doc_id=doc_id,
-                source="notes",
-                text=txt,
-                timestamp=ts,
-                meta={"path": str(p), "size": p.stat().st_size},
-            )
-        )
-    return docs
+def _is_note(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in SUPPORTED
+
+
+def ingest_notes_dir(
+    folder: Path,
+    limit: int = 5000,
+    io_workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> List[Document]:
+    return list(iter_notes_dir(folder, limit=limit, io_workers=io_workers, progress=progress, cancel=cancel))
+
+
+def iter_notes_dir(
+    folder: Path,
+    limit: int = 5000,
+    io_workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[Document]:
+    files = scan_note_files(folder, limit=limit)
+    yield from iter_note_files(files, io_workers=io_workers, progress=progress, cancel=cancel)
+
+
+def scan_note_files(folder: Path, limit: int = 5000) -> List[FileEntry]:
+    """The `limit` most recently modified notes, newest first."""
+    return newest_files(folder, limit, _is_note)
+
+
+def list_note_files(folder: Path, limit: int = 5000) -> List[Path]:
+    return [f.path for f in scan_note_files(folder, limit=limit)]
+
+
+def iter_note_files(
+    files: List[FileEntry],
+    io_workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[Document]:
+    # Reads are I/O-bound (network mounts, cold caches), so they go through threads.
+    docs = map_threaded(_read_entry, files, workers=io_workers)
+    yield from tracked(docs, "notes", progress, cancel, total=len(files))
+
+
+def _read_entry(f: FileEntry) -> Document:
+    return read_note(f.path, f.stat)
+
+
+def read_note(p: Path, st: Optional[os.stat_result] = None) -> Document:
+    txt = safe_read_text(p)
+    st = p.stat() if st is None else st
+    ts: Optional[datetime] = None
+    try:
+        ts = datetime.fromtimestamp(st.st_mtime)
+    except Exception:
+        ts = None
+    doc_id = stable_id("notes", str(p), str(st.st_size))
+    return Document(
+        doc_id=doc_id,
+        source="notes",
+        text=txt,
+        timestamp=ts,
+        meta={"path": str(p), "size": st.st_size},
+    )
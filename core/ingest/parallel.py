@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_ordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = 1,
+    chunk_size: int = 32,
+    executor: Optional[Executor] = None,
+) -> Iterator[R]:
+    """Map `fn` over `items` in a process pool, yielding results in input order.
+
+    Items are submitted in bounded batches (one being parsed while the previous
+    one is consumed), so a huge input never sits in the pool queue all at once.
+    `fn` must be a module-level function so it can be pickled. Pass `executor`
+    to reuse a pool across calls instead of starting one per call.
+    """
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            yield from _map_batches(ex, fn, items, chunk_size * workers, chunk_size)
+    else:
+        yield from _map_batches(executor, fn, items, chunk_size * workers, chunk_size)
+
+
+def map_threaded(fn: Callable[[T], R], items: Iterable[T], workers: int = 1, batch_size: int = 256) -> Iterator[R]:
+    """map_ordered() on a thread pool, for I/O-bound work such as reading files."""
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        yield from _map_batches(ex, fn, items, batch_size, 1)
+
+
+def _map_batches(ex: Executor, fn: Callable[[T], R], items: Iterable[T], batch_size: int, chunk_size: int) -> Iterator[R]:
+    it = iter(items)
+    pending: deque = deque()
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            break
+        pending.append(ex.map(fn, batch, chunksize=chunk_size))
+        if len(pending) > 1:
+            yield from pending.popleft()
+    while pending:
+        yield from pending.popleft()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import heapq
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+
+@dataclass
+class FileEntry:
+    """A file found by the walker, with the one stat() taken for it."""
+
+    path: Path
+    stat: os.stat_result
+
+
+def scan_files(folder: Path, match: Callable[[str], bool]) -> Iterator[os.DirEntry]:
+    """Regular files under `folder` whose name satisfies `match`, via os.scandir.
+
+    Like Path.rglob, symlinked directories are not descended into and unreadable
+    directories are skipped. DirEntry caches its stat(), so callers stat each file once.
+    """
+    stack = [os.fspath(folder)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif match(e.name) and e.is_file():
+                        yield e
+                except OSError:
+                    continue
+
+
+def _entries(dir_entries: Iterator[os.DirEntry]) -> Iterator[FileEntry]:
+    for e in dir_entries:
+        try:
+            yield FileEntry(Path(e.path), e.stat())
+        except OSError:
+            continue  # vanished since it was listed
+
+
+def newest_files(folder: Path, limit: int, match: Callable[[str], bool]) -> List[FileEntry]:
+    """The `limit` most recently modified matching files, newest first (ties by path)."""
+    return heapq.nlargest(
+        limit, _entries(scan_files(folder, match)), key=lambda f: (f.stat.st_mtime_ns, str(f.path))
+    )
+
+
+def first_files(folder: Path, limit: int, match: Callable[[str], bool]) -> List[FileEntry]:
+    """The first `limit` matching files in sorted(Path) order; only those are stat()ed."""
+    # Path ordering compares path components, not the joined string.
+    key = lambda e: os.path.normcase(e.path).split(os.sep)
+    return list(_entries(iter(heapq.nsmallest(limit, scan_files(folder, match), key=key))))
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import List
+
+# Elements whose content is never visible text (BeautifulSoup's get_text skips them too).
+SKIP_TAGS = frozenset({"script", "style", "template"})
+
+_FEED_CHUNK = 64 * 1024
+
+
+class _Done(Exception):
+    pass
+
+
+class _TextCollector:
+    """Parser event target: keeps stripped text nodes outside SKIP_TAGS."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.size = 0
+        self.skip = 0
+        self._buf: List[str] = []
+
+    def _flush(self) -> None:
+        # A text node ends at any tag or comment; parsers may deliver it in pieces.
+        if not self._buf:
+            return
+        s = "".join(self._buf).strip()
+        self._buf.clear()
+        if s:
+            self.parts.append(s)
+            self.size += len(s) + 1
+            if self.size > self.max_chars:
+                raise _Done
+
+    def start(self, tag, attrs=None) -> None:
+        self._flush()
+        if tag in SKIP_TAGS:
+            self.skip += 1
+
+    def end(self, tag) -> None:
+        self._flush()
+        if tag in SKIP_TAGS and self.skip:
+            self.skip -= 1
+
+    def data(self, data) -> None:
+        if not self.skip:
+            self._buf.append(data)
+
+    def comment(self, text) -> None:
+        self._flush()
+
+    def close(self) -> None:
+        self._flush()
+
+
+class _StdlibParser(HTMLParser):
+    # Fallback when lxml is not installed.
+    def __init__(self, target: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def handle_comment(self, data):
+        self.target.comment(data)
+
+
+def _feed(parser, html: str) -> None:
+    for i in range(0, len(html), _FEED_CHUNK):
+        parser.feed(html[i : i + _FEED_CHUNK])
+    parser.close()
+
+
+def html_to_text(html: str, max_chars: int = 200_000) -> str:
+    """Visible text of an HTML document: stripped text nodes joined by single spaces,
+    like BeautifulSoup(html, "lxml").get_text(" ", strip=True), without building a tree.
+
+    Uses lxml's event-target parser when available (html.parser otherwise) and
+    stops parsing as soon as `max_chars` characters have been collected.
+    """
+    collector = _TextCollector(max_chars)
+    try:
+        from lxml import etree
+    except ImportError:
+        parser = _StdlibParser(collector)
+    else:
+        parser = etree.HTMLParser(target=collector)
+    try:
+        _feed(parser, html)
+        collector.close()
+    except _Done:
+        pass
+    return " ".join(collector.parts)[:max_chars]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from .text_clean import normalize
+
+
+class KeywordIndex:
+    """Precompiled multi-keyword matcher built once from a category -> keywords map.
+
+    Every keyword is folded into one alternation regex, so a normalized document
+    is scanned exactly once no matter how many categories/keywords are registered.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories: Dict[str, List[str]] = {label: list(kws) for label, kws in categories.items()}
+
+        # normalized phrase -> [(rank, label, keyword), ...] in declaration order
+        owners: Dict[str, List[Tuple[int, str, str]]] = defaultdict(list)
+        rank = 0
+        for label, kws in self.categories.items():
+            for kw in kws:
+                kw_norm = normalize(kw)
+                if kw_norm:
+                    owners[kw_norm].append((rank, label, kw))
+                rank += 1
+
+        # The regex picks the longest alternative at each position, so a match on
+        # "interest rate" must also credit a nested keyword such as "interest".
+        self._targets: Dict[str, List[Tuple[int, str, str]]] = {}
+        for phrase in owners:
+            padded = f" {phrase} "
+            self._targets[phrase] = sorted(
+                t for other, ts in owners.items() if f" {other} " in padded for t in ts
+            )
+
+        alternation = "|".join(re.escape(p) for p in sorted(owners, key=len, reverse=True))
+        self._pattern = re.compile(rf"\b(?:{alternation})\b") if owners else None
+
+    def scan(self, text_norm: str) -> Dict[str, Counter]:
+        """Return {label: Counter(keyword -> hits)} for one normalized text."""
+        out: Dict[str, Counter] = {}
+        if self._pattern is None or not text_norm:
+            return out
+        phrase_counts = Counter(self._pattern.findall(text_norm))
+        if not phrase_counts:
+            return out
+        hits = sorted(t + (c,) for phrase, c in phrase_counts.items() for t in self._targets[phrase])
+        for _, label, kw, c in hits:
+            out.setdefault(label, Counter())[kw] += c
+        return out
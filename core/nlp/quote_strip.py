@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+# "On Mon, 1 Jan 2024 at 10:00, Ann <ann@example.com> wrote:" (also wrapped over two lines)
+_RE_ATTRIBUTION = re.compile(r"\bwrote:\s*$", re.IGNORECASE)
+# Outlook-style quoted original: everything below it is the previous message.
+_RE_ORIGINAL = re.compile(r"^-{2,}\s*original message\s*-{2,}$", re.IGNORECASE)
+_RE_MOBILE_SIG = re.compile(r"^(sent from my|get outlook for)\b", re.IGNORECASE)
+# Cheap pre-check: bodies without any of these markers are returned untouched.
+_MARKERS = (">", "--", "__", "wrote:", "Sent from", "sent from", "Get Outlook")
+
+
+def _drop_attribution(out: List[str]) -> None:
+    # Quoted block starts: remove the blank lines and "... wrote:" line(s) leading into it.
+    while out and not out[-1].strip():
+        out.pop()
+    if out and _RE_ATTRIBUTION.search(out[-1]):
+        last = out.pop().strip()
+        if not last.lower().startswith("on ") and out and out[-1].strip().lower().startswith("on "):
+            out.pop()
+
+
+def strip_quoted(text: str) -> Tuple[str, int]:
+    """Remove quoted replies and signatures from an email body.
+
+    Drops "> " lines with their "On ... wrote:" attribution and cuts the
+    rest of the body at a "-- " signature delimiter, an "Original Message"
+    marker, an Outlook "____ / From:" header block or a "Sent from my ..."
+    line. Returns the stripped text and the number of UTF-8 bytes removed.
+    """
+    if not text or not any(m in text for m in _MARKERS):
+        return text, 0
+
+    lines = text.split("\n")
+    out: List[str] = []
+    changed = False
+    for i, raw in enumerate(lines):
+        line = raw.rstrip()
+        s = line.lstrip()
+        if s.startswith(">"):
+            _drop_attribution(out)
+            changed = True
+            continue
+        if (
+            line == "--"  # "-- " signature delimiter (trailing space often lost)
+            or _RE_ORIGINAL.match(s)
+            or _RE_MOBILE_SIG.match(s)
+            or (s.startswith("____") and i + 1 < len(lines) and lines[i + 1].lstrip().startswith("From:"))
+        ):
+            changed = True
+            break
+        out.append(raw)
+
+    if not changed:
+        return text, 0
+    stripped = "\n".join(out).strip()
+    return stripped, len(text.encode("utf-8")) - len(stripped.encode("utf-8"))
@@ -1,24 +1,88 @@
 from __future__ import annotations
 
 import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
 
 _RE_URL = re.compile(r"https?://\S+|www\.\S+", re.IGNORECASE)
 _RE_EMAIL = re.compile(r"\b[\w\.-]+@[\w\.-]+\.\w+\b", re.IGNORECASE)
 _RE_NUM = re.compile(r"\b\d+\b")
 _RE_WS = re.compile(r"\s+")
+_RE_NON_WORD = re.compile(r"[^a-z0-9_\s]")
 
 
 def normalize(text: str) -> str:
     # Minimal, fast normalization for offline use.
+    # Placeholders are lowercase so the [^a-z0-9_] pass below keeps them.
     t = text.lower()
-    t = _RE_URL.sub(" URL ", t)
-    t = _RE_EMAIL.sub(" EMAIL ", t)
-    t = _RE_NUM.sub(" NUM ", t)
-    t = re.sub(r"[^a-z0-9_\s]", " ", t)
+    t = _RE_URL.sub(" url ", t)
+    t = _RE_EMAIL.sub(" email ", t)
+    t = _RE_NUM.sub(" num ", t)
+    t = _RE_NON_WORD.sub(" ", t)
     t = _RE_WS.sub(" ", t).strip()
     return t
 
 
+class NormalizeCache:
+    """Opt-in LRU of normalized text keyed by Document.doc_id, bounded by a byte budget.
+
+    Entries also carry the text's length and hash: a doc_id can outlive an edit (a note
+    rewritten at the same size) or a change of ingest depth, and must not get the old
+    text's normalization. Safe to share between the threads that ingest sources concurrently.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._data: OrderedDict[Tuple[str, int, int], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, doc_id: str, text: str) -> str:
+        key = (doc_id, len(text), hash(text))
+        with self._lock:
+            t = self._data.get(key)
+            if t is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return t
+            self.misses += 1
+
+        t = normalize(text)
+        size = sys.getsizeof(t)
+        if size > self.max_bytes:
+            return t
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+            self._data[key] = t
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, old = self._data.popitem(last=False)
+                self.bytes -= sys.getsizeof(old)
+                self.evictions += 1
+        return t
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
 def sentence_snippet(text: str, max_len: int = 220) -> str:
     t = re.sub(r"\s+", " ", text).strip()
     if len(t) <= max_len:
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import heapq
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from .types import Document
-from .ingest.email_mbox import ingest_mbox
-from .ingest.email_eml import ingest_eml_dir
-from .ingest.notes import ingest_notes_dir
-from .ingest.browser_history import ingest_chrome_history_sqlite
+from .table import DocumentTable
+from .dedup import Deduplicator
+from .profiling import TRACE_ENV, Profiler, text_bytes
+from .progress import CancelToken, ProgressCallback, ProgressTracker
+from .source_cache import SourceCache, file_key, files_key
+from .nlp.text_clean import NormalizeCache
+from .utils import APP_DIR, epoch_key
+from .ingest.email_mbox import iter_mbox
+from .ingest.dates import DATE_PARSER, DateParser
+from .ingest.message_cache import CACHE_FILE, MessageCache
+from .ingest.email_eml import iter_eml_dir, scan_eml_files
+from .ingest.notes import iter_notes_dir, scan_note_files
+from .ingest.browser_history import iter_chrome_history_sqlite
 from .report.report import build_report
+from .report.aggregate import ReportAccumulator
+from .incremental import run_incremental
 
 
 @dataclass
@@ -18,21 +34,423 @@ class ImportConfig:
     eml_dir: Optional[Path] = None
     notes_dir: Optional[Path] = None
     browser_history_sqlite: Optional[Path] = None
+    # Fold documents into running aggregates instead of holding them all in memory
+    # (with `dedup`, one key per email and note is still kept; see core.dedup).
+    streaming: bool = False
+    # Processes used for MIME parsing of mbox/EML messages (1 = parse in-process).
+    workers: int = 1
+    # Ingest the configured sources concurrently, one thread each (MIME parsing still
+    # goes to the `workers` processes). Results are merged in the fixed source order.
+    parallel_sources: bool = True
+    # Threads reading note and EML files (I/O-bound; helps most on network mounts).
+    io_workers: int = 4
+    # With a limit, take the newest mbox messages instead of the oldest.
+    mbox_newest_first: bool = False
+    # Where derived local state (mbox offset indexes, incremental manifest, ...) is kept.
+    state_dir: Path = APP_DIR
+    # Only ingest items that are new or changed since the last incremental run.
+    incremental: bool = False
+    # Encrypts the incremental manifest with the vault's AES-GCM scheme when set.
+    manifest_passphrase: Optional[str] = None
+    # Hold the batch-mode documents in a columnar DocumentTable instead of a list.
+    columnar: bool = False
+    # When set, parsed emails are cached (AES-GCM encrypted) in state_dir so unchanged
+    # messages skip MIME parsing on the next run.
+    message_cache_passphrase: Optional[str] = None
+    message_cache_mb: int = 256
+    # How much of each email to read: "headers" (Date/Subject/From only; enough for
+    # rhythm and work patterns), "snippet:N" (first N body characters) or "full".
+    ingest_depth: str = "full"
+    # Analyze each email (by Message-ID, else content + Date) and each note text once,
+    # however many copies the sources hold. The first copy in source order
+    # (mbox, eml, notes, browser) and then in each source's read order is kept.
+    dedup: bool = True
+    # Record the tracemalloc peak of each pipeline stage in the report's diagnostics
+    # (stage times are always recorded). Tracing slows allocation-heavy code down.
+    trace_memory: bool = False
 
 
-def run_pipeline(cfg: ImportConfig, limits: dict | None = None) -> Tuple[List[Document], dict]:
+# Source names, in the fixed order sources are read and merged.
+SOURCES = ("mbox", "eml", "notes", "browser")
+Stream = Tuple[str, Iterator[Document], bool]
+
+
+def _source_streams(
+    cfg: ImportConfig,
+    limits: dict | None = None,
+    cache: Optional[MessageCache] = None,
+    tracker: Optional[ProgressTracker] = None,
+    cancel: Optional[CancelToken] = None,
+    dates: DateParser = DATE_PARSER,
+) -> List[Stream]:
+    # (name, documents, already newest-first) per configured source, in a fixed source order.
     limits = limits or {}
-    docs: List[Document] = []
+    progress = tracker.source if tracker is not None else lambda name: None
+    streams: List[Stream] = []
+    if cfg.mbox_path:
+        mbox = iter_mbox(
+            cfg.mbox_path,
+            limit=int(limits.get("mbox", 5000)),
+            workers=cfg.workers,
+            newest_first=cfg.mbox_newest_first,
+            index_dir=cfg.state_dir / "mbox_index",
+            cache=cache,
+            depth=cfg.ingest_depth,
+            progress=progress("mbox"),
+            cancel=cancel,
+            dates=dates,
+        )
+        streams.append(("mbox", mbox, False))  # delivery order, not Date order
+    if cfg.eml_dir:
+        eml = iter_eml_dir(
+            cfg.eml_dir,
+            limit=int(limits.get("eml", 5000)),
+            workers=cfg.workers,
+            cache=cache,
+            depth=cfg.ingest_depth,
+            io_workers=cfg.io_workers,
+            progress=progress("eml"),
+            cancel=cancel,
+            dates=dates,
+        )
+        streams.append(("eml", eml, False))
+    if cfg.notes_dir:
+        # newest modification time first
+        notes = iter_notes_dir(
+            cfg.notes_dir,
+            limit=int(limits.get("notes", 5000)),
+            io_workers=cfg.io_workers,
+            progress=progress("notes"),
+            cancel=cancel,
+        )
+        streams.append(("notes", notes, True))
+    if cfg.browser_history_sqlite:
+        # ordered by each URL's newest visit in SQL
+        browser = iter_chrome_history_sqlite(
+            cfg.browser_history_sqlite,
+            limit=int(limits.get("browser", 10000)),
+            progress=progress("browser"),
+            cancel=cancel,
+        )
+        streams.append(("browser", browser, True))
+    return streams
+
 
+def _source_keys(cfg: ImportConfig, limits: dict | None = None) -> Dict[str, Tuple]:
+    # Per configured source: a cheap fingerprint of its inputs (size/mtime of the file, or of
+    # every file a folder's limit selects) plus the options that decide its documents.
+    limits = limits or {}
+    keys: Dict[str, Tuple] = {}
     if cfg.mbox_path:
-        docs.extend(ingest_mbox(cfg.mbox_path, limit=int(limits.get("mbox", 5000))))
+        n = int(limits.get("mbox", 5000))
+        keys["mbox"] = ("mbox", file_key(cfg.mbox_path), n, cfg.mbox_newest_first, cfg.ingest_depth)
     if cfg.eml_dir:
-        docs.extend(ingest_eml_dir(cfg.eml_dir, limit=int(limits.get("eml", 5000))))
+        n = int(limits.get("eml", 5000))
+        keys["eml"] = ("eml", str(cfg.eml_dir.resolve()), files_key(scan_eml_files(cfg.eml_dir, n)), n, cfg.ingest_depth)
     if cfg.notes_dir:
-        docs.extend(ingest_notes_dir(cfg.notes_dir, limit=int(limits.get("notes", 5000))))
+        n = int(limits.get("notes", 5000))
+        keys["notes"] = ("notes", str(cfg.notes_dir.resolve()), files_key(scan_note_files(cfg.notes_dir, n)), n)
     if cfg.browser_history_sqlite:
-        docs.extend(ingest_chrome_history_sqlite(cfg.browser_history_sqlite, limit=int(limits.get("browser", 10000))))
+        n = int(limits.get("browser", 10000))
+        keys["browser"] = ("browser", file_key(cfg.browser_history_sqlite), n)
+    return keys
+
+
+def _time_key(d: Document) -> float:
+    return epoch_key(d.timestamp)
+
+
+def _newest_first(docs: Iterator[Document]) -> Iterator[Document]:
+    yield from sorted(docs, key=_time_key, reverse=True)
+
+
+def iter_documents(
+    cfg: ImportConfig, limits: dict | None = None, cache: Optional[MessageCache] = None
+) -> Iterator[Document]:
+    """Every configured source in turn, each in its own read order."""
+    for _, docs, _ in _source_streams(cfg, limits, cache):
+        yield from docs
+
+
+def iter_documents_newest_first(
+    cfg: ImportConfig, limits: dict | None = None, cache: Optional[MessageCache] = None
+) -> Iterator[Document]:
+    """All sources merged newest-first by UTC instant; undated documents come last.
+
+    Sources that are not read in time order (emails) are sorted on their own;
+    the rest are merged lazily, so the combined stream is never sorted as a whole.
+    """
+    return _merge_newest_first(_source_streams(cfg, limits, cache))
+
+
+def _merge_newest_first(streams: List[Stream]) -> Iterator[Document]:
+    sorted_streams = [docs if ordered else _newest_first(docs) for _, docs, ordered in streams]
+    return heapq.merge(*sorted_streams, key=_time_key, reverse=True)
+
+
+@dataclass
+class _RunState:
+    """Bookkeeping for one run_pipeline() call."""
+
+    cache: Optional[MessageCache] = None
+    dedup: Optional[Deduplicator] = None
+    stripped: Counter = field(default_factory=Counter)  # quote-stripped bytes per source
+    profiler: Profiler = field(default_factory=Profiler)
+    tracker: ProgressTracker = field(default_factory=ProgressTracker)
+    cancel: Optional[CancelToken] = None
+    source_cache: Optional[SourceCache] = None
+    source_keys: Dict[str, Tuple] = field(default_factory=dict)
+    reused: List[str] = field(default_factory=list)  # sources served from source_cache
+    dates: DateParser = field(default_factory=DateParser)  # this run's Date header counts
+
+    def analyzed(self, docs: Iterator[Document]) -> Iterator[Document]:
+        """The documents that actually get analyzed: deduplicated, with stripped bytes tallied."""
+        for d in self.dedup.filter(docs) if self.dedup is not None else docs:
+            if d.meta.get("stripped_bytes"):
+                self.stripped[d.source] += d.meta["stripped_bytes"]
+            yield d
+
+    def lane(self) -> "_RunState":
+        # Own dedup/tally for one ingestion thread; merged back in a fixed order.
+        dedup = Deduplicator() if self.dedup is not None else None
+        return _RunState(self.cache, dedup, Counter(), self.profiler, self.tracker, self.cancel, dates=self.dates)
+
+    def merge(self, other: "_RunState") -> None:
+        if self.dedup is not None:
+            self.dedup.merge(other.dedup)
+        self.stripped.update(other.stripped)
+
+
+_EMAIL_SOURCES = ("mbox", "eml")
+
+
+def _lanes(streams: List[Stream], dedup: bool) -> List[List[Stream]]:
+    # One thread per source, except that with dedup on the email sources share one, so
+    # the same copy of a message is kept as in a sequential run.
+    lanes: List[List[Stream]] = []
+    for s in streams:
+        if dedup and lanes and s[0] in _EMAIL_SOURCES and lanes[-1][-1][0] in _EMAIL_SOURCES:
+            lanes[-1].append(s)
+        else:
+            lanes.append([s])
+    return lanes
+
+
+def _collect(stream: Stream, profiler: Profiler) -> List[Document]:
+    # In the source's read order; sorting waits until duplicates are dropped.
+    name, docs, _ = stream
+    return list(profiler.source_docs(name, docs))
+
+
+def _collect_cached(stream: Stream, state: _RunState) -> List[Document]:
+    name = stream[0]
+    key = state.source_keys[name]
+    docs = state.source_cache.get(key)
+    if docs is not None:
+        state.reused.append(name)
+        stats = state.profiler.source(name)
+        stats.items = len(docs)
+        stats.bytes = sum(text_bytes(d.body) for d in docs)
+        stats.cached = True
+        return docs
+    docs = _collect(stream, state.profiler)
+    # A source cut short by a cancel is not what this key stands for.
+    if state.cancel is None or not state.cancel.interrupted:
+        state.source_cache.put(key, docs)
+    return docs
+
+
+def _fold_lane(lane: List[Stream], state: _RunState, norm_cache: NormalizeCache | None) -> ReportAccumulator:
+    acc = ReportAccumulator(norm_cache=norm_cache, profiler=state.profiler)
+    for name, docs, _ in lane:
+        acc.extend(state.analyzed(state.profiler.source_docs(name, docs)))
+    return acc
+
+
+def open_message_cache(cfg: ImportConfig) -> Optional[MessageCache]:
+    if not cfg.message_cache_passphrase:
+        return None
+    return MessageCache(
+        cfg.message_cache_passphrase,
+        path=cfg.state_dir / CACHE_FILE,
+        max_bytes=int(cfg.message_cache_mb) * 1024 * 1024,
+    )
+
+
+def run_pipeline(
+    cfg: ImportConfig,
+    limits: dict | None = None,
+    norm_cache: NormalizeCache | None = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    source_cache: Optional[SourceCache] = None,
+) -> Tuple[List[Document] | DocumentTable, dict]:
+    """Ingest every configured source and build the report.
+
+    With `cfg.streaming` the returned document list is empty: documents are
+    folded into a ReportAccumulator one at a time and never held together.
+    `cfg.incremental` also returns no documents; see core.incremental.
+    With `cfg.columnar` the documents come back as a DocumentTable.
+
+    Stage timings and per-source counts go to report["diagnostics"]; set the
+    ETHICAL_MIRROR_TRACE environment variable to a file path to also get them as
+    a Chrome trace.
+
+    `progress` receives combined Progress updates (items and bytes read, current
+    stage) from whichever thread is working. Setting `cancel` stops ingestion at
+    the next batch; the report is then built from what was read so far and
+    report["summary"]["cancelled"] is True.
+
+    With a `source_cache` (batch mode only), sources whose inputs and options did
+    not change since an earlier run are not read again, and a run identical to the
+    last complete one returns that run's result.
+    """
+    keys: Dict[str, Tuple] = {}
+    if source_cache is not None and not (cfg.streaming or cfg.incremental or cfg.columnar):
+        keys = _source_keys(cfg, limits)
+        hit = source_cache.result((tuple(keys.items()), cfg.dedup))
+        if hit is not None:
+            docs, report = hit
+            ProgressTracker(progress).stage("done")
+            summary = dict(report["summary"], source_cache={"reused": list(keys), "read": []})
+            # This run parsed and normalized nothing: no stale counts from the earlier one.
+            if "date_parsing" in summary:
+                summary["date_parsing"] = DateParser().snapshot()
+            summary.pop("message_cache", None)
+            if norm_cache is not None:
+                summary["normalization_cache"] = norm_cache.stats()
+            else:
+                summary.pop("normalization_cache", None)
+            # Nothing was read or computed: the earlier run's counts, as cached sources.
+            diagnostics = {
+                "stages": {},
+                "sources": {
+                    name: dict(s, seconds=0.0, cached=True) for name, s in report["diagnostics"]["sources"].items()
+                },
+                "memory_traced": False,
+            }
+            return docs, dict(report, summary=summary, diagnostics=diagnostics)
+
+    profiler = Profiler(trace_memory=cfg.trace_memory)
+    state = _RunState(
+        open_message_cache(cfg),
+        Deduplicator() if cfg.dedup else None,
+        profiler=profiler,
+        tracker=ProgressTracker(progress),
+        cancel=cancel,
+        source_cache=source_cache,
+        source_keys=keys,
+    )
+    try:
+        with profiler.tracing():
+            docs, report = _run(cfg, limits, norm_cache, state)
+    finally:
+        if state.cache is not None:
+            state.cache.close()
+    diagnostics = profiler.diagnostics()
+    # in source order; wall-clock seconds overlap when cfg.parallel_sources is on
+    diagnostics["sources"] = {name: diagnostics["sources"][name] for name in SOURCES if name in diagnostics["sources"]}
+    report["diagnostics"] = diagnostics
+    trace_path = os.environ.get(TRACE_ENV)
+    if trace_path:
+        profiler.dump_trace(Path(trace_path))
+    summary = report["summary"]
+    if cancel is not None and cancel.interrupted:
+        summary["cancelled"] = True
+    if state.dedup is not None:
+        summary["duplicates_collapsed"] = state.dedup.collapsed
+    if state.cache is not None:
+        summary["message_cache"] = state.cache.stats()
+    if cfg.mbox_path or cfg.eml_dir:
+        # bytes of quoted replies and signatures dropped from analyzed email bodies, per source
+        summary["quote_stripped_bytes"] = dict(sorted(state.stripped.items()))
+        # which parser tier handled each email Date header in this run
+        summary["date_parsing"] = state.dates.snapshot()
+    if keys:
+        summary["source_cache"] = {
+            "reused": [name for name in keys if name in state.reused],
+            "read": [name for name in keys if name not in state.reused],
+        }
+        if cancel is None or not cancel.interrupted:
+            source_cache.put_result((tuple(keys.items()), cfg.dedup), docs, report, list(keys.values()))
+    state.tracker.stage("done")
+    return docs, report
+
+
+def _run(
+    cfg: ImportConfig,
+    limits: dict | None,
+    norm_cache: NormalizeCache | None,
+    state: _RunState,
+) -> Tuple[List[Document] | DocumentTable, dict]:
+    if cfg.incremental:
+        report = run_incremental(
+            cfg,
+            limits,
+            norm_cache=norm_cache,
+            passphrase=cfg.manifest_passphrase,
+            message_cache=state.cache,
+            dedup=state.dedup,
+            stripped=state.stripped,
+            profiler=state.profiler,
+            tracker=state.tracker,
+            cancel=state.cancel,
+            dates=state.dates,
+        )
+        return [], report
+
+    streams = _source_streams(cfg, limits, state.cache, state.tracker, state.cancel, state.dates)
+    parallel = cfg.parallel_sources and len(streams) > 1
+    prof = state.profiler
+
+    if cfg.streaming:
+        # Documents are normalized and scanned as they are read, so that is part of "ingest" here.
+        with prof.span("ingest"):
+            if not parallel:
+                acc = ReportAccumulator(norm_cache=norm_cache, profiler=prof)
+                for name, docs, _ in streams:
+                    acc.extend(state.analyzed(prof.source_docs(name, docs)))
+            else:
+                # Each thread folds its sources into its own accumulator; merging them in
+                # source order gives the sequential result.
+                lanes = _lanes(streams, dedup=state.dedup is not None)
+                lane_states = [state.lane() for _ in lanes]
+                with ThreadPoolExecutor(max_workers=len(lanes)) as ex:
+                    accs = list(ex.map(_fold_lane, lanes, lane_states, [norm_cache] * len(lanes)))
+                for lane_state in lane_states:
+                    state.merge(lane_state)
+                acc = accs[0]
+                for other in accs[1:]:
+                    acc.merge(other)
+        state.tracker.stage("report")
+        return [], acc.report()
+
+    if cfg.columnar:
+        # Sequential on purpose: sources stream into the table without all being held as Documents.
+        # Duplicates are dropped per source before merging; the email sources (the only ones
+        # whose keys can collide) are sorted, so each is read whole, in source order.
+        with prof.span("ingest"):
+            timed = [(name, state.analyzed(prof.source_docs(name, docs)), ordered) for name, docs, ordered in streams]
+            table = DocumentTable.from_documents(_merge_newest_first(timed))
+        state.tracker.stage("report")
+        return table, build_report(table, norm_cache=norm_cache, profiler=prof)
 
-    docs.sort(key=lambda d: d.timestamp.isoformat() if d.timestamp else "", reverse=True)
-    report = build_report(docs)
+    with prof.span("ingest"):
+        if state.source_keys:
+            # Every source is held as a list so it can be kept for the next run.
+            collect = partial(_collect_cached, state=state)
+        else:
+            collect = partial(_collect, profiler=prof)
+        if parallel:
+            with ThreadPoolExecutor(max_workers=len(streams)) as ex:
+                lists = list(ex.map(collect, streams))
+        else:
+            lists = [collect(s) for s in streams]
+        # Duplicates are dropped in source and read order, like streaming mode does,
+        # so both keep the same copy; then each source is sorted and all are merged.
+        analyzed = [list(state.analyzed(docs)) for docs in lists]
+        ordered = [docs if s[2] else sorted(docs, key=_time_key, reverse=True) for s, docs in zip(streams, analyzed)]
+        docs: List[Document] = list(heapq.merge(*ordered, key=_time_key, reverse=True))
+    state.tracker.stage("report")
+    report = build_report(docs, norm_cache=norm_cache, profiler=prof)
     return docs, report
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# When set to a file path, run_pipeline() writes a Chrome trace (chrome://tracing, Perfetto) there.
+TRACE_ENV = "ETHICAL_MIRROR_TRACE"
+
+
+@dataclass
+class Span:
+    name: str
+    cat: str  # "stage" | "source"
+    start_ns: int
+    dur_ns: int
+    thread: str
+    peak_bytes: Optional[int] = None  # tracemalloc peak above the span's starting level
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SourceStats:
+    items: int = 0
+    bytes: int = 0  # UTF-8 size of the ingested document bodies
+    seconds: float = 0.0
+    cached: bool = False  # served from a SourceCache instead of read
+
+
+def text_bytes(s: str) -> int:
+    return len(s) if s.isascii() else len(s.encode("utf-8", errors="ignore"))
+
+
+class Profiler:
+    """Stage spans, per-source counts and cumulative timers for one pipeline run.
+
+    Spans are timed with perf_counter_ns. With `trace_memory`, spans opened on the
+    thread that created the profiler also record their tracemalloc peak; tracemalloc
+    is process-wide, so that peak includes what worker threads allocated meanwhile.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.spans: List[Span] = []
+        self.sources: Dict[str, SourceStats] = {}
+        self.timers: Dict[str, List[int]] = {}  # name -> [total ns, calls]
+        self._origin = time.perf_counter_ns()
+        self._owner = threading.get_ident()
+        self._mem_stack: List[List[int]] = []  # [start level, peak seen so far] per open span
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def tracing(self) -> Iterator["Profiler"]:
+        """Run tracemalloc for the duration (unless it is already running)."""
+        started = self.trace_memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            yield self
+        finally:
+            if started:
+                tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", **args: Any) -> Iterator[None]:
+        mem = self.trace_memory and threading.get_ident() == self._owner and tracemalloc.is_tracing()
+        if mem:
+            # The peak counter is global: bank the enclosing span's peak before resetting it.
+            level, peak = tracemalloc.get_traced_memory()
+            if self._mem_stack:
+                self._mem_stack[-1][1] = max(self._mem_stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame = [level, level]
+            self._mem_stack.append(frame)
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            dur = time.perf_counter_ns() - t0
+            peak_bytes = None
+            if mem:
+                self._mem_stack.pop()
+                peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+                if self._mem_stack:
+                    self._mem_stack[-1][1] = max(self._mem_stack[-1][1], peak)
+                peak_bytes = peak - frame[0]
+            self._add_span(Span(name, cat, t0, dur, threading.current_thread().name, peak_bytes, args))
+
+    def timed(self, name: str, fn: Callable[..., T]) -> Callable[..., T]:
+        """Wrap a function called many times (e.g. per document) and add up its time under `name`."""
+
+        def wrapper(*a: Any) -> T:
+            t0 = time.perf_counter_ns()
+            try:
+                return fn(*a)
+            finally:
+                dt = time.perf_counter_ns() - t0
+                with self._lock:
+                    entry = self.timers.setdefault(name, [0, 0])
+                    entry[0] += dt
+                    entry[1] += 1
+
+        return wrapper
+
+    def source(self, name: str) -> SourceStats:
+        with self._lock:
+            return self.sources.setdefault(name, SourceStats())
+
+    def source_docs(self, name: str, docs: Iterator[Any]) -> Iterator[Any]:
+        """Pass a source's documents through, counting them and the time spent producing
+        them (not what consumers do with them)."""
+        stats = self.source(name)
+        busy = 0
+        first = None
+        it = iter(docs)
+        try:
+            while True:
+                t0 = time.perf_counter_ns()
+                if first is None:
+                    first = t0
+                try:
+                    d = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    busy += time.perf_counter_ns() - t0
+                stats.items += 1
+                stats.bytes += text_bytes(d.body)
+                yield d
+        finally:
+            stats.seconds += busy / 1e9
+            if first is not None:
+                end = time.perf_counter_ns()
+                thread = threading.current_thread().name
+                self._add_span(Span(f"ingest {name}", "source", first, end - first, thread, None, {"busy_ms": busy / 1e6}))
+
+    def _add_span(self, s: Span) -> None:
+        with self._lock:
+            self.spans.append(s)
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """The report's `diagnostics` section: stage times/peaks and per-source counts."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for s in self.spans:
+            if s.cat != "stage":
+                continue
+            entry = stages.setdefault(s.name, {"seconds": 0.0})
+            entry["seconds"] = round(entry["seconds"] + s.dur_ns / 1e9, 4)
+            if s.peak_bytes is not None:
+                entry["peak_mb"] = round(max(entry.get("peak_mb", 0.0), s.peak_bytes / 2**20), 2)
+        for name, (ns, calls) in self.timers.items():
+            # Cumulative over many short calls, nested inside the stages above.
+            stages[name] = {"seconds": round(ns / 1e9, 4), "calls": calls}
+        sources: Dict[str, Dict[str, Any]] = {}
+        for name, st in self.sources.items():
+            sources[name] = {"items": st.items, "bytes": st.bytes, "seconds": round(st.seconds, 4)}
+            if st.cached:
+                sources[name]["cached"] = True
+        return {"stages": stages, "sources": sources, "memory_traced": self.trace_memory}
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Spans as Chrome trace-event JSON ("X" complete events, microseconds)."""
+        tids: Dict[str, int] = {}
+        events: List[Dict[str, Any]] = []
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            args = dict(s.args)
+            if s.peak_bytes is not None:
+                args["peak_bytes"] = s.peak_bytes
+            events.append(
+                {
+                    "name": s.name,
+                    "cat": s.cat,
+                    "ph": "X",
+                    "ts": (s.start_ns - self._origin) / 1000,
+                    "dur": s.dur_ns / 1000,
+                    "pid": os.getpid(),
+                    "tid": tids.setdefault(s.thread, len(tids)),
+                    "args": args,
+                }
+            )
+        for thread, tid in tids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": thread}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_trace(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+
+
+class NullProfiler(Profiler):
+    """Records nothing; the default where no profiler is passed."""
+
+    def span(self, name: str, cat: str = "stage", **args: Any):
+        return nullcontext()
+
+    def timed(self, name: str, fn: Callable[..., T]) -> Callable[..., T]:
+        return fn
+
+    def source(self, name: str) -> SourceStats:
+        # A fresh, unshared counter each time, so callers can still add to it.
+        return SourceStats()
+
+    def source_docs(self, name: str, docs: Iterator[Any]) -> Iterator[Any]:
+        return iter(docs)
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from .profiling import text_bytes
+from .types import Document
+
+# Documents between progress updates and cancellation checks.
+PROGRESS_BATCH = 64
+
+
+@dataclass
+class Progress:
+    stage: str  # "ingest" | "report" | "done"
+    items: int = 0
+    bytes: int = 0  # UTF-8 size of the document bodies read so far
+    total: Optional[int] = None  # items expected, when known
+    source: Optional[str] = None  # set on one source's updates, None on combined ones
+    elapsed: float = 0.0
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return min(1.0, self.items / self.total)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the rate so far, or None while that is unknown."""
+        f = self.fraction
+        if not f or self.elapsed <= 0:
+            return None
+        return self.elapsed * (1 - f) / f
+
+
+ProgressCallback = Callable[[Progress], None]
+
+
+class CancelToken:
+    """Set from any thread to stop ingestion at the next batch boundary.
+
+    Cancelled sources just end early, so the run still returns a report built
+    from what was read; `interrupted` tells whether any source was cut short.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.interrupted = False
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def stop(self) -> bool:
+        # True (and noted) when the caller should stop reading now.
+        if self._event.is_set():
+            self.interrupted = True
+            return True
+        return False
+
+
+def tracked(
+    docs: Iterable[Document],
+    source: str,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[CancelToken] = None,
+    total: Optional[int] = None,
+) -> Iterator[Document]:
+    """Yield `docs`, reporting progress and checking `cancel` every PROGRESS_BATCH documents."""
+    if progress is None and cancel is None:
+        yield from docs
+        return
+    t0 = time.perf_counter()
+    items = nbytes = 0
+    it = iter(docs)
+    try:
+        while True:
+            if items % PROGRESS_BATCH == 0:
+                if progress is not None:
+                    progress(Progress("ingest", items, nbytes, total, source, time.perf_counter() - t0))
+                if cancel is not None and cancel.stop():
+                    return
+            try:
+                d = next(it)
+            except StopIteration:
+                break
+            items += 1
+            nbytes += text_bytes(d.body)
+            yield d
+        if progress is not None:
+            progress(Progress("ingest", items, nbytes, items, source, time.perf_counter() - t0))
+    finally:
+        # Release the source's files and worker pools right away, also when cut short.
+        close = getattr(it, "close", None)
+        if close is not None:
+            close()
+
+
+class ProgressTracker:
+    """Combines per-source updates, possibly from concurrent ingest threads, into one Progress."""
+
+    def __init__(self, callback: Optional[ProgressCallback] = None):
+        self.callback = callback
+        self.t0 = time.perf_counter()
+        self._sources: Dict[str, Progress] = {}
+        self._lock = threading.Lock()
+
+    def source(self, name: str) -> Optional[ProgressCallback]:
+        if self.callback is None:
+            return None
+        return lambda p: self._update(name, p)
+
+    def _update(self, name: str, p: Progress) -> None:
+        with self._lock:
+            self._sources[name] = p
+        self.stage("ingest")
+
+    def stage(self, stage: str) -> None:
+        if self.callback is None:
+            return
+        with self._lock:
+            parts = list(self._sources.values())
+        # Sources without a known size count what they have read so far.
+        total = sum(p.total if p.total is not None else p.items for p in parts)
+        self.callback(
+            Progress(
+                stage,
+                items=sum(p.items for p in parts),
+                bytes=sum(p.bytes for p in parts),
+                total=total,
+                elapsed=time.perf_counter() - self.t0,
+            )
+        )
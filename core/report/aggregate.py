@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..types import Document
+from ..utils import epoch_key, wall_seconds
+from ..nlp.text_clean import NormalizeCache, normalize
+from ..nlp.keyword_index import KeywordIndex
+from ..profiling import NULL_PROFILER, Profiler
+from ..infer.timeline import TimeHistograms
+from ..infer.rhythm import rhythm_from_histograms
+from ..infer.work_patterns import work_patterns_from_histograms
+from ..infer.interests import KEYWORD_INDEX, InterestSignal, _domain_hints, source_entry
+from ..explain.attribution import document_entry, keyword_signals
+from .report import assemble_report
+
+
+# Event times are buffered and folded into the histograms in vectorized chunks.
+_TIME_CHUNK = 1 << 16
+
+
+def _push_bounded(heap: List[Tuple], n: int, key: Tuple, make_entry: Callable[[], Dict[str, Any]]) -> None:
+    # Min-heap of the n best keys; the entry is only built when it actually makes the cut.
+    if len(heap) < n:
+        heapq.heappush(heap, key + (make_entry(),))
+    elif key > heap[0][:-1]:
+        heapq.heapreplace(heap, key + (make_entry(),))
+
+
+class ReportAccumulator:
+    """Builds the same report as build_report() from a stream of documents.
+
+    Only histograms, keyword counters and a bounded top-N of preview entries per
+    label are kept, so memory does not grow with the number of documents.
+    """
+
+    def __init__(
+        self,
+        index: KeywordIndex = KEYWORD_INDEX,
+        norm_cache: NormalizeCache | None = None,
+        top_sources: int = 5,
+        top_docs: int = 6,
+        profiler: Profiler = NULL_PROFILER,
+    ):
+        self.index = index
+        self.norm_cache = norm_cache
+        self.profiler = profiler
+        self._normalize = profiler.timed(
+            "normalization", norm_cache.get if norm_cache is not None else lambda _, text: normalize(text)
+        )
+        self.top_sources_n = top_sources
+        self.top_docs_n = top_docs
+
+        self.documents = 0
+        self.events = 0
+        self.sources: set = set()
+        self.times = TimeHistograms()
+        self._pending_times = array("q")
+        self.label_scores: Dict[str, float] = {}
+        self.label_hits: Dict[str, Counter] = {}
+        self.label_doc_freq: Dict[str, Counter] = {}
+        self.top_sources: Dict[str, List[Tuple]] = {}  # label -> heap of (score, -doc, -kind, entry)
+        self.top_docs: Dict[str, List[Tuple]] = {}  # label -> heap of (score, -doc, entry)
+
+    def add(self, d: Document) -> None:
+        self.add_facts(self.facts(d, with_entries=False), d)
+
+    def facts(self, d: Document, with_entries: bool = True) -> Dict[str, Any]:
+        """Everything the report needs from one document, as a small JSON-able dict.
+
+        Facts can be persisted (see core.incremental) and fed back through
+        add_facts() later without the document text.
+        """
+        f: Dict[str, Any] = {
+            "doc_id": d.doc_id,
+            "source": d.source,
+            "t": [wall_seconds(t) for t in d.times()],  # newest first
+            "e": epoch_key(d.timestamp) if d.timestamp is not None else None,  # for ordering
+            "w": d.weight,
+            "hits": {},
+            "domains": [],
+        }
+        text = d.text  # built from header + body on every access
+        if not text.strip():
+            return f
+
+        tnorm = self._normalize(d.doc_id, text)
+        f["hits"] = {label: dict(hits) for label, hits in self.index.scan(tnorm).items()}
+        if d.source == "browser":
+            f["domains"] = [[lbl, w] for lbl, w in _domain_hints((d.meta.get("host") or "").lower())]
+        if with_entries and (f["hits"] or f["domains"]):
+            f["source_entry"] = source_entry(d, 0.0)
+            f["doc_entry"] = document_entry(d, 0.0, [])
+        return f
+
+    def add_facts(self, f: Dict[str, Any], d: Optional[Document] = None) -> None:
+        # Preview entries come from `d` when the document is at hand (built lazily, only
+        # if they make the top-N), otherwise from the templates stored in the facts.
+        i = self.documents
+        self.documents += 1
+        self.sources.add(f["source"])
+        self._pending_times.extend(f["t"])
+        if len(self._pending_times) >= _TIME_CHUNK:
+            self._flush_times()
+        w = f["w"]
+        self.events += w
+
+        if d is not None:
+            make_source = lambda s: source_entry(d, s)
+            make_doc = lambda s, matched: document_entry(d, s, matched)
+        else:
+            make_source = lambda s: dict(f["source_entry"], score=float(s))
+            make_doc = lambda s, matched: dict(f["doc_entry"], score=float(s), matched=matched[:8])
+
+        # Totals and rankings both count every event the document stands for.
+        for label, hits in f["hits"].items():
+            s = float(sum(hits.values())) * w
+            self._add_score(label, s)
+            self.label_hits.setdefault(label, Counter()).update({k: v * w for k, v in hits.items()})
+            self.label_doc_freq.setdefault(label, Counter()).update(dict.fromkeys(hits, w))
+            _push_bounded(self.top_sources.setdefault(label, []), self.top_sources_n, (s, -i, 0), lambda: make_source(s))
+            matched = list(hits)
+            _push_bounded(self.top_docs.setdefault(label, []), self.top_docs_n, (s, -i), lambda: make_doc(s, matched))
+
+        for j, (lbl, hint) in enumerate(f["domains"]):
+            hint *= w
+            self._add_score(lbl, hint)
+            _push_bounded(self.top_sources.setdefault(lbl, []), self.top_sources_n, (hint, -i, -1 - j), lambda: make_source(hint))
+
+    def extend(self, docs) -> "ReportAccumulator":
+        for d in docs:
+            self.add(d)
+        return self
+
+    def merge(self, other: "ReportAccumulator") -> "ReportAccumulator":
+        """Fold in an accumulator that saw the documents following this one's.
+
+        The result equals feeding both document streams, this one first, to a
+        single accumulator (up to float summation order), so sources can be
+        accumulated concurrently and merged in a fixed order.
+        """
+        self._flush_times()
+        other._flush_times()
+        offset = self.documents
+        self.documents += other.documents
+        self.events += other.events
+        self.sources |= other.sources
+        self.times.merge(other.times)
+        for label, s in other.label_scores.items():
+            self._add_score(label, s)
+        for label, hits in other.label_hits.items():
+            self.label_hits.setdefault(label, Counter()).update(hits)
+        for label, freq in other.label_doc_freq.items():
+            self.label_doc_freq.setdefault(label, Counter()).update(freq)
+        # Heap keys hold -document index; shift the other's documents after ours.
+        for mine, theirs, n in (
+            (self.top_sources, other.top_sources, self.top_sources_n),
+            (self.top_docs, other.top_docs, self.top_docs_n),
+        ):
+            for label, heap in theirs.items():
+                for item in heap:
+                    key = (item[0], item[1] - offset) + item[2:-1]
+                    _push_bounded(mine.setdefault(label, []), n, key, lambda entry=item[-1]: entry)
+        return self
+
+    def _flush_times(self) -> None:
+        self.times.add_array(np.frombuffer(self._pending_times, dtype=np.int64))
+        self._pending_times = array("q")
+
+    def _add_score(self, label: str, s: float) -> None:
+        self.label_scores[label] = self.label_scores.get(label, 0.0) + s
+
+    def interests(self, top_k: int = 6) -> List[InterestSignal]:
+        total = sum(self.label_scores.values()) or 1.0
+        ranked = sorted(self.label_scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+        out: List[InterestSignal] = []
+        for label, score in ranked:
+            hits = self.label_hits.get(label, Counter())
+            out.append(
+                InterestSignal(
+                    label=label,
+                    score=float(score / total),
+                    top_keywords=[(k, float(v)) for k, v in hits.most_common(8)],
+                    top_sources=[x[-1] for x in sorted(self.top_sources.get(label, []), reverse=True)],
+                )
+            )
+        return out
+
+    def report(self) -> Dict[str, Any]:
+        self._flush_times()
+        # Keyword scanning already happened per document in facts(); these only reduce.
+        with self.profiler.span("interest scoring"):
+            interests = self.interests()
+        attributions = []
+        with self.profiler.span("attribution"):
+            for it in interests:
+                if self.index.categories.get(it.label):
+                    attributions.append(
+                        {
+                            "inference": it.label,
+                            "signals": keyword_signals(self.label_doc_freq.get(it.label, Counter())),
+                            "top_documents": [x[-1] for x in sorted(self.top_docs.get(it.label, []), reverse=True)],
+                        }
+                    )
+
+        summary: Dict[str, Any] = {
+            "documents_analyzed": self.documents,
+            "events_analyzed": self.events,
+            "sources": sorted(self.sources),
+        }
+        if self.norm_cache is not None:
+            summary["normalization_cache"] = self.norm_cache.stats()
+
+        with self.profiler.span("time profiles"):
+            rhythm = rhythm_from_histograms(self.times)
+            work = work_patterns_from_histograms(self.times)
+        return assemble_report(summary, rhythm, work, interests, attributions)
@@ -4,28 +4,60 @@ from dataclasses import asdict
 from typing import Any, Dict, List
 
 from ..types import Document
-from ..infer.rhythm import infer_rhythm
-from ..infer.work_patterns import infer_work_patterns
-from ..infer.interests import infer_interests, CATEGORY_KEYWORDS
-from ..explain.attribution import keyword_attribution
+from ..table import DocumentTable
+from ..nlp.text_clean import NormalizeCache
+from ..profiling import NULL_PROFILER, Profiler
+from ..infer.timeline import histograms_from_docs
+from ..infer.rhythm import RhythmProfile, rhythm_from_histograms
+from ..infer.work_patterns import WorkPattern, work_patterns_from_histograms
+from ..infer.interests import InterestSignal, infer_interests, build_keyword_matrix, CATEGORY_KEYWORDS
+from ..explain.attribution import attribution_from_matrix
 
 
-def build_report(docs: List[Document]) -> Dict[str, Any]:
-    rhythm = infer_rhythm(docs)
-    work = infer_work_patterns(docs)
-    interests = infer_interests(docs)
+def build_report(
+    docs: List[Document] | DocumentTable,
+    norm_cache: NormalizeCache | None = None,
+    profiler: Profiler = NULL_PROFILER,
+) -> Dict[str, Any]:
+    # One timestamp column and one set of histograms feed both time profiles.
+    with profiler.span("time profiles"):
+        hist = histograms_from_docs(docs)
+        rhythm = rhythm_from_histograms(hist)
+        work = work_patterns_from_histograms(hist)
+    # One normalize + keyword scan per document; everything below reduces over it.
+    with profiler.span("interest scoring"):
+        matrix = build_keyword_matrix(docs, norm_cache=norm_cache, profiler=profiler)
+        interests = infer_interests(docs, matrix=matrix)
 
     attributions = []
-    for it in interests:
-        kws = CATEGORY_KEYWORDS.get(it.label, [])
-        if kws:
-            attr = keyword_attribution(docs, it.label, kws)
-            attributions.append(
-                {"inference": it.label, "signals": attr.signals, "top_documents": attr.top_documents}
-            )
+    with profiler.span("attribution"):
+        for it in interests:
+            if CATEGORY_KEYWORDS.get(it.label):
+                attr = attribution_from_matrix(matrix, it.label)
+                attributions.append(
+                    {"inference": it.label, "signals": attr.signals, "top_documents": attr.top_documents}
+                )
 
+    summary: Dict[str, Any] = {
+        "documents_analyzed": len(docs),
+        "events_analyzed": sum(matrix.weights),
+        "sources": sorted(docs.source_names() if isinstance(docs, DocumentTable) else {d.source for d in docs}),
+    }
+    if norm_cache is not None:
+        summary["normalization_cache"] = norm_cache.stats()
+
+    return assemble_report(summary, rhythm, work, interests, attributions)
+
+
+def assemble_report(
+    summary: Dict[str, Any],
+    rhythm: RhythmProfile,
+    work: WorkPattern,
+    interests: List[InterestSignal],
+    attributions: List[Dict[str, Any]],
+) -> Dict[str, Any]:
     return {
-        "summary": {"documents_analyzed": len(docs), "sources": sorted(list({d.source for d in docs}))},
+        "summary": summary,
         "rhythm": asdict(rhythm),
         "work_patterns": asdict(work),
         "interests": [
@@ -9,14 +9,19 @@ from typing import Any, Dict
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 
-DEFAULT_DIR = Path.home() / ".ethical_mirror"
+from ..utils import APP_DIR
+
+DEFAULT_DIR = APP_DIR
 DEFAULT_VAULT = DEFAULT_DIR / "vault.bin"
 
 
-def _derive_key(passphrase: str, salt: bytes) -> bytes:
+_AAD = b"ethical-mirror"
+
+
+def derive_key(passphrase: str, salt: bytes, length: int = 32) -> bytes:
     kdf = Scrypt(
         salt=salt,
-        length=32,
+        length=length,
         n=2**15,
         r=8,
         p=1,
@@ -24,16 +29,22 @@ def _derive_key(passphrase: str, salt: bytes) -> bytes:
     return kdf.derive(passphrase.encode("utf-8"))
 
 
+def encrypt_bytes(key: bytes, data: bytes, aad: bytes = _AAD) -> bytes:
+    """AES-GCM with a fresh nonce; returns nonce + ciphertext."""
+    nonce = os.urandom(12)
+    return nonce + AESGCM(key).encrypt(nonce, data, associated_data=aad)
+
+
+def decrypt_bytes(key: bytes, blob: bytes, aad: bytes = _AAD) -> bytes:
+    return AESGCM(key).decrypt(blob[:12], blob[12:], associated_data=aad)
+
+
 def save_encrypted(obj: Dict[str, Any], passphrase: str, path: Path = DEFAULT_VAULT) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     salt = os.urandom(16)
-    nonce = os.urandom(12)
-    key = _derive_key(passphrase, salt)
-    aes = AESGCM(key)
+    key = derive_key(passphrase, salt)
     pt = json.dumps(obj, ensure_ascii=False).encode("utf-8")
-    ct = aes.encrypt(nonce, pt, associated_data=b"ethical-mirror")
-    blob = salt + nonce + ct
-    path.write_bytes(blob)
+    path.write_bytes(salt + encrypt_bytes(key, pt))
 
 
 def load_encrypted(passphrase: str, path: Path = DEFAULT_VAULT) -> Dict[str, Any]:
@@ -41,11 +52,8 @@ def load_encrypted(passphrase: str, path: Path = DEFAULT_VAULT) -> Dict[str, Any
     if len(blob) < 16 + 12 + 1:
         raise ValueError("Vault file is corrupted or empty.")
     salt = blob[:16]
-    nonce = blob[16:28]
-    ct = blob[28:]
-    key = _derive_key(passphrase, salt)
-    aes = AESGCM(key)
-    pt = aes.decrypt(nonce, ct, associated_data=b"ethical-mirror")
+    key = derive_key(passphrase, salt)
+    pt = decrypt_bytes(key, blob[16:])
     return json.loads(pt.decode("utf-8"))
 
 
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .ingest.walk import FileEntry
+from .types import Document
+
+# Rough size of a Document besides its body (object, meta dict, timestamps).
+_DOC_OVERHEAD = 512
+
+
+def file_key(path: Path) -> Tuple[str, int, int]:
+    st = path.stat()
+    return str(path.resolve()), st.st_size, st.st_mtime_ns
+
+
+def files_key(files: List[FileEntry]) -> str:
+    # Digest of the selected files' paths, sizes and mtimes; any edit, addition or removal changes it.
+    h = hashlib.blake2b(digest_size=16)
+    for f in files:
+        h.update(f"{f.path}\0{f.stat.st_size}\0{f.stat.st_mtime_ns}\n".encode("utf-8", errors="surrogateescape"))
+    return h.hexdigest()
+
+
+class SourceCache:
+    """Opt-in LRU of each source's ingested documents across runs, bounded by a byte budget.
+
+    Keys are cheap fingerprints of a source's inputs plus the options that decide
+    what is read from it (see core.pipeline), so a run over unchanged inputs reads
+    nothing again and changing one source's limit re-reads only that source. The
+    last complete result is kept as well, but only while every source it was built
+    from is: it holds those sources' documents, which are then already counted in
+    `bytes`. Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._data: OrderedDict[Hashable, Tuple[List[Document], int]] = OrderedDict()
+        self._result: Optional[Tuple[Hashable, Any, Dict[str, Any], Tuple[Hashable, ...]]] = None
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[List[Document]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, docs: List[Document]) -> None:
+        size = sum(len(d.body) + _DOC_OVERHEAD for d in docs)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+                self._drop_result_of(key)
+            self._data[key] = (docs, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                evicted_key, (_, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+                self._drop_result_of(evicted_key)
+
+    def _drop_result_of(self, key: Hashable) -> None:
+        # The result would otherwise keep this entry's documents alive outside the budget.
+        if self._result is not None and key in self._result[3]:
+            self._result = None
+
+    def result(self, key: Hashable) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """The (documents, report) of the last complete run, if it had the same key."""
+        with self._lock:
+            if self._result is None or self._result[0] != key:
+                return None
+            return self._result[1], self._result[2]
+
+    def put_result(self, key: Hashable, docs: Any, report: Dict[str, Any], sources: List[Hashable]) -> None:
+        """Keep a run's result, built from the documents cached under `sources`.
+
+        Not kept if any of them is missing (too large for the budget, or evicted).
+        """
+        with self._lock:
+            if all(k in self._data for k in sources):
+                self._result = (key, docs, report, tuple(sources))
+            else:
+                self._result = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._result = None
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from .types import Document
+from .utils import epoch_key, local_offset
+
+TABLE_VERSION = 1
+
+NO_TIME = np.iinfo(np.int64).min  # timestamp column: document has no timestamp
+NAIVE = np.iinfo(np.int32).min  # tz_offset column: timestamp was a naive datetime
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Meta cell states (IntColumn.state) and sentinel codes (StrColumn.codes).
+_ABSENT, _VALUE, _NONE = 0, 1, 2
+
+
+def _micros(dt: datetime) -> int:
+    # Naive datetimes are stored as their wall-clock reading, aware ones as UTC.
+    delta = (dt - _EPOCH_UTC) if dt.tzinfo is not None else (dt - _EPOCH)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(us: int, offset: int) -> datetime:
+    if offset == NAIVE:
+        return _EPOCH + timedelta(microseconds=us)
+    return (_EPOCH_UTC + timedelta(microseconds=us)).astimezone(timezone(timedelta(seconds=offset)))
+
+
+def _local_offsets(secs: np.ndarray, own: np.ndarray) -> np.ndarray:
+    # utils.local_offset of every UTC instant in `secs`, looked up once per distinct hour;
+    # hours in which the offset changes (DST) are looked up per instant. `own` is used
+    # where the platform can't tell, as utils.wall_seconds does.
+    if not secs.size:
+        return own
+
+    def lookup(values: np.ndarray) -> np.ndarray:
+        out = [local_offset(v) for v in values.tolist()]
+        return np.array([NAIVE if o is None else o for o in out], dtype=np.int64)
+
+    hours, inverse = np.unique(secs // 3600, return_inverse=True)
+    start, end = lookup(hours * 3600), lookup(hours * 3600 + 3599)
+    offsets = start[inverse]
+    mixed = np.flatnonzero((start != end)[inverse])
+    if mixed.size:
+        offsets[mixed] = lookup(secs[mixed])
+    return np.where(offsets == NAIVE, own, offsets)
+
+
+def _ragged_take(offsets: np.ndarray, idx: np.ndarray) -> tuple:
+    # New offsets for rows `idx` of a ragged column, and the source position of every
+    # element they cover, without a Python loop over rows.
+    starts = offsets[:-1][idx]
+    lengths = offsets[1:][idx] - starts
+    new_offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    pos = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1], dtype=np.int64)
+    return new_offsets, pos
+
+
+@dataclass
+class StringColumn:
+    """Variable-length strings as one UTF-8 buffer plus n+1 offsets."""
+
+    data: np.ndarray  # uint8
+    offsets: np.ndarray  # int64, len n + 1
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> "StringColumn":
+        b = _StringBuilder()
+        for v in values:
+            b.append(v)
+        return b.build()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        a, b = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.data[a:b]).decode("utf-8", errors="surrogatepass")
+
+    def take(self, idx: np.ndarray) -> "StringColumn":
+        offsets, pos = _ragged_take(self.offsets, idx)
+        return StringColumn(self.data[pos], offsets)
+
+
+@dataclass
+class IntColumn:
+    values: np.ndarray  # int64
+    state: np.ndarray  # int8: absent / value / None
+
+    def get(self, i: int) -> tuple:
+        s = int(self.state[i])
+        return s != _ABSENT, (int(self.values[i]) if s == _VALUE else None)
+
+    def take(self, idx: np.ndarray) -> "IntColumn":
+        return IntColumn(self.values[idx], self.state[idx])
+
+
+@dataclass
+class StrColumn:
+    """Dictionary-encoded strings: repeated values (paths, hosts, senders) are stored once."""
+
+    codes: np.ndarray  # int32 into `values`; -1 absent, -2 None
+    values: StringColumn
+    as_json: bool = False  # values are JSON-encoded (mixed/other types)
+
+    def get(self, i: int) -> tuple:
+        c = int(self.codes[i])
+        if c < 0:
+            return c != -1, None
+        v = self.values[c]
+        return True, (json.loads(v) if self.as_json else v)
+
+    def take(self, idx: np.ndarray) -> "StrColumn":
+        return StrColumn(self.codes[idx], self.values, self.as_json)
+
+
+class _StringBuilder:
+    def __init__(self):
+        self.buf = bytearray()
+        self.offsets = [0]
+
+    def append(self, s: str) -> None:
+        self.buf += s.encode("utf-8", errors="surrogatepass")
+        self.offsets.append(len(self.buf))
+
+    def build(self) -> StringColumn:
+        return StringColumn(np.frombuffer(bytes(self.buf), dtype=np.uint8), np.array(self.offsets, dtype=np.int64))
+
+
+def _meta_column(n: int, cells: List[Tuple[int, Any]]) -> Any:
+    # `cells` are the (row, value) pairs of one meta key; other rows lack the key.
+    present = [v for _, v in cells if v is not None]
+    if all(type(v) is int for v in present):
+        values = np.zeros(n, dtype=np.int64)
+        state = np.zeros(n, dtype=np.int8)
+        for i, v in cells:
+            state[i] = _VALUE if v is not None else _NONE
+            values[i] = v if v is not None else 0
+        return IntColumn(values, state)
+
+    as_json = not all(isinstance(v, str) for v in present)
+    lookup: Dict[str, int] = {}
+    codes = np.full(n, -1, dtype=np.int32)
+    for i, v in cells:
+        if v is None:
+            codes[i] = -2
+        else:
+            codes[i] = lookup.setdefault(json.dumps(v, ensure_ascii=False) if as_json else v, len(lookup))
+    return StrColumn(codes, StringColumn.from_strings(lookup), as_json)
+
+
+@dataclass
+class DocumentTable:
+    """Columnar form of a list of Documents.
+
+    Text, doc ids and string meta live in shared UTF-8 buffers, `source` is a
+    categorical code, timestamps are int64 microseconds (UTC for aware datetimes,
+    wall clock for naive ones) with the UTC offset kept alongside, and each meta
+    key is one typed column. `table[i]` and iteration yield Document views.
+    """
+
+    doc_id: StringColumn
+    source: np.ndarray  # uint8 codes into `sources`
+    sources: List[str]
+    timestamp: np.ndarray  # int64 microseconds, NO_TIME if missing
+    tz_offset: np.ndarray  # int32 seconds east of UTC, NAIVE for naive datetimes
+    text: StringColumn
+    # Document.event_times, flattened: row i owns event_times[event_offsets[i]:event_offsets[i + 1]].
+    # Events share their row's UTC offset.
+    event_offsets: np.ndarray
+    event_times: np.ndarray
+    meta: Dict[str, Any] = field(default_factory=dict)  # key -> IntColumn | StrColumn
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Document]) -> "DocumentTable":
+        ids, texts = _StringBuilder(), _StringBuilder()
+        source_codes: List[int] = []
+        sources: Dict[str, int] = {}
+        stamps: List[int] = []
+        offsets: List[int] = []
+        event_offsets = [0]
+        events: List[int] = []
+        meta_cells: Dict[str, List[Tuple[int, Any]]] = {}
+        for i, d in enumerate(docs):
+            ids.append(d.doc_id)
+            texts.append(d.text)
+            source_codes.append(sources.setdefault(d.source, len(sources)))
+            ts = d.timestamp
+            stamps.append(_micros(ts) if ts is not None else NO_TIME)
+            off = ts.utcoffset() if ts is not None else None
+            offsets.append(int(off.total_seconds()) if off is not None else NAIVE)
+            if d.event_times:
+                events.extend(_micros(t) for t in d.event_times)
+            event_offsets.append(len(events))
+            for k, v in d.meta.items():
+                meta_cells.setdefault(k, []).append((i, v))
+
+        n = len(source_codes)
+        return cls(
+            doc_id=ids.build(),
+            source=np.array(source_codes, dtype=np.uint8),
+            sources=list(sources),
+            timestamp=np.array(stamps, dtype=np.int64),
+            tz_offset=np.array(offsets, dtype=np.int32),
+            text=texts.build(),
+            event_offsets=np.array(event_offsets, dtype=np.int64),
+            event_times=np.array(events, dtype=np.int64),
+            meta={k: _meta_column(n, cells) for k, cells in meta_cells.items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def __getitem__(self, i: int) -> Document:
+        ts_us, off = int(self.timestamp[i]), int(self.tz_offset[i])
+        a, b = int(self.event_offsets[i]), int(self.event_offsets[i + 1])
+        meta: Dict[str, Any] = {}
+        for key, col in self.meta.items():
+            present, v = col.get(i)
+            if present:
+                meta[key] = v
+        return Document(
+            doc_id=self.doc_id[i],
+            source=self.sources[int(self.source[i])],
+            text=self.text[i],
+            timestamp=_from_micros(ts_us, off) if ts_us != NO_TIME else None,
+            meta=meta,
+            event_times=[_from_micros(int(t), off) for t in self.event_times[a:b]] if b > a else None,
+        )
+
+    def __iter__(self) -> Iterator[Document]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_documents(self) -> List[Document]:
+        return list(self)
+
+    def source_names(self) -> List[str]:
+        return [self.sources[c] for c in np.unique(self.source).tolist()]
+
+    def weights(self) -> np.ndarray:
+        """Document.weight for every row."""
+        n = np.diff(self.event_offsets)
+        return np.where(n > 0, n, 1)
+
+    def wall_seconds(self) -> np.ndarray:
+        """utils.wall_seconds of every event (event_times, else timestamp) as one int64 column."""
+        n_events = np.diff(self.event_offsets)
+        single = (n_events == 0) & (self.timestamp != NO_TIME)
+        # Naive times are stored as local wall clock already; aware ones as UTC, and
+        # get this machine's offset at that instant.
+        secs = np.concatenate([self.timestamp[single], self.event_times]) // 1_000_000
+        own = np.concatenate([self.tz_offset[single], np.repeat(self.tz_offset, n_events)]).astype(np.int64)
+        naive = own == NAIVE
+        aware = np.flatnonzero(~naive)
+        walls = secs.copy()
+        walls[aware] += _local_offsets(secs[aware], own[aware])
+        # Keep row order: rows with events contribute all of them, others their timestamp.
+        rows = np.concatenate([np.flatnonzero(single), np.repeat(np.arange(len(self)), n_events)])
+        return walls[np.argsort(rows, kind="stable")]
+
+    def take(self, idx: np.ndarray) -> "DocumentTable":
+        idx = np.asarray(idx, dtype=np.int64)
+        event_offsets, pos = _ragged_take(self.event_offsets, idx)
+        return DocumentTable(
+            doc_id=self.doc_id.take(idx),
+            source=self.source[idx],
+            sources=list(self.sources),
+            timestamp=self.timestamp[idx],
+            tz_offset=self.tz_offset[idx],
+            text=self.text.take(idx),
+            event_offsets=event_offsets,
+            event_times=self.event_times[pos],
+            meta={k: col.take(idx) for k, col in self.meta.items()},
+        )
+
+    def newest_first(self) -> "DocumentTable":
+        """Rows sorted by timestamp instant, newest first; rows without one go last (stable)."""
+        # Aware timestamps are stored as UTC already; naive ones are local time, as in
+        # utils.epoch_key (which pipeline._newest_first sorts by).
+        utc = self.timestamp.copy()
+        naive = np.flatnonzero((self.tz_offset == NAIVE) & (self.timestamp != NO_TIME))
+        utc[naive] = [round(epoch_key(_from_micros(int(us), NAIVE)) * 1_000_000) for us in self.timestamp[naive]]
+        key = np.where(self.timestamp == NO_TIME, np.iinfo(np.int64).max, -utc)
+        return self.take(np.argsort(key, kind="stable"))
+
+    def save(self, folder: Path) -> None:
+        """Write the table as .npy files plus a small JSON header; see load()."""
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        arrays: Dict[str, np.ndarray] = {
+            "doc_id.data": self.doc_id.data,
+            "doc_id.offsets": self.doc_id.offsets,
+            "source": self.source,
+            "timestamp": self.timestamp,
+            "tz_offset": self.tz_offset,
+            "text.data": self.text.data,
+            "text.offsets": self.text.offsets,
+            "event_offsets": self.event_offsets,
+            "event_times": self.event_times,
+        }
+        meta_header = []
+        for j, (key, col) in enumerate(self.meta.items()):
+            if isinstance(col, IntColumn):
+                meta_header.append({"key": key, "kind": "int"})
+                arrays[f"meta{j}.values"] = col.values
+                arrays[f"meta{j}.state"] = col.state
+            else:
+                meta_header.append({"key": key, "kind": "json" if col.as_json else "str"})
+                arrays[f"meta{j}.codes"] = col.codes
+                arrays[f"meta{j}.data"] = col.values.data
+                arrays[f"meta{j}.offsets"] = col.values.offsets
+        for name, arr in arrays.items():
+            np.save(folder / f"{name}.npy", np.ascontiguousarray(arr))
+        header = {"version": TABLE_VERSION, "rows": len(self), "sources": self.sources, "meta": meta_header}
+        (folder / "table.json").write_text(json.dumps(header, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, folder: Path, mmap: bool = True) -> "DocumentTable":
+        """Read a saved table; with `mmap` the columns are memory-mapped, not loaded."""
+        folder = Path(folder)
+        header = json.loads((folder / "table.json").read_text(encoding="utf-8"))
+        if header.get("version") != TABLE_VERSION:
+            raise ValueError(f"Unsupported document table version: {header.get('version')}")
+
+        def arr(name: str) -> np.ndarray:
+            path = folder / f"{name}.npy"
+            a = np.load(path, mmap_mode="r" if mmap else None)
+            return a if a.size or not mmap else np.load(path)
+
+        meta: Dict[str, Any] = {}
+        for j, spec in enumerate(header["meta"]):
+            if spec["kind"] == "int":
+                meta[spec["key"]] = IntColumn(arr(f"meta{j}.values"), arr(f"meta{j}.state"))
+            else:
+                values = StringColumn(arr(f"meta{j}.data"), arr(f"meta{j}.offsets"))
+                meta[spec["key"]] = StrColumn(arr(f"meta{j}.codes"), values, spec["kind"] == "json")
+
+        return cls(
+            doc_id=StringColumn(arr("doc_id.data"), arr("doc_id.offsets")),
+            source=arr("source"),
+            sources=list(header["sources"]),
+            timestamp=arr("timestamp"),
+            tz_offset=arr("tz_offset"),
+            text=StringColumn(arr("text.data"), arr("text.offsets")),
+            event_offsets=arr("event_offsets"),
+            event_times=arr("event_times"),
+            meta=meta,
+        )
@@ -1,16 +1,87 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import sys
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+# Meta strings repeated across many documents (file paths, hosts, senders) are interned,
+# so 100k messages from one mbox share a single path string.
+INTERNED_META_KEYS = ("path", "host", "from")
+
+# Emails: text is "subject: ...\nfrom: ...\n\n<body>", composed from meta (see Document).
+EMAIL_HEADER_KEYS = ("subject", "from")
 
 
-@dataclass
 class Document:
-    """A unit of text + metadata to analyze."""
+    """A unit of text + metadata to analyze.
+
+    Slotted to avoid a per-instance __dict__. Documents built with `header_keys`
+    (emails) store only the body: `text` is composed on access as one
+    "key: meta[key]" line per header, a blank line and the body, so the
+    headers are kept once, in `meta`.
+    """
+
+    __slots__ = ("doc_id", "source", "body", "timestamp", "meta", "event_times", "header_keys")
+
+    def __init__(
+        self,
+        doc_id: str,
+        source: str,  # "email_mbox" | "email_eml" | "notes" | "browser"
+        text: str,
+        timestamp: Optional[datetime] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        # Set on aggregated records (one browser URL visited many times): every event time,
+        # newest first. `timestamp` is then the newest one.
+        event_times: Optional[List[datetime]] = None,
+        header_keys: Tuple[str, ...] = (),
+    ):
+        meta = {} if meta is None else meta
+        for k in INTERNED_META_KEYS:
+            v = meta.get(k)
+            if type(v) is str:
+                meta[k] = sys.intern(v)
+        self.doc_id = doc_id
+        self.source = sys.intern(source)
+        self.body = text
+        self.timestamp = timestamp
+        self.meta = meta
+        self.event_times = event_times
+        self.header_keys = header_keys
+
+    @property
+    def text(self) -> str:
+        if not self.header_keys:
+            return self.body
+        head = "\n".join(f"{k}: {self.meta.get(k, '')}" for k in self.header_keys)
+        return f"{head}\n\n{self.body}".strip()
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self.body = value
+        self.header_keys = ()
+
+    @property
+    def weight(self) -> int:
+        """How many events this document stands for."""
+        return len(self.event_times) if self.event_times else 1
+
+    def times(self) -> List[datetime]:
+        if self.event_times:
+            return self.event_times
+        return [self.timestamp] if self.timestamp is not None else []
+
+    def _key(self) -> tuple:
+        return (self.doc_id, self.source, self.text, self.timestamp, self.meta, self.event_times)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Document):
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None  # mutable, like the dataclass it replaces
 
-    doc_id: str
-    source: str  # "email_mbox" | "email_eml" | "notes" | "browser"
-    text: str
-    timestamp: Optional[datetime] = None
-    meta: Dict[str, Any] = field(default_factory=dict)
+    def __repr__(self) -> str:
+        return (
+            f"Document(doc_id={self.doc_id!r}, source={self.source!r}, text={self.text[:40]!r}, "
+            f"timestamp={self.timestamp!r}, meta={self.meta!r})"
+        )
@@ -3,6 +3,12 @@ from __future__ import annotations
 import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+
+# Local state (vault, indexes, caches) lives here; nothing is written next to user data.
+APP_DIR = Path.home() / ".ethical_mirror"
+
+_EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
 
 
 def stable_id(*parts: str) -> str:
@@ -24,5 +30,39 @@ def safe_read_text(path: Path, max_bytes: int = 2_000_000) -> str:
         return data.decode("latin-1", errors="ignore")
 
 
+def local_offset(secs: int) -> Optional[int]:
+    """This machine's UTC offset in seconds at an instant, or None where the platform can't tell."""
+    try:
+        off = datetime.fromtimestamp(secs, timezone.utc).astimezone().utcoffset()
+    except (OverflowError, OSError, ValueError):
+        return None
+    return int(off.total_seconds())
+
+
+def wall_seconds(dt: datetime) -> int:
+    # Seconds since 1970-01-01 of the local wall-clock reading, so hour/weekday buckets
+    # put every source in the user's own day. Naive datetimes already are local time
+    # (what datetime.fromtimestamp returns); aware ones (UTC email and browser times)
+    # are converted, or keep their own offset where the platform can't convert them.
+    # Same as calendar.timegm(dt.timetuple()), without building a struct_time per call.
+    if dt.tzinfo is not None:
+        try:
+            dt = dt.astimezone()
+        except (OverflowError, OSError, ValueError):
+            pass
+    return (dt.toordinal() - _EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+def epoch_key(dt: Optional[datetime]) -> float:
+    # Seconds since the epoch, for ordering mixed naive/aware datetimes: naive ones are
+    # local time (what datetime.fromtimestamp returns); missing ones sort before all others.
+    if dt is None:
+        return float("-inf")
+    try:
+        return dt.timestamp()
+    except (OverflowError, OSError, ValueError):
+        return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
 def now_utc() -> datetime:
     return datetime.now(timezone.utc)
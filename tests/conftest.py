@@ -0,0 +1,93 @@
+"""Shared test data: a small corpus with every source, and an in-memory document set."""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+import pytest
+
+from core.pipeline import ImportConfig
+from core.types import Document
+
+TOPICS = ["python docker kafka", "flight hotel visa", "gym protein workout", "stocks tax budget"]
+
+
+def _email(i: int) -> bytes:
+    msg = EmailMessage()
+    msg["Subject"] = f"Update {i}: {TOPICS[i % len(TOPICS)]}"
+    msg["From"] = f"sender{i % 3}@example.com"
+    msg["Date"] = format_datetime(datetime(2024, 5, 1, 8, tzinfo=timezone.utc) + timedelta(hours=7 * i))
+    msg["Message-ID"] = f"<m{i}@example.com>"
+    msg.set_content(f"Body {i} about {TOPICS[(i + 1) % len(TOPICS)]}.")
+    return msg.as_bytes()
+
+
+def _make_corpus(root, n=40):
+    mbox = root / "mail.mbox"
+    with open(mbox, "wb") as f:
+        for i in range(n):
+            f.write(b"From sender@example.com Mon Jan  1 00:00:00 2024\n" + _email(i) + b"\n")
+
+    eml_dir = root / "eml"
+    eml_dir.mkdir()
+    for i in range(n):
+        (eml_dir / f"{i:04d}.eml").write_bytes(_email(n + i))
+
+    notes = root / "notes"
+    notes.mkdir()
+    for i in range(n // 2):
+        (notes / f"note{i}.md").write_text(f"# Note {i}\n{TOPICS[i % len(TOPICS)]}\n", encoding="utf-8")
+
+    history = root / "History"
+    con = sqlite3.connect(str(history))
+    con.execute("CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT, title TEXT)")
+    con.execute("CREATE TABLE visits (id INTEGER PRIMARY KEY, url INTEGER, visit_time INTEGER)")
+    hosts = ["github.com", "arxiv.org", "www.youtube.com", "news.example.org"]
+    for u, host in enumerate(hosts, start=1):
+        con.execute("INSERT INTO urls VALUES (?, ?, ?)", (u, f"https://{host}/p", f"{host} {TOPICS[u % len(TOPICS)]}"))
+    chrome_2024 = 13_348_000_000_000_000  # microseconds since 1601-01-01, early 2024
+    for v in range(n * 2):
+        con.execute("INSERT INTO visits VALUES (?, ?, ?)", (v + 1, v % len(hosts) + 1, chrome_2024 + v * 3_600_000_000))
+    con.commit()
+    con.close()
+
+    return ImportConfig(
+        mbox_path=mbox,
+        eml_dir=eml_dir,
+        notes_dir=notes,
+        browser_history_sqlite=history,
+        state_dir=root / "state",
+    )
+
+
+def _report_docs():
+    base = datetime(2024, 3, 4, 9, tzinfo=timezone.utc)
+    words = ["python docker", "flight hotel visa", "gym protein", "stocks tax", "movie music", "hello"]
+    docs = []
+    for i in range(60):
+        text = f"{words[i % len(words)]} {words[(i * 7) % len(words)]}"
+        meta = {"path": "/tmp/x"}
+        source = "notes"
+        if i % 4 == 0:
+            source = "browser"
+            meta.update(host="github.com" if i % 8 else "www.amazon.in", url="https://example.com", title=text)
+        docs.append(Document(f"d{i}", source, text, base + timedelta(hours=i * 5), meta))
+    return docs
+
+
+@pytest.fixture
+def make_corpus():
+    """make_corpus(root, n=40) writes an mbox, an EML folder, notes and a Chrome History under root."""
+    return _make_corpus
+
+
+@pytest.fixture
+def make_email():
+    """make_email(i) returns the raw bytes of the i-th corpus message."""
+    return _email
+
+
+@pytest.fixture
+def report_docs():
+    """60 notes and browser documents with keyword hits in most categories."""
+    return _report_docs()
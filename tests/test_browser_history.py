@@ -0,0 +1,28 @@
+import sqlite3
+
+from core.ingest.browser_history import ingest_chrome_history_sqlite, iter_chrome_history_batches
+
+
+def test_reads_locked_history_and_resumes_from_visit_id(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=10)
+    locker = sqlite3.connect(str(cfg.browser_history_sqlite))
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        docs = ingest_chrome_history_sqlite(cfg.browser_history_sqlite)
+    finally:
+        locker.rollback()
+        locker.close()
+    # 20 visits spread over 4 URLs, one Document per URL
+    assert len(docs) == 4
+    assert sum(d.meta["visits"] for d in docs) == sum(d.weight for d in docs) == 20
+    assert [d.timestamp for d in docs] == sorted((d.timestamp for d in docs), reverse=True)
+    for d in docs:
+        assert d.event_times == sorted(d.event_times, reverse=True)
+        assert d.timestamp == d.event_times[0]
+
+    newer = ingest_chrome_history_sqlite(cfg.browser_history_sqlite, since_visit_id=15)
+    assert sum(d.meta["visits"] for d in newer) == 5
+    assert sorted(d.meta["visit_id"] for d in newer) == [17, 18, 19, 20]
+
+    batches = list(iter_chrome_history_batches(cfg.browser_history_sqlite, batch_size=3))
+    assert [len(b) for b in batches] == [3, 1]
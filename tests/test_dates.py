@@ -0,0 +1,16 @@
+from datetime import datetime, timezone
+
+from core.ingest.dates import DateParser
+
+
+def test_tiers_and_utc_normalization():
+    p = DateParser()
+    utc = timezone.utc
+    assert p.parse("Wed, 01 May 2024 10:00:00 +0530") == datetime(2024, 5, 1, 4, 30, tzinfo=utc)
+    assert p.parse("Wed, 01 May 2024 10:00:00 -0000").tzinfo is utc
+    iso = p.parse("2024-05-01T10:00:00+02:00")
+    assert iso == datetime(2024, 5, 1, 8, tzinfo=utc) and iso.tzinfo is utc
+    assert p.parse("2024-05-01T10:00:00+02:00") == iso
+    assert p.parse("1 May 2024 noonish?!") is None
+    assert p.parse("") is None
+    assert p.counts == {"rfc2822": 2, "memo": 1, "dateutil": 1, "failed": 1}
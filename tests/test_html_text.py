@@ -0,0 +1,19 @@
+from pathlib import Path
+
+import pytest
+
+from core.nlp.html_text import html_to_text
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures" / "html").glob("*.html"))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.name)
+def test_matches_beautifulsoup_get_text(path):
+    bs4 = pytest.importorskip("bs4")
+    html = path.read_text(encoding="utf-8")
+    assert html_to_text(html) == bs4.BeautifulSoup(html, "lxml").get_text(" ", strip=True)
+
+
+def test_stops_at_max_chars():
+    html = "<p>word</p>" * 100_000 + "<script>never reached"
+    assert html_to_text(html, max_chars=50) == ("word " * 10)[:50]
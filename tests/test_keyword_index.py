@@ -0,0 +1,14 @@
+from core.nlp.keyword_index import KeywordIndex
+from core.nlp.text_clean import normalize
+
+
+def test_scan_counts_per_category_and_keyword():
+    index = KeywordIndex({"a": ["python", "zero trust"], "b": ["trust", "gym"]})
+    hits = index.scan(normalize("Python, python and Zero Trust! pythonic gym"))
+    assert hits["a"] == {"python": 2, "zero trust": 1}
+    assert hits["b"] == {"trust": 1, "gym": 1}
+
+
+def test_scan_no_hits():
+    index = KeywordIndex({"a": ["docker"]})
+    assert index.scan(normalize("nothing relevant here")) == {}
@@ -0,0 +1,37 @@
+import mailbox
+
+from core.ingest.mbox_index import build_mbox_index, load_or_build_index
+from core.ingest.email_mbox import ingest_mbox
+
+
+def _write(path, n, start=0, mode="wb"):
+    with open(path, mode) as f:
+        for i in range(start, start + n):
+            f.write(b"From a@b Mon Jan  1 00:00:00 2024\nSubject: m%d\n\nbody %d\nFrom: quoted line\n\n" % (i, i))
+
+
+def test_index_matches_mailbox_module(tmp_path):
+    path = tmp_path / "m.mbox"
+    _write(path, 5)
+    idx = build_mbox_index(path)
+    mbox = mailbox.mbox(path)
+    assert len(idx) == len(mbox) == 5
+    with open(path, "rb") as f:
+        buf = f.read()
+    assert [idx.read(buf, k) for k in range(5)] == [mbox.get_bytes(k) for k in mbox.iterkeys()]
+
+
+def test_index_resumes_after_append_and_selects_newest(tmp_path):
+    path = tmp_path / "m.mbox"
+    _write(path, 3)
+    first = load_or_build_index(path, index_dir=tmp_path / "idx")
+    _write(path, 2, start=3, mode="ab")
+    grown = load_or_build_index(path, index_dir=tmp_path / "idx")
+    assert len(first) == 3 and len(grown) == 5
+    assert list(grown.offsets) == list(build_mbox_index(path).offsets)
+    assert grown.index_after(first.offsets[-1]) == 3
+
+    newest = ingest_mbox(path, limit=2, newest_first=True, index_dir=tmp_path / "idx")
+    assert [d.meta["subject"] for d in newest] == ["m4", "m3"]
+    resumed = ingest_mbox(path, start=3, index_dir=tmp_path / "idx")
+    assert [d.meta["index"] for d in resumed] == [3, 4]
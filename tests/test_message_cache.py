@@ -0,0 +1,62 @@
+import pytest
+
+from core.ingest import email_eml, email_mbox
+from core.ingest.message_cache import MessageCache
+from core.pipeline import run_pipeline
+
+
+def test_second_run_skips_mime_parsing(tmp_path, monkeypatch, make_corpus):
+    cfg = make_corpus(tmp_path, n=10)
+    cfg.message_cache_passphrase = "correct horse"
+    docs, first = run_pipeline(cfg)
+    assert first["summary"]["message_cache"]["misses"] == 20
+    assert first["summary"]["message_cache"]["entries"] == 20
+
+    def boom(raw):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(email_mbox, "_parse_raw", boom)
+    monkeypatch.setattr(email_eml, "_parse_raw", boom)
+    cached_docs, second = run_pipeline(cfg)
+    assert second["summary"]["message_cache"]["hits"] == 20
+    assert cached_docs == docs
+    for r in (first, second):
+        del r["summary"]["message_cache"], r["diagnostics"]
+    assert second == first
+
+    cfg.message_cache_passphrase = "wrong"
+    with pytest.raises(ValueError):
+        run_pipeline(cfg)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = MessageCache("pw", path=tmp_path / "c.sqlite", max_bytes=1000)
+    keys = [cache.message_key(b"m%d" % i) for i in range(6)]
+    for k in keys:
+        cache.put_many([(k, ("s", "f", "", "", "x" * 150, 0))])
+        cache.get_many([keys[0]])  # keep the first one hot
+    assert cache.bytes <= 1000 and cache.evictions > 0
+    assert keys[0] in cache.get_many(keys)
+    assert keys[1] not in cache.get_many(keys)
+    cache.close()
+
+
+def test_row_keys_need_the_passphrase_and_bind_their_values(tmp_path):
+    import hashlib
+
+    from cryptography.exceptions import InvalidTag
+
+    raw = b"Subject: hi\n\nbody\n"
+    a = MessageCache("pw", path=tmp_path / "a.sqlite")
+    b = MessageCache("pw", path=tmp_path / "b.sqlite")  # same passphrase, own salt
+    ka, kb = a.message_key(raw), b.message_key(raw)
+    assert ka != kb
+    assert hashlib.sha256(raw).digest() not in (ka, kb)
+
+    other = a.message_key(b"other")
+    a.put_many([(ka, ("s", "f", "", "", "x", 0))])
+    a.con.execute("UPDATE messages SET key = ? WHERE key = ?", (other, ka))
+    with pytest.raises(InvalidTag):
+        a.get_many([other])
+    a.close()
+    b.close()
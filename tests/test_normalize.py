@@ -1,7 +1,25 @@
-from core.nlp.text_clean import normalize
+from core.nlp.text_clean import normalize, NormalizeCache
 
 def test_normalize():
     t = normalize("Hello! Email me at test@example.com https://example.com 123")
     assert "email" in t
     assert "url" in t
     assert "num" in t
+
+
+def test_normalize_cache_hits_and_evicts():
+    cache = NormalizeCache(max_bytes=200)
+    assert cache.get("a", "Hello World") == "hello world"
+    assert cache.get("a", "Hello World") == "hello world"
+    cache.get("b", "x" * 150)
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["evictions"] == 1 and stats["bytes"] <= 200
+
+
+def test_normalize_cache_misses_when_text_changes_under_same_id():
+    cache = NormalizeCache()
+    assert cache.get("note", "Old draft") == "old draft"
+    # Same doc_id and length, different content (a note edited in place).
+    assert cache.get("note", "New draft") == "new draft"
+    assert cache.stats()["hits"] == 0
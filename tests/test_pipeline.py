@@ -0,0 +1,334 @@
+import json
+import sqlite3
+
+from core.nlp.text_clean import NormalizeCache
+from core.pipeline import run_pipeline
+from core.profiling import TRACE_ENV
+from core.progress import CancelToken
+from core.source_cache import SourceCache
+
+
+def test_pipeline_batch(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path)
+    docs, report = run_pipeline(cfg)
+    # browser visits are folded into one document per URL
+    assert report["summary"]["documents_analyzed"] == len(docs) == 40 + 40 + 20 + 4
+    assert report["summary"]["events_analyzed"] == 40 + 40 + 20 + 80
+    assert report["summary"]["sources"] == ["browser", "email_eml", "email_mbox", "notes"]
+    assert report["interests"]
+
+
+def test_documents_are_merged_newest_first_by_utc_instant(tmp_path, make_corpus):
+    from core.utils import epoch_key
+
+    cfg = make_corpus(tmp_path, n=10)
+    # 04:30 UTC, older than every mbox message although its ISO string sorts after them
+    (cfg.eml_dir / "offset.eml").write_bytes(
+        b"Subject: offset\nFrom: a@example.com\nDate: Wed, 01 May 2024 10:00:00 +0530\n\nbody\n"
+    )
+    docs, _ = run_pipeline(cfg)
+    keys = [epoch_key(d.timestamp) for d in docs]
+    assert keys == sorted(keys, reverse=True)
+    assert docs.index(next(d for d in docs if d.meta.get("subject") == "offset")) > max(
+        i for i, d in enumerate(docs) if d.source == "email_mbox"
+    )
+
+
+def test_pipeline_streaming_matches_batch_aggregates(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path)
+    _, batch = run_pipeline(cfg)
+    cfg.streaming = True
+    docs, streamed = run_pipeline(cfg)
+    assert docs == []
+    assert streamed["summary"] == batch["summary"]
+    assert streamed["rhythm"] == batch["rhythm"]
+    assert streamed["work_patterns"] == batch["work_patterns"]
+    # Document order differs between the two modes, so only compare tie-insensitive values.
+    def scores(r):
+        return sorted((x["label"], x["score"], sorted(x["top_keywords"])) for x in r["interests"])
+
+    assert scores(streamed) == scores(batch)
+
+
+def test_parallel_email_parsing_matches_serial(tmp_path, make_corpus):
+    from core.ingest.email_mbox import ingest_mbox
+    from core.ingest.email_eml import ingest_eml_dir
+
+    cfg = make_corpus(tmp_path, n=12)
+    for ingest, path in ((ingest_mbox, cfg.mbox_path), (ingest_eml_dir, cfg.eml_dir)):
+        kw = {"index_dir": None} if ingest is ingest_mbox else {}
+        serial = ingest(path, workers=1, **kw)
+        parallel = ingest(path, workers=2, **kw)
+        assert [(d.doc_id, d.timestamp, d.text) for d in parallel] == [(d.doc_id, d.timestamp, d.text) for d in serial]
+
+
+def test_ingest_depth_headers_and_snippet(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=12)
+    full_docs, full = run_pipeline(cfg)
+    cfg.ingest_depth = "headers"
+    docs, headers = run_pipeline(cfg)
+    assert [d.doc_id for d in docs] == [d.doc_id for d in full_docs]
+    assert all(d.body == "" for d in docs if d.source.startswith("email"))
+    assert headers["rhythm"] == full["rhythm"]
+    assert headers["work_patterns"] == full["work_patterns"]
+
+    cfg.ingest_depth = "snippet:4"
+    docs, _ = run_pipeline(cfg)
+    assert {d.body for d in docs if d.source.startswith("email")} == {"Body"}
+
+
+def test_changing_depth_does_not_reuse_cached_normalization(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=12)
+    cache = NormalizeCache()
+    run_pipeline(cfg, norm_cache=cache)
+    cfg.ingest_depth = "headers"
+    _, warm = run_pipeline(cfg, norm_cache=cache)
+    _, cold = run_pipeline(cfg)
+    assert warm["interests"] == cold["interests"]
+    # Only notes and browser documents read the same text at both depths.
+    assert warm["summary"]["normalization_cache"]["hits"] == 6 + 4
+
+
+def test_duplicates_across_sources_are_analyzed_once(tmp_path, make_corpus, make_email):
+    cfg = make_corpus(tmp_path, n=10)
+    for i in range(3):  # mbox messages also exported as .eml
+        (cfg.eml_dir / f"copy{i}.eml").write_bytes(make_email(i))
+    no_id = b"Subject: hi\nFrom: a@example.com\nDate: Wed, 01 May 2024 10:00:00 +0000\n\nsame body\n"
+    (cfg.eml_dir / "a.eml").write_bytes(no_id)
+    (cfg.eml_dir / "b.eml").write_bytes(no_id.replace(b"same body", b"Same  body"))
+    (cfg.notes_dir / "copy.md").write_text("# Note 1\nflight hotel visa\n", encoding="utf-8")
+
+    docs, report = run_pipeline(cfg)
+    assert report["summary"]["duplicates_collapsed"] == 5
+    assert report["summary"]["documents_analyzed"] == len(docs) == 10 + 11 + 5 + 4
+    for mode in ("streaming", "incremental"):
+        setattr(cfg, mode, True)
+        _, other = run_pipeline(cfg)
+        setattr(cfg, mode, False)
+        assert other["summary"]["duplicates_collapsed"] == 5
+        assert other["summary"]["documents_analyzed"] == report["summary"]["documents_analyzed"]
+
+
+def test_quoted_replies_are_stripped_at_ingest(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=4)
+    quoted = "> " + "flight hotel visa " * 20 + "\n"
+    body = "Booked.\n\nAnn wrote:\n" + quoted * 3
+    reply = "Subject: Re: trip\nFrom: a@example.com\nDate: Wed, 01 May 2024 10:00:00 +0000\n\n"
+    (cfg.eml_dir / "reply.eml").write_text(reply + body, encoding="utf-8")
+    docs, report = run_pipeline(cfg)
+    assert next(d for d in docs if d.meta.get("subject") == "Re: trip").body == "Booked."
+    stripped = report["summary"]["quote_stripped_bytes"]
+    assert stripped == {"email_eml": len(body.strip()) - len("Booked.")}
+    for mode in ("streaming", "incremental"):
+        setattr(cfg, mode, True)
+        _, other = run_pipeline(cfg)
+        setattr(cfg, mode, False)
+        assert other["summary"]["quote_stripped_bytes"] == stripped
+
+
+def test_parallel_sources_match_sequential_ingestion(tmp_path, make_corpus, make_email):
+    cfg = make_corpus(tmp_path, n=12)
+    for i in range(3):
+        (cfg.eml_dir / f"copy{i}.eml").write_bytes(make_email(i))
+    for streaming in (False, True):
+        cfg.streaming = streaming
+        runs = []
+        for parallel in (False, True):
+            cfg.parallel_sources = parallel
+            docs, report = run_pipeline(cfg)
+            assert list(report.pop("diagnostics")["sources"]) == ["mbox", "eml", "notes", "browser"]
+            runs.append((docs, report))
+        assert runs[0] == runs[1]
+        assert runs[1][1]["summary"]["duplicates_collapsed"] == 3
+
+
+def test_diagnostics_report_stages_sources_and_chrome_trace(tmp_path, monkeypatch, make_corpus):
+    cfg = make_corpus(tmp_path, n=10)
+    cfg.trace_memory = True
+    trace = tmp_path / "trace.json"
+    monkeypatch.setenv(TRACE_ENV, str(trace))
+    docs, report = run_pipeline(cfg)
+    diag = report["diagnostics"]
+    assert {"ingest", "normalization", "time profiles", "interest scoring", "attribution"} <= set(diag["stages"])
+    assert diag["stages"]["ingest"]["peak_mb"] > 0
+    assert diag["stages"]["normalization"]["calls"] == len(docs)
+    assert {k: v["items"] for k, v in diag["sources"].items()} == {"mbox": 10, "eml": 10, "notes": 5, "browser": 4}
+    assert diag["sources"]["notes"]["bytes"] == sum(len(d.body) for d in docs if d.source == "notes")
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert {"ingest", "ingest mbox", "attribution"} <= {e["name"] for e in events}
+
+
+def test_cancel_returns_partial_report(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=300)
+    cfg.parallel_sources = False
+    _, full = run_pipeline(cfg)
+    for incremental in (False, True):
+        cfg.incremental = incremental
+        cancel = CancelToken()
+        updates = []
+
+        def progress(p):
+            updates.append(p)
+            if p.items >= 100:
+                cancel.cancel()
+
+        _, partial = run_pipeline(cfg, progress=progress, cancel=cancel)
+        assert partial["summary"]["cancelled"] is True
+        assert 100 <= partial["summary"]["documents_analyzed"] < full["summary"]["documents_analyzed"]
+        assert [p.stage for p in updates][-2:] == ["report", "done"]
+        assert updates[0].total == 300
+    # the cancelled incremental run left no manifest behind
+    assert not list((tmp_path / "state").glob("manifest*"))
+
+
+def test_source_cache_rereads_only_changed_sources(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=20)
+    cache = SourceCache()
+    limits = {"eml": 20}
+    docs, first = run_pipeline(cfg, limits, source_cache=cache)
+    assert first["summary"]["source_cache"] == {"reused": [], "read": ["mbox", "eml", "notes", "browser"]}
+    same_docs, same = run_pipeline(cfg, limits, source_cache=cache)
+    assert same_docs is docs and same["summary"]["source_cache"]["read"] == []
+    assert all(s["cached"] for s in same["diagnostics"]["sources"].values())
+    assert not any(same["summary"]["date_parsing"].values())
+    norm_cache = NormalizeCache()
+    _, again = run_pipeline(cfg, limits, norm_cache=norm_cache, source_cache=cache)
+    assert again["summary"]["normalization_cache"] == norm_cache.stats()
+
+    limits["eml"] = 10
+    (cfg.notes_dir / "note0.md").write_text("# Edited\nflight hotel\n", encoding="utf-8")
+    docs, cached = run_pipeline(cfg, limits, source_cache=cache)
+    assert cached["summary"]["source_cache"] == {"reused": ["mbox", "browser"], "read": ["eml", "notes"]}
+    sources = cached["diagnostics"]["sources"]
+    assert [name for name, s in sources.items() if s.get("cached")] == ["mbox", "browser"]
+    assert sources["mbox"]["items"] == 20 and sources["mbox"]["bytes"] > 0
+    fresh_docs, fresh = run_pipeline(cfg, limits)
+    assert docs == fresh_docs
+    for r in (cached, fresh):
+        del r["diagnostics"], r["summary"]["date_parsing"]
+    del cached["summary"]["source_cache"]
+    assert cached == fresh
+
+
+def test_incremental_run_reuses_unchanged_items(tmp_path, make_corpus, make_email):
+    cfg = make_corpus(tmp_path)
+    _, full = run_pipeline(cfg)
+
+    cfg.incremental = True
+    _, first = run_pipeline(cfg)
+    assert first["summary"]["incremental"] == {"reused": 0, "ingested": 104, "removed": 0}
+    assert first["rhythm"] == full["rhythm"]
+
+    (cfg.notes_dir / "note0.md").write_text("# changed\nkubernetes docker\n", encoding="utf-8")
+    with open(cfg.mbox_path, "ab") as f:
+        f.write(b"From sender@example.com Mon Jan  1 00:00:00 2024\n" + make_email(999) + b"\n")
+    con = sqlite3.connect(str(cfg.browser_history_sqlite))
+    con.executemany("INSERT INTO visits VALUES (?, 1, ?)", [(81, 13_349_000_000_000_000), (82, 13_349_100_000_000_000)])
+    con.commit()
+    con.close()
+    _, second = run_pipeline(cfg)
+    # note0 changed, the last mbox message is re-checked, one message was appended and
+    # one URL got two new visits
+    assert second["summary"]["incremental"] == {"reused": 101, "ingested": 4, "removed": 0}
+    assert second["summary"]["documents_analyzed"] == 105
+    assert second["summary"]["events_analyzed"] == 183
+
+    cfg.incremental = False
+    _, rerun = run_pipeline(cfg)
+    assert second["rhythm"] == rerun["rhythm"]
+    assert second["work_patterns"] == rerun["work_patterns"]
+    assert [(x["label"], x["score"]) for x in second["interests"]] == [(x["label"], x["score"]) for x in rerun["interests"]]
+
+
+def test_unencrypted_manifest_keeps_no_content(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=8)
+    cfg.incremental = True
+    _, report = run_pipeline(cfg)
+    assert report["interests"]
+    raw = (cfg.state_dir / "manifest.json").read_text(encoding="utf-8")
+    for text in ("Body 1 about", "Update 1", "sender1@example.com", "# Note", "github.com", "note0.md", "mail.mbox"):
+        assert text not in raw
+
+    cfg.manifest_passphrase = "correct horse"
+    _, encrypted = run_pipeline(cfg)
+    assert any(x["preview"] for it in encrypted["interests"] for x in it["top_sources"])
+
+
+def test_date_parsing_counts_only_this_runs_messages(tmp_path, make_corpus):
+    from concurrent.futures import ThreadPoolExecutor
+
+    (tmp_path / "small").mkdir()
+    (tmp_path / "large").mkdir()
+    small = make_corpus(tmp_path / "small", n=6)
+    large = make_corpus(tmp_path / "large", n=30)
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        runs = list(ex.map(lambda cfg: run_pipeline(cfg)[1], [small, large, small, large]))
+    assert [sum(r["summary"]["date_parsing"].values()) for r in runs] == [12, 60, 12, 60]
+
+
+def test_null_profiler_records_nothing(tmp_path, make_corpus):
+    from core.incremental import run_incremental
+    from core.profiling import NULL_PROFILER
+
+    cfg = make_corpus(tmp_path, n=6)
+    report = run_incremental(cfg)
+    assert report["summary"]["incremental"]["ingested"] == 6 + 6 + 3 + 4
+    assert NULL_PROFILER.sources == {} and NULL_PROFILER.spans == [] and NULL_PROFILER.timers == {}
+
+
+def test_every_mode_keeps_the_same_duplicate_copy(tmp_path, make_corpus):
+    cfg = make_corpus(tmp_path, n=6)
+
+    def message(date, body):
+        return (
+            f"Subject: resent\nFrom: a@example.com\nMessage-ID: <resent@example.com>\nDate: {date}\n\n{body}\n"
+        ).encode()
+
+    # The first copy read is the older one, in the mbox and across sources.
+    with open(cfg.mbox_path, "ab") as f:
+        for date, body in (("Wed, 01 May 2024 10:00:00 +0000", "gym protein"), ("Wed, 08 May 2024 10:00:00 +0000", "stocks tax")):
+            f.write(b"From sender@example.com Mon Jan  1 00:00:00 2024\n" + message(date, body) + b"\n")
+    (cfg.eml_dir / "resent.eml").write_bytes(message("Wed, 15 May 2024 10:00:00 +0000", "movie music"))
+
+    docs, batch = run_pipeline(cfg)
+    assert [d.body for d in docs if d.meta.get("subject") == "resent"] == ["gym protein"]
+    assert batch["summary"]["duplicates_collapsed"] == 2
+    for mode in ("streaming", "columnar", "incremental"):
+        setattr(cfg, mode, True)
+        _, other = run_pipeline(cfg)
+        setattr(cfg, mode, False)
+        assert other["summary"]["duplicates_collapsed"] == 2
+        assert other["rhythm"] == batch["rhythm"], mode
+        assert [(x["label"], x["score"]) for x in other["interests"]] == [
+            (x["label"], x["score"]) for x in batch["interests"]
+        ], mode
+
+
+def test_incremental_adds_facts_in_the_same_order_as_batch(tmp_path, monkeypatch, make_corpus):
+    import time
+
+    from core.report.aggregate import ReportAccumulator
+
+    # Clocks fall back at 06:00 UTC: 06:10 UTC reads 01:10, before 05:30 UTC's 01:30.
+    monkeypatch.setenv("TZ", "EST5EDT,M3.2.0,M11.1.0")
+    time.tzset()
+    try:
+        cfg = make_corpus(tmp_path, n=10)
+        for name, hhmm in (("before.eml", b"05:30"), ("after.eml", b"06:10")):
+            (cfg.eml_dir / name).write_bytes(
+                b"Subject: " + name.encode() + b"\nFrom: a@example.com\nDate: Sun, 03 Nov 2024 "
+                + hhmm + b":00 +0000\n\nbody\n"
+            )
+        docs, _ = run_pipeline(cfg)
+
+        added = []
+        add_facts = ReportAccumulator.add_facts
+        monkeypatch.setattr(
+            ReportAccumulator, "add_facts", lambda self, f, d=None: (added.append(f["doc_id"]), add_facts(self, f, d))
+        )
+        cfg.incremental = True
+        run_pipeline(cfg)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert added == [d.doc_id for d in docs]
@@ -0,0 +1,30 @@
+from core.nlp.quote_strip import strip_quoted
+
+
+def test_strips_quoted_reply_with_wrapped_attribution_and_signature():
+    body = (
+        "Sounds good, see you at the gym.\n"
+        "\n"
+        "On Mon, 1 Jan 2024 at 10:00, Ann Example <\n"
+        "ann@example.com> wrote:\n"
+        "> Are we still on for tomorrow?\n"
+        ">> earlier message\n"
+        "\n"
+        "-- \n"
+        "Bob Example | Director of Things | +1 555 0100\n"
+    )
+    text, removed = strip_quoted(body)
+    assert text == "Sounds good, see you at the gym."
+    assert removed == len(body.encode("utf-8")) - len(text)
+
+
+def test_inline_replies_and_outlook_original_are_handled():
+    body = "> question one\nanswer one\n> question two\nanswer two\n-----Original Message-----\nFrom: x\nold text"
+    assert strip_quoted(body) == ("answer one\nanswer two", len(body) - len("answer one\nanswer two"))
+    outlook = "Thanks!\r\n\r\n________________________________\r\nFrom: Ann\r\nSent: Monday\r\n\r\nold text"
+    assert strip_quoted(outlook)[0] == "Thanks!"
+
+
+def test_plain_bodies_are_untouched():
+    body = "Meeting moved to 3pm -- bring the budget draft (2 > 1).\n"
+    assert strip_quoted(body) == (body, 0)
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from core.types import Document
+from core.report.report import build_report
+from core.report.aggregate import ReportAccumulator
+
+
+def test_streaming_accumulator_matches_batch_report(report_docs):
+    docs = report_docs
+    assert ReportAccumulator().extend(docs).report() == build_report(docs)
+
+
+def test_persisted_facts_rebuild_the_same_report(report_docs):
+    import json
+
+    docs = report_docs
+    acc = ReportAccumulator()
+    facts = [json.loads(json.dumps(acc.facts(d))) for d in docs]
+    rebuilt = ReportAccumulator()
+    for f in facts:
+        rebuilt.add_facts(f)
+    assert rebuilt.report() == build_report(docs)
+
+
+def test_frequently_visited_urls_rank_first():
+    base = datetime(2024, 3, 4, 9, tzinfo=timezone.utc)
+    once = Document("once", "browser", "python docker", base, {"host": "example.org"})
+    times = [base - timedelta(hours=h) for h in range(50)]
+    often = Document("often", "browser", "python docker", times[0], {"host": "example.org"}, event_times=times)
+    docs = [once, often]
+    report = build_report(docs)
+    assert report == ReportAccumulator().extend(docs).report()
+    tech = next(x for x in report["interests"] if x["top_sources"][0]["doc_id"] in ("once", "often"))
+    assert [x["doc_id"] for x in tech["top_sources"]] == ["often", "once"]
+    att = next(a for a in report["attributions"] if a["inference"] == tech["label"])
+    assert [x["doc_id"] for x in att["top_documents"]] == ["often", "once"]
+
+
+def test_keyword_attribution_accepts_a_shared_index(report_docs):
+    from core.explain.attribution import keyword_attribution
+    from core.infer.interests import CATEGORY_KEYWORDS, KEYWORD_INDEX
+
+    for label, keywords in CATEGORY_KEYWORDS.items():
+        assert keyword_attribution(report_docs, label, keywords, index=KEYWORD_INDEX) == keyword_attribution(
+            report_docs, label, keywords
+        )
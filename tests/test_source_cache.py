@@ -0,0 +1,23 @@
+from core.source_cache import SourceCache
+from core.types import Document
+
+
+def _docs(n, size):
+    return [Document(f"d{i}", "notes", "x" * size) for i in range(n)]
+
+
+def test_result_is_only_kept_while_its_sources_are():
+    cache = SourceCache(max_bytes=20_000)
+    small, large = _docs(4, 100), _docs(40, 1000)
+    cache.put("small", small)
+    cache.put("large", large)  # over budget on its own: not kept
+    cache.put_result("run", small + large, {}, ["small", "large"])
+    assert cache.result("run") is None
+
+    cache.put_result("run", small, {}, ["small"])
+    assert cache.result("run") == (small, {})
+    for i in range(4):
+        cache.put(f"other{i}", _docs(4, 1000))  # evicts "small"
+    assert cache.get("small") is None
+    assert cache.result("run") is None
+    assert cache.bytes <= cache.max_bytes
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from core.infer.timeline import timestamp_column
+from core.pipeline import run_pipeline
+from core.report.report import build_report
+from core.table import DocumentTable
+from core.types import Document
+
+
+def _mixed_docs():
+    ist = timezone(timedelta(hours=5, minutes=30))
+    return [
+        Document("a", "email_mbox", "subject: héllo\nbody", datetime(2024, 1, 2, 3, 4, 5, tzinfo=ist),
+                 {"subject": "héllo", "index": 0, "offset": 10, "path": "/m.mbox"}),
+        Document("b", "notes", "", datetime(2023, 5, 6, 7, 8, 9, 123456), {"path": "/n.md", "size": 0}),
+        Document("c", "email_eml", "no date", None, {"subject": "", "path": "/m.mbox", "score": 1.5}),
+        Document("d", "browser", "visited: x.org", datetime(2024, 2, 1, 12, 0, 0, 500, tzinfo=timezone.utc),
+                 {"host": "x.org", "visits": 3, "visit_time": None, "path": "/History"},
+                 event_times=[datetime(2024, 2, 1, 12, 0, 0, 500, tzinfo=timezone.utc) - timedelta(days=k) for k in range(3)]),
+    ]
+
+
+def test_table_round_trips_documents_through_disk(tmp_path):
+    docs = _mixed_docs()
+    table = DocumentTable.from_documents(docs)
+    assert list(table) == docs
+    assert [d.timestamp.utcoffset() if d.timestamp else None for d in table] == [
+        d.timestamp.utcoffset() if d.timestamp else None for d in docs
+    ]
+    assert timestamp_column(table).tolist() == timestamp_column(docs).tolist()
+    assert table.weights().tolist() == [1, 1, 1, 3]
+    # repeated paths are stored once
+    assert len(table.meta["path"].values) == 3
+
+    table.save(tmp_path / "t")
+    loaded = DocumentTable.load(tmp_path / "t")
+    assert isinstance(loaded.text.data, np.memmap)
+    assert list(loaded) == docs
+    assert [d.doc_id for d in loaded.newest_first()] == ["d", "a", "b", "c"]
+    # 04:30 UTC is newer than 01:00 UTC, whatever each one's own offset
+    ist = timezone(timedelta(hours=5, minutes=30))
+    pair = [Document("utc", "notes", "", datetime(2024, 1, 1, 1, tzinfo=timezone.utc)),
+            Document("ist", "notes", "", datetime(2024, 1, 1, 10, tzinfo=ist))]
+    assert [d.doc_id for d in DocumentTable.from_documents(pair).newest_first()] == ["ist", "utc"]
+    assert list(loaded.take(np.array([3, 1]))) == [docs[3], docs[1]]
+
+
+def test_report_from_table_matches_document_list(tmp_path, make_corpus, report_docs):
+    docs = report_docs
+    assert build_report(DocumentTable.from_documents(docs)) == build_report(docs)
+
+    cfg = make_corpus(tmp_path)
+    docs, batch = run_pipeline(cfg)
+    cfg.columnar = True
+    table, columnar = run_pipeline(cfg)
+    assert isinstance(table, DocumentTable)
+    assert list(table) == docs
+    del columnar["diagnostics"], batch["diagnostics"]
+    assert columnar == batch
+
+
+def test_email_text_is_composed_from_stored_headers():
+    from core.types import EMAIL_HEADER_KEYS
+
+    d = Document("e", "email_mbox", "body text\n", None, {"subject": "Hi", "from": "a@b", "path": "/m"}, header_keys=EMAIL_HEADER_KEYS)
+    assert d.text == "subject: Hi\nfrom: a@b\n\nbody text"
+    assert d == Document("e", "email_mbox", d.text, None, {"subject": "Hi", "from": "a@b", "path": "/m"})
+    other = Document("f", "email_mbox", "", None, {"subject": "", "from": "a@b", "path": "/".join(["", "m"])}, header_keys=EMAIL_HEADER_KEYS)
+    assert other.text == "subject: \nfrom: a@b"
+    assert other.meta["path"] is d.meta["path"]
+    assert not hasattr(d, "__dict__")
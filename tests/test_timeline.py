@@ -0,0 +1,89 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from core.infer.timeline import TimeHistograms, histograms_from_docs, timestamp_column
+from core.report.aggregate import ReportAccumulator
+from core.table import DocumentTable
+from core.types import Document
+from core.utils import wall_seconds
+
+
+def test_vectorized_histograms_match_per_event_counts():
+    plus5 = timezone(timedelta(hours=5, minutes=30))
+    base = datetime(1969, 12, 25, 23, tzinfo=timezone.utc)  # also covers pre-epoch times
+    times = [base + timedelta(minutes=97 * i) for i in range(500)]
+    times = [t.astimezone(plus5) if i % 3 == 0 else t for i, t in enumerate(times)]
+    docs = [Document(f"d{i}", "notes", "x", t) for i, t in enumerate(times[:100])]
+    docs.append(Document("agg", "browser", "x", times[100], event_times=times[100:]))
+
+    expected = TimeHistograms()
+    for t in times:
+        expected.add(t)
+
+    assert histograms_from_docs(docs) == expected
+    assert histograms_from_docs([]) == TimeHistograms()
+
+    acc = ReportAccumulator()
+    acc.extend(docs)
+    acc._flush_times()
+    assert acc.times == expected
+
+    column = timestamp_column(docs)
+    assert column.tolist() == timestamp_column(DocumentTable.from_documents(docs)).tolist()
+    assert column.tolist() == [wall_seconds(t) for t in times]
+
+
+@pytest.fixture
+def utc_plus_3(monkeypatch):
+    # A fixed local zone (POSIX TZ string, no tzdata needed) so buckets are predictable.
+    monkeypatch.setenv("TZ", "XST-3")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_buckets_follow_the_local_wall_clock(utc_plus_3):
+    ist = timezone(timedelta(hours=5, minutes=30))
+    pst = timezone(timedelta(hours=-8))
+    times = [
+        datetime(2024, 3, 4, 9, 15, tzinfo=timezone.utc),  # Monday 12h local
+        datetime(2024, 3, 9, 23, 59, 59, tzinfo=ist),  # 18h UTC: Saturday 21h local
+        datetime(2024, 3, 10, 0, 30, tzinfo=pst),  # 08h UTC: Sunday 11h local
+        datetime(1969, 12, 31, 22, 0, tzinfo=timezone.utc),  # Thursday 1970-01-01 01h local
+        datetime(2024, 2, 29, 13, 0),  # naive, already local: Thursday 13h
+    ]
+    hourly = [0] * 24
+    for h in (12, 21, 11, 1, 13):
+        hourly[h] += 1
+    weekday_hourly = [0] * 24
+    for h in (12, 1, 13):
+        weekday_hourly[h] += 1
+    dow = [1, 0, 0, 2, 0, 1, 1]
+    days = {date(2024, 3, 4), date(2024, 3, 9), date(2024, 3, 10), date(1970, 1, 1), date(2024, 2, 29)}
+
+    docs = [Document(f"d{i}", "notes", "x", t) for i, t in enumerate(times[:2])]
+    docs.append(Document("agg", "browser", "x", times[2], event_times=times[2:]))
+    acc = ReportAccumulator()
+    acc.extend(docs)
+    acc._flush_times()
+    per_event = TimeHistograms()
+    for t in times:
+        per_event.add(t)
+    for h in (histograms_from_docs(docs), acc.times, per_event):
+        assert h.hourly == hourly
+        assert h.dow == dow
+        assert h.weekday_hourly == weekday_hourly
+        assert h.days == {d.toordinal() for d in days}
+        assert h.n == 5
+
+
+def test_email_and_note_at_the_same_local_hour_share_a_bucket(utc_plus_3):
+    sent = datetime(2024, 5, 6, 14, 20, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    email = Document("e", "email", "x", sent.astimezone(timezone.utc))
+    note = Document("n", "notes", "x", sent.astimezone().replace(tzinfo=None, minute=5))
+    hist = histograms_from_docs([email, note])
+    assert max(hist.hourly) == 2
+    assert len(hist.days) == 1
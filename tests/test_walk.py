@@ -0,0 +1,21 @@
+import os
+
+from core.ingest.email_eml import list_eml_files
+from core.ingest.notes import SUPPORTED, ingest_notes_dir, list_note_files
+
+
+def test_walker_matches_rglob_listings(tmp_path):
+    for i, rel in enumerate(["a/x.eml", "a-b/y.eml", "a/b/z.EML", "a b/n.md", "a/N.TXT", "c.eml", "d.bin", "a/b/m.txt"]):
+        p = tmp_path / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(f"note {i}")
+        os.utime(p, ns=(0, (i * 7 % 5) * 10**9 + i))
+    os.symlink(tmp_path / "a", tmp_path / "link")
+
+    emls = sorted(p for p in tmp_path.rglob("*.eml") if p.is_file())
+    notes = [p for p in tmp_path.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED]
+    notes.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    for limit in (2, 100):
+        assert list_eml_files(tmp_path, limit=limit) == emls[:limit]
+        assert list_note_files(tmp_path, limit=limit) == notes[:limit]
+    assert ingest_notes_dir(tmp_path, io_workers=3) == ingest_notes_dir(tmp_path, io_workers=1)